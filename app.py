@@ -1,45 +1,168 @@
+import os
 import streamlit as st
 from src.data_manager import authenticate_user, register_user
-from src.api_client import cari_resep_spoonacular, dapatkan_resep_random as client_dapatkan_resep_random, dapatkan_detail_resep
-from src.bookmark import add_bookmark, remove_bookmark, get_user_bookmarks
+from src.api_client import cari_resep_spoonacular, dapatkan_detail_resep
+from src.api_client_async import dapatkan_detail_resep_bulk_paralel
+from src.inspirasi_pool import ambil_sampel_inspirasi
+from src.bookmark import add_bookmark, remove_bookmark, get_user_bookmarks, is_bookmarked_many
 from src.history import add_to_history, get_user_history, get_user_history_detailed, clear_user_history
 # Import modul PDF yang baru dibuat
 from src.pdf_utils import generate_pdf_bytes
 import plotly.graph_objects as go
-from src.ai_helper import tanya_chef_ai, get_chat_history, add_chat_message, clear_chat_history, ai_search_recipes
+from src.ai_helper import tanya_chef_ai_stream, get_chat_history, add_chat_message, clear_chat_history, ai_search_recipes
 from src import ai_helper
+from src.jobs import job_manager, PENDING, RUNNING, DONE, ERROR
+from src.llm_metrics import llm_metrics
 
 # --- KONFIGURASI HALAMAN ---
 st.set_page_config(layout="wide", page_title="Resep Hari Ini")
 
 # --- FUNGSI UTILITY & CACHE ---
-@st.cache_data(ttl=3600)
-def get_cached_random():
-    """Wrapper untuk mengambil resep random dengan cache"""
-    try:
-        # Function dari api_client.py sudah handle API key dari berbagai sumber
-        return client_dapatkan_resep_random(jumlah=12)
-    except Exception as e:
-        print(f"Error getting cached random: {e}")
-        return []
+def get_inspirasi_sesi():
+    """
+    Resep inspirasi untuk sesi ini: sampel acak dari pool yang diperbarui
+    di background (src/inspirasi_pool.py). Disimpan di session_state supaya
+    tidak berganti-ganti setiap rerun.
+    """
+    if not st.session_state.get('inspirasi'):
+        try:
+            st.session_state['inspirasi'] = ambil_sampel_inspirasi(jumlah=12)
+        except Exception as e:
+            print(f"Error getting inspirasi: {e}")
+            return []
+    return st.session_state['inspirasi']
+
+
+# --- PANEL ADMIN (METRIK LLM) ---
+# Username yang boleh melihat panel admin, dipisah koma. Defaultnya kosong:
+# siapa pun bisa mendaftar dengan nama "admin", jadi admin harus diatur eksplisit
+ADMIN_USERS = {u.strip() for u in os.environ.get("ADMIN_USERS", "").split(",") if u.strip()}
+
+
+def tampilkan_panel_admin():
+    """Metrik panggilan Gemini, status router, cache & job (hanya untuk ADMIN_USERS)."""
+    with st.sidebar.expander("🛠️ Panel Admin: Metrik LLM"):
+        metrik = ai_helper.get_llm_metrics()
+        for operasi, o in metrik["operations"].items():
+            st.write(f"**{operasi}**: {o['answered']}/{o['requests']} dijawab, "
+                     f"{o['fallbacks']} fallback, {o['deadline_hits']} deadline, "
+                     f"rata-rata {o['avg_latency']} detik")
+        st.caption("Per model")
+        st.json(metrik["models"], expanded=False)
+        st.caption("Cache (hit/miss)")
+        st.json(metrik["cache"], expanded=False)
+        st.caption("Status router")
+        st.json(ai_helper.get_router_status(), expanded=False)
+        st.caption("Knowledge base, semantic cache & job")
+        st.json({"kb": ai_helper.get_kb_stats(), "semantic_cache": ai_helper.get_answer_cache_stats(),
+                 "query_expansion": ai_helper.query_expansion_cache.stats(),
+                 "ai_search_results": ai_helper.ai_result_cache.stats(),
+                 "jobs": job_manager.stats()}, expanded=False)
+        st.caption("Event terakhir")
+        st.json(metrik["recent_events"][-20:], expanded=False)
+        st.download_button("Unduh metrik (JSON)", data=llm_metrics.export_json(),
+                           file_name="llm_metrics.json", mime="application/json")
+        st.download_button("Unduh metrik (Prometheus)", data=llm_metrics.export_prometheus(),
+                           file_name="llm_metrics.prom", mime="text/plain")
+
+
+# --- JOB LATAR BELAKANG (src/jobs.py) ---
+# Pekerjaan lambat dijalankan di worker pool; script hanya menyimpan job id
+# di session_state lalu memeriksa statusnya secara berkala.
+JOB_POLL_SEC = 1.0
+
+
+def _dengan_kunci(kunci, fungsi, *args, **kwargs):
+    return kunci, fungsi(*args, **kwargs)
+
+
+def mulai_job(slot, fungsi, *args, **kwargs):
+    """Kirim job ke worker pool; job lama di slot yang sama dibatalkan."""
+    batalkan_job(slot)
+    st.session_state.setdefault('jobs', {})[slot] = job_manager.submit(fungsi, *args, label=slot, **kwargs)
+
+
+def batalkan_job(*slots):
+    """Batalkan job di slot tertentu (atau semua job sesi ini jika slot kosong)."""
+    jobs = st.session_state.get('jobs', {})
+    for slot in slots or list(jobs):
+        job_id = jobs.pop(slot, None)
+        if job_id:
+            job_manager.cancel(job_id)
+
+
+def ambil_hasil_job(slot):
+    """
+    Mengembalikan (status, hasil) job di slot. Saat DONE/ERROR job dilepas dari
+    slot; hasil berisi nilai kembalian atau exception. (None, None) jika tidak ada job.
+    """
+    jobs = st.session_state.get('jobs', {})
+    job_id = jobs.get(slot)
+    if job_id is None:
+        return None, None
+    status = job_manager.status(job_id)
+    if status in (PENDING, RUNNING):
+        return status, None
+    del jobs[slot]
+    if status == DONE:
+        return status, job_manager.result(job_id)
+    if status == ERROR:
+        try:
+            job_manager.result(job_id)
+        except Exception as e:
+            return status, e
+    return status, None
 
 
-# Caching wrapper for AI calls to reduce repeated external requests
-@st.cache_data(ttl=3600)
-def cached_tanya_chef_ai(prompt, username, api_key_marker):
-    try:
-        return tanya_chef_ai(prompt, username)
-    except Exception as e:
-        return f"[Error saat memanggil AI: {e}]"
+def tombol_ulangi(slot):
+    """Tombol coba lagi: hasil job yang tersimpan di slot dibuang, job dijalankan ulang saat rerun."""
+    if st.button("🔄 Coba lagi", key=f"ulangi_{slot}"):
+        st.session_state.get('hasil_job', {}).pop(slot, None)
+        st.rerun()
 
 
-@st.cache_data(ttl=3600)
-def cached_ai_search_recipes(query, username, max_results=5, api_key_marker=None):
-    try:
-        return ai_search_recipes(query, username, max_results=max_results)
-    except Exception as e:
-        print(f"AI search error: {e}")
-        return []
+@st.fragment(run_every=JOB_POLL_SEC)
+def pantau_job(slot, pesan):
+    """Status job yang sedang berjalan; seluruh halaman di-rerun saat job selesai."""
+    job_id = st.session_state.get('jobs', {}).get(slot)
+    if job_id is None or job_manager.status(job_id) not in (PENDING, RUNNING):
+        st.rerun()
+    st.info(f"⏳ {pesan}")
+    if st.button("Batalkan", key=f"batal_{slot}"):
+        batalkan_job(slot)
+        st.rerun()
+
+
+def jalankan_di_latar(slot, kunci, pesan, fungsi, *args, **kwargs):
+    """
+    Menjalankan fungsi(*args) sebagai job dan mengingat hasilnya per `kunci`
+    (misal daftar ID resep). Mengembalikan (status, hasil):
+    DONE + hasil, ERROR + exception, atau RUNNING selama job masih berjalan
+    (status ditampilkan lewat pantau_job). Job dimulai otomatis jika belum ada.
+    Hasil gagal juga diingat (supaya rerun tidak mengulang job terus-menerus);
+    pemanggil menampilkan `tombol_ulangi` untuk membuangnya dan mencoba lagi.
+    `cancel_event=True` diteruskan ke job_manager.submit: fungsi menerima
+    threading.Event yang di-set saat tombol Batalkan ditekan. Fungsi tanpa
+    argumen itu (misal generate_pdf_bytes) hanya bisa dibatalkan selama
+    job masih antre; yang sudah berjalan tetap selesai, hasilnya dibuang.
+    """
+    tersimpan = st.session_state.setdefault('hasil_job', {})
+    if slot in tersimpan and tersimpan[slot][0] == kunci:
+        return tersimpan[slot][1], tersimpan[slot][2]
+
+    status, hasil = ambil_hasil_job(slot)
+    if status == DONE and hasil[0] == kunci:
+        tersimpan[slot] = (kunci, DONE, hasil[1])
+        return DONE, hasil[1]
+    if status == ERROR:
+        print(f"Error job {slot}: {hasil}")
+        tersimpan[slot] = (kunci, ERROR, hasil)
+        return ERROR, hasil
+    if status not in (PENDING, RUNNING):
+        # Belum ada job, dibatalkan, atau hasil untuk kunci lama: mulai baru
+        mulai_job(slot, _dengan_kunci, kunci, fungsi, *args, **kwargs)
+    pantau_job(slot, pesan)
+    return RUNNING, None
 
 
 def create_nutrition_pie_chart(resep_data):
@@ -138,6 +261,8 @@ def tampilkan_grid_resep(daftar_resep, mode_hapus=False, source="umum"):
     rows = [daftar_resep[i:i + jumlah_kolom] for i in range(0, len(daftar_resep), jumlah_kolom)]
 
     current_user = st.session_state.get('username')
+    # Status favorit semua kartu diambil sekali (bukan per kartu)
+    tersimpan = {} if mode_hapus else is_bookmarked_many(current_user, [r['id'] for r in daftar_resep])
 
     for row in rows:
         cols = st.columns(jumlah_kolom)
@@ -168,6 +293,8 @@ def tampilkan_grid_resep(daftar_resep, mode_hapus=False, source="umum"):
                         # Key unik gabungan ID resep + sumber
                         key_lihat = f"det_{resep['id']}_{source}"
                         if st.button("Lihat", key=key_lihat, use_container_width=True):
+                            # Pindah halaman: job milik halaman grid tidak dibutuhkan lagi
+                            batalkan_job('ai_search', 'history', 'favorit')
                             st.session_state['view'] = 'detail'
                             st.session_state['selected_recipe_id'] = resep['id']
                             st.rerun()
@@ -180,6 +307,10 @@ def tampilkan_grid_resep(daftar_resep, mode_hapus=False, source="umum"):
                                 remove_bookmark(current_user, resep['id'])
                                 st.toast("Resep dihapus dari favorit!", icon="🗑️")
                                 st.rerun()
+                        elif tersimpan.get(resep['id']):
+                            # Sudah ada di favorit
+                            st.button("✅ Tersimpan", key=f"sav_{resep['id']}_{source}", disabled=True,
+                                      use_container_width=True)
                         else:
                             # Tombol Simpan (Tab Cari/Home)
                             key_simpan = f"sav_{resep['id']}_{source}"
@@ -198,6 +329,7 @@ def tampilkan_halaman_detail(recipe_id):
     Menampilkan detail satu resep + TOMBOL DOWNLOAD PDF
     """
     if st.button("<- Kembali"):
+        batalkan_job('pdf')
         st.session_state['view'] = 'grid'
         st.session_state['selected_recipe_id'] = None
         st.rerun()
@@ -231,10 +363,10 @@ def tampilkan_halaman_detail(recipe_id):
                  st.success("Tersimpan!")
 
         with col_btn2:
-            # Generate PDF secara real-time
-            try:
-                pdf_data = generate_pdf_bytes(detail_resep)
-                
+            # PDF dibuat di background (unduh gambar + render), tombol muncul saat siap
+            status_pdf, pdf_data = jalankan_di_latar('pdf', recipe_id, "Menyiapkan PDF...",
+                                                     generate_pdf_bytes, detail_resep)
+            if status_pdf == DONE:
                 # Buat nama file bersih (spasi jadi underscore)
                 nama_file = detail_resep['title'].replace(" ", "_").lower() + ".pdf"
                 
@@ -245,8 +377,9 @@ def tampilkan_halaman_detail(recipe_id):
                     mime="application/pdf",
                     use_container_width=True
                 )
-            except Exception as e:
-                st.error(f"Gagal membuat PDF: {e}")
+            elif status_pdf == ERROR:
+                st.error(f"Gagal membuat PDF: {pdf_data}")
+                tombol_ulangi('pdf')
         # ---------------------------------------
         
         # Tampilkan Pie Chart Nutrisi
@@ -299,6 +432,8 @@ def handle_login(username, password):
         st.error("Username atau password salah.")
 
 def handle_logout():
+    batalkan_job()
+    st.session_state['hasil_job'] = {}
     st.session_state['logged_in'] = False
     st.session_state['username'] = ""
     st.session_state['view'] = 'grid'
@@ -328,6 +463,8 @@ if st.session_state['logged_in']:
     if st.sidebar.button("Logout"):
         handle_logout()
         st.rerun()
+    if st.session_state['username'] in ADMIN_USERS:
+        tampilkan_panel_admin()
 
     # MAIN CONTENT
     if st.session_state['view'] == 'grid':
@@ -382,9 +519,14 @@ if st.session_state['logged_in']:
                 tampilkan_grid_resep(st.session_state['hasil_pencarian'], source="cari")
             
             else:
-                st.subheader("✨ Inspirasi Menu Buat Kamu")
+                col_judul, col_acak = st.columns([3, 1])
+                with col_judul:
+                    st.subheader("✨ Inspirasi Menu Buat Kamu")
+                with col_acak:
+                    if st.button("🔀 Acak Lagi", use_container_width=True):
+                        st.session_state['inspirasi'] = None
                 with st.spinner("Mengambil rekomendasi chef..."):
-                    resep_random = get_cached_random()
+                    resep_random = get_inspirasi_sesi()
                 if resep_random:
                     tampilkan_grid_resep(resep_random, source="rekomen")
                 else:
@@ -401,17 +543,14 @@ if st.session_state['logged_in']:
             data_history_lengkap = []
             
             if list_id_history:
-                # 2. Loop ID untuk ambil data lengkap dari API
-                with st.spinner(f"Memuat {len(list_id_history)} resep dari riwayat..."):
-                    for rid in list_id_history:
-                        try:
-                            detail = dapatkan_detail_resep(rid)
-                            if detail:
-                                data_history_lengkap.append(detail)
-                        except Exception:
-                            pass # Skip jika gagal load
+                # 2. Ambil data lengkap dari API sekaligus (request bulk paralel, di background)
+                status_history, data_history_lengkap = jalankan_di_latar(
+                    'history', tuple(list_id_history), f"Memuat {len(list_id_history)} resep dari riwayat...",
+                    dapatkan_detail_resep_bulk_paralel, list_id_history, cancel_event=True)
                 
-                if data_history_lengkap:
+                if status_history == RUNNING:
+                    pass  # status & tombol batal ditampilkan oleh pantau_job
+                elif status_history == DONE and data_history_lengkap:
                     # 3. Tampilkan dengan info timestamp
                     col_hapus, col_info = st.columns([1, 3])
                     with col_hapus:
@@ -436,6 +575,7 @@ if st.session_state['logged_in']:
                                 st.caption(f"📌 ID {item.get('recipe_id')} - Dilihat: {item.get('viewed_at')}")
                 else:
                     st.error("Gagal memuat detail resep (Cek koneksi internet).")
+                    tombol_ulangi('history')
             else:
                 st.info("Kamu belum melihat resep apapun. Coba cari dan lihat beberapa resep di tab 'Cari Menu'!")
 
@@ -449,22 +589,20 @@ if st.session_state['logged_in']:
             data_bookmark_lengkap = []
             
             if list_id_bookmark:
-                # 2. Loop ID untuk ambil data lengkap dari API
-                with st.spinner(f"Memuat {len(list_id_bookmark)} resep favorit dari database Raja Iblis..."):
-                    # Kita loop satu-satu untuk fetch detail
-                    for rid in list_id_bookmark:
-                        try:
-                            detail = dapatkan_detail_resep(rid)
-                            if detail:
-                                data_bookmark_lengkap.append(detail)
-                        except Exception:
-                            pass # Skip jika gagal load
+                # 2. Ambil data lengkap dari API sekaligus (request bulk paralel, di background)
+                status_favorit, data_bookmark_lengkap = jalankan_di_latar(
+                    'favorit', tuple(list_id_bookmark),
+                    f"Memuat {len(list_id_bookmark)} resep favorit dari database Raja Iblis...",
+                    dapatkan_detail_resep_bulk_paralel, list_id_bookmark, cancel_event=True)
                 
-                if data_bookmark_lengkap:
+                if status_favorit == RUNNING:
+                    pass  # status & tombol batal ditampilkan oleh pantau_job
+                elif status_favorit == DONE and data_bookmark_lengkap:
                     # 3. Tampilkan hasilnya
                     tampilkan_grid_resep(data_bookmark_lengkap, mode_hapus=True, source="fav")
                 else:
                     st.error("Gagal memuat detail resep (Cek koneksi internet).")
+                    tombol_ulangi('favorit')
             else:
                 st.info("Kamu belum menyimpan resep apapun. Klik tombol ❤️ pada resep untuk menyimpan.")
 
@@ -491,12 +629,17 @@ if st.session_state['logged_in']:
                 if not ai_search_input or not ai_search_input.strip():
                     st.warning("Masukkan bahan atau nama resep untuk dicari.")
                 else:
-                    with st.spinner("Chef AI sedang mencari resep..."):
-                        try:
-                            hasil_ai = cached_ai_search_recipes(ai_search_input.strip(), current_user, max_results=12, api_key_marker=ai_helper.API_KEY)
-                            st.session_state['hasil_pencarian_ai'] = hasil_ai
-                        except Exception as e:
-                            st.error(f"Pencarian AI gagal: {e}")
+                    # Ekspansi query & hasil di-cache di ai_helper (tanpa username),
+                    # jadi riwayat chat tetap tercatat untuk setiap pencarian
+                    mulai_job('ai_search', ai_search_recipes, ai_search_input.strip(), current_user, max_results=12)
+
+            status_ai, hasil_ai = ambil_hasil_job('ai_search')
+            if status_ai == DONE:
+                st.session_state['hasil_pencarian_ai'] = hasil_ai
+            elif status_ai == ERROR:
+                st.error(f"Pencarian AI gagal: {hasil_ai}")
+            elif status_ai in (PENDING, RUNNING):
+                pantau_job('ai_search', "Chef AI sedang mencari resep...")
 
             # Jika ada hasil pencarian AI, tampilkan dengan grid resep penuh (view, bookmark, PDF, history)
             if st.session_state.get('hasil_pencarian_ai'):
@@ -517,10 +660,10 @@ if st.session_state['logged_in']:
                         st.info("Tidak ada riwayat untuk dibersihkan.")
 
             # Tampilkan riwayat chat (terbaru di bawah)
-            chat_history = get_chat_history(current_user)
+            chat_history = get_chat_history(current_user, limit=50)
             if chat_history:
                 with st.expander("Riwayat Percakapan (terbaru 50)", expanded=True):
-                    for msg in chat_history[-50:]:
+                    for msg in chat_history:
                         role = msg.get('role', 'user')
                         text = msg.get('text', '')
                         ts = msg.get('timestamp', '')
@@ -538,20 +681,19 @@ if st.session_state['logged_in']:
             ai_input = st.text_area("Tulis pertanyaanmu di sini...", key="ai_input", height=140)
             send_col, _ = st.columns([1, 3])
             with send_col:
-                if st.button("Kirim", key="ai_send", use_container_width=True):
-                    if not ai_input or not ai_input.strip():
-                        st.warning("Tulis pertanyaan dulu ya.")
-                    else:
-                        with st.spinner("Menghubungi Chef AI..."):
-                            try:
-                                answer = cached_tanya_chef_ai(ai_input.strip(), current_user, api_key_marker=ai_helper.API_KEY)
-                                st.success("Chef AI sudah merespon — lihat riwayat di atas.")
-                                # Tampilkan jawaban langsung
-                                st.markdown("**Jawaban Chef AI:**")
-                                st.markdown(answer)
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Gagal memproses pertanyaan: {e}")
+                kirim_ai = st.button("Kirim", key="ai_send", use_container_width=True)
+            if kirim_ai:
+                if not ai_input or not ai_input.strip():
+                    st.warning("Tulis pertanyaan dulu ya.")
+                else:
+                    try:
+                        # Jawaban tampil bertahap selama model masih menulis;
+                        # riwayat disimpan oleh tanya_chef_ai_stream setelah selesai
+                        st.markdown("**Jawaban Chef AI:**")
+                        st.write_stream(tanya_chef_ai_stream(ai_input.strip(), current_user))
+                        st.success("Chef AI sudah merespon — jawaban tersimpan di riwayat.")
+                    except Exception as e:
+                        st.error(f"Gagal memproses pertanyaan: {e}")
     elif st.session_state['view'] == 'detail':
         tampilkan_halaman_detail(st.session_state['selected_recipe_id'])
 
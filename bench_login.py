@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""Benchmark latensi login di user store SQLite dengan banyak user.
+
+Mengisi database sementara dengan N user (default 100.000), lalu mengukur
+lookup username (index primary key) dan authenticate_user lengkap (lookup +
+verifikasi hash) untuk username yang ada maupun tidak. Jika pandas &
+openpyxl tersedia, cara lama (baca seluruh users.xlsx lalu scan kolom)
+ikut diukur sebagai pembanding.
+
+User pengisi memakai satu hash yang sama supaya pengisian tidak memakan
+waktu N x biaya hash; user yang diukur didaftarkan lewat register_user.
+
+Cara pakai:
+  python bench_login.py --users 100000 --ops 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def ukur(fungsi, ops):
+    waktu = []
+    for i in range(ops):
+        mulai = time.perf_counter()
+        fungsi(i)
+        waktu.append((time.perf_counter() - mulai) * 1000)
+    waktu.sort()
+    return statistics.median(waktu), waktu[int(len(waktu) * 0.95) - 1]
+
+
+def bench_xlsx_lama(jumlah_user, ops):
+    """Cara lama: pd.read_excel seluruh file di setiap login."""
+    try:
+        import pandas as pd
+        import openpyxl  # noqa: F401
+    except ImportError:
+        print("  (pandas/openpyxl tidak tersedia, pembanding users.xlsx dilewati)")
+        return None
+    path = os.path.join("data", "users_bench.xlsx")
+    pd.DataFrame({"username": [f"user{i}" for i in range(jumlah_user)],
+                  "password": ["rahasia"] * jumlah_user}).to_excel(path, index=False, engine="openpyxl")
+
+    def login(i):
+        df = pd.read_excel(path, engine="openpyxl")
+        user = df[df["username"].astype(str).str.strip() == f"user{jumlah_user // 2}"]
+        return not user.empty and str(user.iloc[0]["password"]).strip() == "rahasia"
+
+    return ukur(login, max(1, ops // 10))
+
+
+def jalankan(jumlah_user, ops):
+    from src import data_manager, storage
+
+    storage.storage = storage.SQLiteStorage()
+    data_manager._xlsx_dicek = True
+    hash_pengisi = data_manager.hash_password("rahasia")
+    mulai = time.perf_counter()
+    for awal in range(0, jumlah_user, 10_000):
+        storage.storage.user_tambah_banyak(
+            (f"user{i}", hash_pengisi) for i in range(awal, min(awal + 10_000, jumlah_user)))
+    print(f"\n{storage.storage.user_jumlah()} user di database (isi: {time.perf_counter() - mulai:.1f} detik)")
+
+    mulai = time.perf_counter()
+    print(f"  register_user baru: {data_manager.register_user('benchuser', 'rahasia')} "
+          f"({(time.perf_counter() - mulai) * 1000:.1f} ms)")
+
+    hasil = {
+        "lookup username (index)": ukur(lambda i: storage.storage.user_ambil_hash(f"user{i * 997 % jumlah_user}"), ops),
+        "login sukses": ukur(lambda i: data_manager.authenticate_user("benchuser", "rahasia"), ops),
+        "login password salah": ukur(lambda i: data_manager.authenticate_user("benchuser", "salah"), ops),
+        "login user tidak ada": ukur(lambda i: data_manager.authenticate_user("tidakada", "rahasia"), ops),
+    }
+    lama = bench_xlsx_lama(jumlah_user, ops)
+    if lama:
+        hasil["login lama (users.xlsx)"] = lama
+    print(f"  {'operasi':<28}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+    for nama, (p50, p95) in hasil.items():
+        print(f"  {nama:<28}{p50:>10.3f}{p95:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100_000, help='Jumlah user di database')
+    parser.add_argument('--ops', type=int, default=50, help='Jumlah pengulangan per operasi')
+    args = parser.parse_args()
+
+    asal = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Path data relatif terhadap folder kerja -> data/ di folder sementara
+        os.chdir(tmp)
+        os.makedirs("data")
+        try:
+            jalankan(args.users, args.ops)
+        finally:
+            os.chdir(asal)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
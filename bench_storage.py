@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""Benchmark storage bookmark/history/chat: backend JSON vs SQLite.
+
+Membuat data palsu untuk banyak user di folder sementara (data asli tidak
+disentuh), memigrasikannya ke SQLite dengan migrator bawaan, lalu mengukur
+waktu rata-rata per operasi untuk satu user di kedua backend.
+
+Cara pakai:
+  python bench_storage.py --users 1000,5000 --ops 50
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def isi_data(jumlah_user, chat_log):
+    """Menulis file JSON lama: 10 bookmark, 20 history, 20 pesan chat per user."""
+    os.makedirs(chat_log.CHAT_DIR, exist_ok=True)
+    bookmark, history = {}, {}
+    for i in range(jumlah_user):
+        user = f"user{i}"
+        bookmark[user] = random.sample(range(1, 1_000_000), 10)
+        history[user] = [{"recipe_id": rid, "viewed_at": "2025-01-01 10:00:00"}
+                         for rid in random.sample(range(1, 1_000_000), 20)]
+        chat_log._tulis_baris(chat_log._path_user(user),
+                              [{"role": "user", "text": f"pesan {n}", "timestamp": "2025-01-01 10:00:00"}
+                               for n in range(20)], "w")
+    with open(os.path.join("data", "bookmarks.json"), "w") as f:
+        json.dump(bookmark, f, indent=4)
+    with open(os.path.join("data", "history.json"), "w") as f:
+        json.dump(history, f, indent=4)
+    with open(chat_log.MIGRATION_MARKER, "w") as f:
+        f.write("bench\n")
+
+
+def ukur(fungsi, ops):
+    mulai = time.perf_counter()
+    for i in range(ops):
+        fungsi(i)
+    return (time.perf_counter() - mulai) / ops * 1000
+
+
+def jalankan(jumlah_user, ops):
+    from src import bookmark, chat_log, history, storage
+
+    chat_log._jumlah_baris.clear()
+    isi_data(jumlah_user, chat_log)
+    mulai = time.perf_counter()
+    storage.storage = storage.SQLiteStorage()
+    storage.storage.migrasi_dari_json()
+    waktu_migrasi = time.perf_counter() - mulai
+
+    user = f"user{jumlah_user // 2}"
+    operasi = {
+        "get_user_bookmarks": lambda i: bookmark.get_user_bookmarks(user),
+        "add+remove_bookmark": lambda i: (bookmark.add_bookmark(user, 2_000_000 + i),
+                                          bookmark.remove_bookmark(user, 2_000_000 + i)),
+        "add_to_history": lambda i: history.add_to_history(user, 3_000_000 + i),
+        "get_user_history": lambda i: history.get_user_history(user),
+        "chat append": lambda i: chat_log.append(user, {"role": "user", "text": "halo", "timestamp": ""}),
+        "chat tail(50)": lambda i: chat_log.tail(user, 50),
+    }
+    hasil = {}
+    for backend in ("json", "sqlite"):
+        storage.STORAGE_BACKEND = backend
+        for nama, fungsi in operasi.items():
+            hasil.setdefault(nama, {})[backend] = ukur(fungsi, ops)
+        # History ditulis write-behind: tulis sisa perubahan ke backend ini sebelum ganti
+        history.history_lru.flush()
+        history.history_lru.lupakan()
+
+    print(f"\n{jumlah_user} user (migrasi JSON -> SQLite: {waktu_migrasi:.2f} detik)")
+    print(f"  {'operasi':<22}{'json (ms)':>12}{'sqlite (ms)':>14}")
+    for nama, per_backend in hasil.items():
+        print(f"  {nama:<22}{per_backend['json']:>12.3f}{per_backend['sqlite']:>14.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', default='1000,5000', help='Jumlah user, dipisah koma')
+    parser.add_argument('--ops', type=int, default=50, help='Jumlah pengulangan per operasi')
+    args = parser.parse_args()
+
+    asal = os.getcwd()
+    for jumlah in [int(n) for n in args.users.split(',')]:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Semua path data relatif terhadap folder kerja -> data/ di folder sementara
+            os.chdir(tmp)
+            os.makedirs("data")
+            try:
+                jalankan(jumlah, args.ops)
+            finally:
+                os.chdir(asal)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
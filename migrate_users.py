@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+"""Impor akun dari data/users.xlsx lama ke tabel users (data/app.db).
+
+Langkah offline, dijalankan sekali sebelum aplikasi dipakai: setiap password
+di-hash (scrypt), jadi untuk ratusan ribu user bisa makan waktu lama.
+Username yang sudah ada di database tidak ditimpa, jadi aman dijalankan ulang.
+Setelah impor berhasil, users.xlsx (berisi password plaintext) dihapus.
+
+Cara pakai:
+  python migrate_users.py [--path data/users.xlsx] [--keep] [--workers 4]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src import data_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', default=data_manager.DB_PATH, help='File Excel user lama')
+    parser.add_argument('--keep', action='store_true',
+                        help='Jangan hapus file Excel setelah impor (TIDAK disarankan: berisi password plaintext)')
+    parser.add_argument('--workers', type=int, default=data_manager.IMPOR_WORKERS,
+                        help='Jumlah thread untuk hashing password')
+    args = parser.parse_args()
+
+    jumlah = data_manager.impor_dari_xlsx(args.path, hapus_asli=not args.keep, workers=args.workers)
+    if jumlah is None:
+        return 1
+    print(f"Selesai: {jumlah} user diimpor.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
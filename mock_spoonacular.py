@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+"""Server tiruan Spoonacular untuk testing & benchmark tanpa internet.
+
+Endpoint yang didukung (format respons mengikuti API asli):
+  GET /recipes/complexSearch
+  GET /recipes/random
+  GET /recipes/{id}/information
+  GET /recipes/informationBulk
+
+Data diambil dari data/fixtures/spoonacular/recipes.json.
+
+Cara pakai:
+  python mock_spoonacular.py serve --port 8089 --latency-ms 150 --error-rate 0.05 --quota 150
+  # lalu jalankan aplikasi dengan:
+  SPOONACULAR_BASE_URL=http://127.0.0.1:8089 SPOONACULAR_API_KEY=mock streamlit run app.py
+
+Merekam fixture dari API asli (butuh SPOONACULAR_API_KEY & internet):
+  python mock_spoonacular.py record --ids 716429,715538 --random 20
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+FIXTURE_FILE = Path(__file__).with_name('data') / 'fixtures' / 'spoonacular' / 'recipes.json'
+
+
+# --- FIXTURE ---
+def load_fixtures(path=FIXTURE_FILE):
+    """Membaca korpus resep; dikembalikan sebagai dict {id: resep}."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {int(r['id']): r for r in json.load(f)}
+    except (OSError, ValueError) as e:
+        print(f"Error membaca fixture {path}: {e}")
+        return {}
+
+
+def save_fixtures(resep_by_id, path=FIXTURE_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(sorted(resep_by_id.values(), key=lambda r: r['id']), f, indent=2, ensure_ascii=False)
+
+
+def _kalori(resep):
+    for n in resep.get('nutrition', {}).get('nutrients', []):
+        if n.get('name', '').lower() == 'calories':
+            return n.get('amount', 0)
+    return 0
+
+
+def _cocok_pencarian(resep, bahan, diet, tipe, max_kalori):
+    """Filter sederhana yang meniru complexSearch."""
+    if bahan:
+        teks = " ".join([resep.get('title', '')] + [i.get('name', '') for i in resep.get('extendedIngredients', [])]).lower()
+        if not all(b in teks for b in bahan):
+            return False
+    if diet and diet not in [d.lower() for d in resep.get('diets', [])]:
+        return False
+    if tipe and tipe not in [t.lower() for t in resep.get('dishTypes', [])]:
+        return False
+    if max_kalori is not None and _kalori(resep) > max_kalori:
+        return False
+    return True
+
+
+# --- SERVER ---
+class MockState:
+    """Konfigurasi injeksi gangguan + penghitung kuota (dipakai bersama semua thread)."""
+
+    def __init__(self, resep, latency_ms=0, jitter_ms=0, error_rate=0.0, rate_429=0.0, quota=None):
+        self.resep = resep
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.quota = quota
+        self.used = 0.0
+        self.lock = threading.Lock()
+        self.request_count = 0
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    state = None  # diisi oleh buat_server()
+
+    def log_message(self, format, *args):
+        pass  # jangan banjiri terminal saat benchmark
+
+    def _kirim(self, status, body, biaya=0.0):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        st = self.state
+        if st.quota is not None:
+            self.send_header('X-API-Quota-Request', str(biaya))
+            self.send_header('X-API-Quota-Used', str(st.used))
+            self.send_header('X-API-Quota-Left', str(max(0.0, st.quota - st.used)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        st = self.state
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        bagian = [p for p in url.path.split('/') if p]
+
+        with st.lock:
+            st.request_count += 1
+
+        # 1. Latensi buatan
+        jeda = st.latency_ms + (random.uniform(-st.jitter_ms, st.jitter_ms) if st.jitter_ms else 0)
+        if jeda > 0:
+            time.sleep(jeda / 1000.0)
+
+        if not q.get('apiKey'):
+            return self._kirim(401, {"status": "failure", "code": 401, "message": "You are not authorized."})
+
+        # 2. Error & rate limit acak
+        if st.error_rate and random.random() < st.error_rate:
+            return self._kirim(500, {"status": "failure", "code": 500, "message": "Injected server error"})
+        if st.rate_429 and random.random() < st.rate_429:
+            return self._kirim(429, {"status": "failure", "code": 429, "message": "Injected rate limit"})
+
+        # 3. Kuota harian (1 poin per request + 0.01 per hasil, mirip aturan Spoonacular)
+        with st.lock:
+            if st.quota is not None and st.used >= st.quota:
+                return self._kirim(402, {"status": "failure", "code": 402,
+                                         "message": "Your daily points limit has been reached."})
+
+        if bagian[:1] != ['recipes']:
+            return self._kirim(404, {"status": "failure", "code": 404, "message": "Not found"})
+
+        if bagian[1:] == ['complexSearch']:
+            bahan = [b.strip().lower() for b in q.get('includeIngredients', '').split(',') if b.strip()]
+            max_kalori = float(q['maxCalories']) if q.get('maxCalories') else None
+            hasil = [r for r in st.resep.values()
+                     if _cocok_pencarian(r, bahan, q.get('diet', '').lower() or None,
+                                         q.get('type', '').lower() or None, max_kalori)]
+            number = int(q.get('number', 10))
+            body = {"results": hasil[:number], "offset": 0, "number": number, "totalResults": len(hasil)}
+            return self._kirim(200, body, self._pakai_kuota(1 + 0.01 * len(body["results"])))
+
+        if bagian[1:] == ['random']:
+            number = min(int(q.get('number', 1)), 100)
+            semua = list(st.resep.values())
+            tags = [t.strip().lower() for t in q.get('tags', '').split(',') if t.strip()]
+            if tags:
+                semua = [r for r in semua if all(t in [d.lower() for d in r.get('dishTypes', [])] for t in tags)] or semua
+            hasil = random.sample(semua, min(number, len(semua)))
+            return self._kirim(200, {"recipes": hasil}, self._pakai_kuota(1 + 0.01 * len(hasil)))
+
+        if bagian[1:] == ['informationBulk']:
+            ids = [int(i) for i in q.get('ids', '').split(',') if i.strip().isdigit()]
+            hasil = [st.resep[i] for i in ids if i in st.resep]
+            return self._kirim(200, hasil, self._pakai_kuota(1 + 0.5 * max(0, len(ids) - 1)))
+
+        if len(bagian) == 3 and bagian[2] == 'information' and bagian[1].isdigit():
+            resep = st.resep.get(int(bagian[1]))
+            if resep is None:
+                return self._kirim(404, {"status": "failure", "code": 404,
+                                         "message": "A recipe with the id %s does not exist." % bagian[1]})
+            return self._kirim(200, resep, self._pakai_kuota(1))
+
+        return self._kirim(404, {"status": "failure", "code": 404, "message": "Not found"})
+
+    def _pakai_kuota(self, biaya):
+        st = self.state
+        with st.lock:
+            st.used = round(st.used + biaya, 2)
+        return biaya
+
+
+def buat_server(host='127.0.0.1', port=8089, **opsi):
+    """Membuat server (belum dijalankan). Dipakai juga oleh script benchmark/test."""
+    state = MockState(load_fixtures(), **opsi)
+    handler = type('Handler', (MockHandler,), {'state': state})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+# --- PEREKAM FIXTURE ---
+def rekam(ids, jumlah_random):
+    """Mengambil resep asli dari Spoonacular lalu menggabungkannya ke fixture."""
+    import requests
+    from dotenv import load_dotenv
+    load_dotenv()
+    api_key = os.environ.get('SPOONACULAR_API_KEY')
+    if not api_key:
+        print('SPOONACULAR_API_KEY tidak ditemukan. Batal merekam.')
+        return 2
+
+    korpus = load_fixtures()
+    sebelum = len(korpus)
+    if ids:
+        r = requests.get('https://api.spoonacular.com/recipes/informationBulk',
+                         params={'apiKey': api_key, 'ids': ','.join(map(str, ids)), 'includeNutrition': True},
+                         timeout=30)
+        r.raise_for_status()
+        for resep in r.json():
+            korpus[int(resep['id'])] = resep
+    if jumlah_random:
+        r = requests.get('https://api.spoonacular.com/recipes/random',
+                         params={'apiKey': api_key, 'number': jumlah_random, 'tags': 'main course',
+                                 'includeNutrition': True},
+                         timeout=30)
+        r.raise_for_status()
+        for resep in r.json().get('recipes', []):
+            korpus[int(resep['id'])] = resep
+    save_fixtures(korpus)
+    print(f"Fixture tersimpan: {len(korpus)} resep ({len(korpus) - sebelum} baru) -> {FIXTURE_FILE}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='perintah', required=True)
+
+    p_serve = sub.add_parser('serve', help='Jalankan server tiruan')
+    p_serve.add_argument('--host', default='127.0.0.1')
+    p_serve.add_argument('--port', type=int, default=8089)
+    p_serve.add_argument('--latency-ms', type=float, default=0, help='Latensi buatan per request')
+    p_serve.add_argument('--jitter-ms', type=float, default=0, help='Variasi acak latensi (+/-)')
+    p_serve.add_argument('--error-rate', type=float, default=0.0, help='Peluang respons 500 (0..1)')
+    p_serve.add_argument('--rate-429', type=float, default=0.0, help='Peluang respons 429 (0..1)')
+    p_serve.add_argument('--quota', type=float, default=None, help='Kuota poin harian; habis -> 402')
+
+    p_record = sub.add_parser('record', help='Rekam fixture dari API asli')
+    p_record.add_argument('--ids', default='', help='Daftar ID resep, dipisah koma')
+    p_record.add_argument('--random', type=int, default=0, help='Jumlah resep random yang direkam')
+
+    args = parser.parse_args(argv)
+    if args.perintah == 'record':
+        ids = [int(i) for i in args.ids.split(',') if i.strip().isdigit()]
+        return rekam(ids, args.random)
+
+    server = buat_server(args.host, args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         error_rate=args.error_rate, rate_429=args.rate_429, quota=args.quota)
+    print(f"Mock Spoonacular berjalan di http://{args.host}:{args.port} "
+          f"({len(server.RequestHandlerClass.state.resep)} resep fixture)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,20 @@
 import os
+import heapq
 import json
+import re
+import sqlite3
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
 
+from src import chat_log
+from src.chef_kb import KB_FALLBACK_COVERAGE, chef_kb
+from src.gemini_router import ModelRouter
+from src.llm_metrics import llm_metrics
+from src.recipe_cache import SQLiteCache
+from src.search_cache import MemoryCache, TieredCache
+from src.semantic_cache import chef_answer_cache
+
 # Optional import for Google Gemini; jika tidak ada, kita fallback ke responder sederhana
 try:
     import google.generativeai as genai
@@ -15,7 +27,7 @@ except Exception:
 load_dotenv()
 API_KEY = os.getenv("GOOGLE_API_KEY")
 
-# Preferensi model — akan mencoba satu per satu hingga berhasil
+# Preferensi model — urutan prioritas untuk router (model sehat teratas yang dipakai)
 # Diurutkan: flash models dulu (murah, quota tinggi), pro models terakhir (mahal, quota rendah)
 PREFERRED_MODELS = [
     'models/gemini-flash-latest',      # ✓ Termurah, quota tinggi di free tier
@@ -24,59 +36,99 @@ PREFERRED_MODELS = [
     'models/gemini-2.5-pro',           # Pro lebih powerful tapi quota rendah
     'models/gemini-3-pro-preview',     # Pro preview, minimal quota
 ]
-# Storage untuk chat AI (per user)
-DATA_FOLDER = os.path.join("data")
-AI_CHAT_FILE = os.path.join(DATA_FOLDER, "ai_chats.json")
-
-def ensure_data_exists():
-    if not os.path.exists(DATA_FOLDER):
-        os.makedirs(DATA_FOLDER)
-    if not os.path.exists(AI_CHAT_FILE):
-        with open(AI_CHAT_FILE, 'w', encoding='utf-8') as f:
-            json.dump({}, f)
-
-def load_ai_chats():
-    ensure_data_exists()
-    try:
-        with open(AI_CHAT_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception:
-        return {}
 
-def save_ai_chats(data):
-    ensure_data_exists()
-    with open(AI_CHAT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+# Batas waktu pencarian AI (detik): per query Spoonacular & total
+AI_SEARCH_QUERY_TIMEOUT = float(os.getenv("AI_SEARCH_QUERY_TIMEOUT", 8))
+AI_SEARCH_TIMEOUT = float(os.getenv("AI_SEARCH_TIMEOUT", 12))
+# Batas waktu jawaban Chef AI (detik); lewat dari ini simple_fallback_answer dipakai
+CHEF_AI_DEADLINE = float(os.getenv("CHEF_AI_DEADLINE", 20))
+# Pembuatan query pencarian AI harus cepat; kalau lambat pakai input mentah saja
+AI_QUERY_GEN_DEADLINE = float(os.getenv("AI_QUERY_GEN_DEADLINE", 6))
+
+# Cache AI search, dipakai bersama semua user:
+# input ternormalisasi -> daftar query, dan daftar query -> resep teratas
+AI_EXPANSION_TTL = int(os.getenv("AI_EXPANSION_CACHE_TTL", 7 * 24 * 3600))
+AI_RESULT_TTL = int(os.getenv("AI_RESULT_CACHE_TTL", 3600))
+query_expansion_cache = TieredCache(
+    MemoryCache(ttl=AI_EXPANSION_TTL, max_entri=512),
+    SQLiteCache("ai_query_expansion", ttl=AI_EXPANSION_TTL, max_entri=5000),
+)
+ai_result_cache = TieredCache(
+    MemoryCache(ttl=AI_RESULT_TTL, max_entri=256),
+    SQLiteCache("ai_search_results", ttl=AI_RESULT_TTL, max_entri=2000),
+)
+
+# Router dibuat sekali per proses: daftar model & strategi dicari saat pertama dipakai,
+# bukan dicoba ulang satu per satu di setiap panggilan
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter(genai, API_KEY, PREFERRED_MODELS)
+        return _router
+
+
+def get_answer_cache_stats():
+    return chef_answer_cache.stats()
+
+
+def get_kb_stats():
+    return chef_kb.stats()
+
+
+def get_llm_metrics():
+    return llm_metrics.snapshot()
+
+
+def get_router_status():
+    return get_router().status() if HAS_GENAI and API_KEY else {"discovered": False, "models": {}}
+
+
+# Discovery (list_models) dijalankan di background saat modul dimuat supaya
+# pertanyaan pertama tidak menunggu
+if HAS_GENAI and API_KEY:
+    get_router().mulai_discover()
+
+
+# Storage untuk chat AI (per user) lewat src/chat_log.py: tabel chats di data/app.db
+# (default) atau log append-only data/ai_chats/<user>.jsonl jika STORAGE_BACKEND=json.
 
 def add_chat_message(username, role, text):
     """Simpan satu pesan chat ke history user."""
     if not username:
         return False
-    data = load_ai_chats()
-    if username not in data:
-        data[username] = []
     entry = {
         "role": role,
         "text": text,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
-    data[username].append(entry)
-    # Keep last 100 messages max
-    data[username] = data[username][-100:]
-    save_ai_chats(data)
+    try:
+        chat_log.append(username, entry)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error menyimpan chat: {e}")
+        return False
     return True
 
-def get_chat_history(username):
-    data = load_ai_chats()
-    return data.get(username, [])
+def get_chat_history(username, limit=chat_log.MAX_MESSAGES):
+    """`limit` pesan terakhir user; hanya ekor file yang dibaca."""
+    return chat_log.tail(username, limit)
 
 def clear_chat_history(username):
-    data = load_ai_chats()
-    if username in data:
-        data[username] = []
-        save_ai_chats(data)
-        return True
-    return False
+    try:
+        return chat_log.clear(username)
+    except OSError as e:
+        print(f"Error menghapus chat: {e}")
+        return False
+
+def _prompt_chef(pertanyaan):
+    return f"""
+You are Chef AI, a helpful cooking assistant and nutrition guide. Answer in Indonesian in a friendly tone.
+User: {pertanyaan}
+"""
 
 def tanya_chef_ai(pertanyaan, username="Pengguna"):
     """
@@ -86,82 +138,39 @@ def tanya_chef_ai(pertanyaan, username="Pengguna"):
     # Simpan pertanyaan user
     add_chat_message(username, 'user', pertanyaan)
 
-    # Jika Gemini tersedia dan API key ada, coba beberapa model dan batasi output
+    # Pertanyaan serupa (dari user mana pun) sudah pernah dijawab: pakai ulang
+    cached, _ = chef_answer_cache.cari(pertanyaan)
+    llm_metrics.catat_cache('chef_semantic_cache', bool(cached))
+    if cached:
+        add_chat_message(username, 'assistant', cached)
+        return cached
+
+    # FAQ masak yang sudah ada di knowledge base lokal: jawab tanpa LLM
+    jawaban_kb = chef_kb.jawab(pertanyaan)
+    llm_metrics.catat_cache('chef_kb', bool(jawaban_kb))
+    if jawaban_kb:
+        add_chat_message(username, 'assistant', jawaban_kb)
+        return jawaban_kb
+
+    # Jika Gemini tersedia dan API key ada, kirim ke model sehat terbaik lewat router
     if HAS_GENAI and API_KEY:
+        prompt_khusus = _prompt_chef(pertanyaan)
         try:
-            genai.configure(api_key=API_KEY)
-        except Exception:
-            # configure mungkin tidak tersedia pada beberapa versi, lanjutkan
-            pass
-
-        # fungsi bantu: coba generate dengan beberapa strategy dan model
-        def _try_generate(prompt_text, max_output_tokens=250, temperature=0.2):
-            for model_name in PREFERRED_MODELS:
-                try:
-                    # Strategy A: module-level helper (newer/older lib variations)
-                    if hasattr(genai, 'generate_text'):
-                        try:
-                            resp = genai.generate_text(model=model_name, prompt=prompt_text, max_output_tokens=max_output_tokens, temperature=temperature)
-                            # berbagai bentuk respons
-                            if hasattr(resp, 'text') and resp.text:
-                                return resp.text
-                            if isinstance(resp, dict):
-                                # try nested candidates/content
-                                cand = resp.get('candidates')
-                                if cand and isinstance(cand, list):
-                                    c0 = cand[0]
-                                    return c0.get('content') or c0.get('text') or str(c0)
-                                return resp.get('output') or str(resp)
-                        except Exception:
-                            pass
-
-                    # Strategy B: GenerativeModel object
-                    if hasattr(genai, 'GenerativeModel'):
-                        try:
-                            model = genai.GenerativeModel(model_name)
-                            # older API had generate_content
-                            if hasattr(model, 'generate_content'):
-                                r = model.generate_content(prompt_text)
-                                if hasattr(r, 'text') and r.text:
-                                    return r.text
-                                # some responses expose candidates
-                                if hasattr(r, 'candidates') and r.candidates:
-                                    cand = r.candidates[0]
-                                    return getattr(cand, 'content', None) or getattr(cand, 'text', None) or str(cand)
-                        except Exception:
-                            pass
-
-                    # Strategy C: Client object (another variant)
-                    try:
-                        from google.generativeai import Client
-                        client = Client(api_key=API_KEY)
-                        if hasattr(client, 'generate'):
-                            r = client.generate(model=model_name, prompt=prompt_text, max_output_tokens=max_output_tokens)
-                            # try common fields
-                            if isinstance(r, dict):
-                                if 'candidates' in r and r['candidates']:
-                                    return r['candidates'][0].get('content') or r['candidates'][0].get('text')
-                                return r.get('output') or str(r)
-                    except Exception:
-                        pass
-
-                except Exception:
-                    # kalau model tidak ada atau error, coba model berikutnya
-                    continue
-            return None
-
-        prompt_khusus = f"""
-You are Chef AI, a helpful cooking assistant and nutrition guide. Answer in Indonesian in a friendly tone.
-User: {pertanyaan}
-"""
-        try:
-            ans = _try_generate(prompt_khusus, max_output_tokens=250)
+            ans = get_router().generate(prompt_khusus, max_output_tokens=250, deadline=CHEF_AI_DEADLINE,
+                                        operasi='chef_ai')
             if ans:
+                chef_answer_cache.simpan(pertanyaan, ans)
+                chef_kb.harvest(pertanyaan, ans)
                 add_chat_message(username, 'assistant', ans)
                 return ans
-            else:
-                raise RuntimeError('No model returned content')
+            alasan = get_router().alasan_gagal()
+            if alasan == 'deadline':
+                raise RuntimeError(f'Tidak ada model yang menjawab dalam {CHEF_AI_DEADLINE:g} detik')
+            if alasan == 'tidak_ada_model':
+                raise RuntimeError('Semua model Gemini sedang cooldown')
+            raise RuntimeError('Semua model Gemini gagal menjawab')
         except Exception as e:
+            llm_metrics.catat_error('chef_ai', e)
             fallback = f"Maaf, Chef AI sedang tidak dapat dihubungi (Error: {e}). Saya coba jawab singkat: \n{simple_fallback_answer(pertanyaan)}"
             add_chat_message(username, 'assistant', fallback)
             return fallback
@@ -171,10 +180,56 @@ User: {pertanyaan}
     add_chat_message(username, 'assistant', answer)
     return answer
 
+def tanya_chef_ai_stream(pertanyaan, username="Pengguna"):
+    """
+    Sama seperti `tanya_chef_ai`, tetapi berupa generator yang menghasilkan
+    potongan jawaban begitu model mengirimkannya (cocok untuk st.write_stream).
+    Jawaban lengkap disimpan ke riwayat chat satu kali di akhir.
+    """
+    add_chat_message(username, 'user', pertanyaan)
+
+    potongan = []
+    cached, _ = chef_answer_cache.cari(pertanyaan)
+    llm_metrics.catat_cache('chef_semantic_cache', bool(cached))
+    jawaban_kb = None
+    if not cached:
+        jawaban_kb = chef_kb.jawab(pertanyaan)
+        llm_metrics.catat_cache('chef_kb', bool(jawaban_kb))
+    if cached or jawaban_kb:
+        potongan.append(cached or jawaban_kb)
+        yield cached or jawaban_kb
+    elif HAS_GENAI and API_KEY:
+        try:
+            for teks in get_router().generate_stream(_prompt_chef(pertanyaan), max_output_tokens=250,
+                                                     deadline=CHEF_AI_DEADLINE, operasi='chef_ai_stream'):
+                potongan.append(teks)
+                yield teks
+            if potongan:
+                # Hanya jawaban model yang lengkap yang masuk cache
+                chef_answer_cache.simpan(pertanyaan, "".join(potongan))
+                chef_kb.harvest(pertanyaan, "".join(potongan))
+        except Exception as e:
+            llm_metrics.catat_error('chef_ai_stream', e)
+            print(f"Error streaming Chef AI: {e}")
+        if not potongan:
+            fallback = f"Maaf, Chef AI sedang tidak dapat dihubungi. Saya coba jawab singkat: \n{simple_fallback_answer(pertanyaan)}"
+            potongan.append(fallback)
+            yield fallback
+    else:
+        answer = simple_fallback_answer(pertanyaan)
+        potongan.append(answer)
+        yield answer
+
+    add_chat_message(username, 'assistant', "".join(potongan))
+
 def simple_fallback_answer(prompt):
     """Respon sederhana ketika tidak ada AI eksternal.
-    Memberikan jawaban ringkas berdasarkan keyword makanan umum.
+    Memakai knowledge base lokal (ambang lebih longgar dari jalur cepat),
+    lalu jawaban ringkas berdasarkan keyword makanan umum.
     """
+    hasil_kb = chef_kb.cari(prompt, min_coverage=KB_FALLBACK_COVERAGE)
+    if hasil_kb:
+        return hasil_kb["answer"]
     p = prompt.lower()
     if 'ganti' in p or 'substitu' in p:
         return "Jika ingin mengganti bahan, coba gunakan bahan yang memiliki tekstur/kelembaban serupa. Contoh: yogurt tawar untuk sour cream, pisang matang untuk telur pada kue." 
@@ -185,14 +240,47 @@ def simple_fallback_answer(prompt):
     return "Maaf, saya belum terhubung ke AI eksternal. Coba tanyakan hal spesifik tentang resep atau bahan, mis. 'Bagaimana mengganti telur dalam kue?'"
 
 
-def ai_search_recipes(user_input, username=None, max_results=5):
-    """Gunakan Google Gemini (jika tersedia) untuk mengubah input pengguna
-    menjadi beberapa query pencarian resep, lalu panggil `cari_resep_spoonacular`
-    sebagai fallback/eksekutor pencarian. Mengembalikan list max 5 resep terbaik (sorted by rating).
+def _top_k_by_rating(daftar_hasil, k):
     """
-    # Simpan query ke chat history
-    if username:
-        add_chat_message(username, 'user', f"Mencari resep: {user_input}")
+    Menggabungkan hasil beberapa query: dedupe lewat index id (dict), lalu
+    simpan k resep dengan rating tertinggi di min-heap berukuran k.
+    Rating sama -> resep yang muncul lebih dulu (query lebih relevan) menang.
+    """
+    if k <= 0:
+        return []
+    terlihat = {}
+    heap = []  # (rating, -urutan, resep)
+    for found in daftar_hasil:
+        for r in found or []:
+            rid = r.get('id')
+            if rid in terlihat:
+                continue
+            terlihat[rid] = True
+            item = (r.get('rating') or 0, -len(terlihat), r)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+    heap.sort(key=lambda item: item[:2], reverse=True)
+    return [r for _, _, r in heap]
+
+def _normalisasi_input(teks):
+    """Kunci cache AI search: huruf kecil, tanpa tanda baca, spasi dirapikan."""
+    return " ".join(re.findall(r"\w+", (teks or "").lower()))
+
+def expand_queries(user_input):
+    """
+    Mengubah input pengguna menjadi daftar query pencarian lewat Gemini.
+    Hasil disimpan per input yang sudah dinormalisasi (sama untuk semua user).
+    Jika Gemini tidak tersedia / gagal, input mentah dipakai sebagai satu query
+    (hasil fallback tidak di-cache supaya bisa dicoba ulang ke Gemini).
+    """
+    kunci = _normalisasi_input(user_input)
+    if kunci:
+        cached = query_expansion_cache.get(kunci)
+        llm_metrics.catat_cache('query_expansion', bool(cached))
+        if cached:
+            return list(cached)
 
     # Prepare candidate queries
     queries = []
@@ -202,92 +290,93 @@ def ai_search_recipes(user_input, username=None, max_results=5):
             # prepare prompt for generating search queries
             gen_prompt = f"""
 You are Chef AI. The user gave this input (in Indonesian): "{user_input}".
-Return a JSON object with a key `queries` whose value is a list of up to 5 short search phrases (in Indonesian), optimized for recipe search (ingredients, dish types). Example: {"queries": ["chicken rice", "ayam kecap"]}
+Return a JSON object with a key `queries` whose value is a list of up to 5 short search phrases (in Indonesian), optimized for recipe search (ingredients, dish types). Example: {{"queries": ["chicken rice", "ayam kecap"]}}
 Only output the JSON object and nothing else.
 """
 
-            # try same helper function as above but with smaller tokens
-            def _try_generate_queries(prompt_text):
-                for model_name in PREFERRED_MODELS:
-                    try:
-                        # Strategy: try module-level generate_text
-                        if hasattr(genai, 'generate_text'):
-                            try:
-                                r = genai.generate_text(model=model_name, prompt=prompt_text, max_output_tokens=200)
-                                if hasattr(r, 'text') and r.text:
-                                    return r.text
-                                if isinstance(r, dict) and 'candidates' in r and r['candidates']:
-                                    return r['candidates'][0].get('content') or r['candidates'][0].get('text')
-                            except Exception:
-                                pass
-
-                        if hasattr(genai, 'GenerativeModel'):
-                            try:
-                                model = genai.GenerativeModel(model_name)
-                                if hasattr(model, 'generate_content'):
-                                    rr = model.generate_content(prompt_text)
-                                    if hasattr(rr, 'text') and rr.text:
-                                        return rr.text
-                                    if hasattr(rr, 'candidates') and rr.candidates:
-                                        cand = rr.candidates[0]
-                                        return getattr(cand, 'content', None) or getattr(cand, 'text', None)
-                            except Exception:
-                                pass
-
-                    except Exception:
-                        continue
-                return None
-
-            text = _try_generate_queries(gen_prompt) or ''
+            text = get_router().generate(gen_prompt, max_output_tokens=200, deadline=AI_QUERY_GEN_DEADLINE,
+                                         operasi='query_expansion') or ''
             # Try to parse JSON from response
             try:
                 obj = json.loads(text)
                 if isinstance(obj.get('queries'), list):
                     queries = obj.get('queries')[:5]
-            except Exception:
+            except Exception as e:
+                if text:
+                    llm_metrics.catat_error('query_expansion_parse', e)
                 # fallback to simple split by lines
                 lines = [l.strip('- ').strip() for l in text.splitlines() if l.strip()]
                 if lines:
                     queries = lines[:5]
-        except Exception:
+        except Exception as e:
+            llm_metrics.catat_error('query_expansion', e)
             queries = []
 
+    queries = [q for q in queries if isinstance(q, str) and q.strip()]
+    if queries and kunci:
+        query_expansion_cache.set(kunci, queries)
+
     # If no queries from Gemini, use the raw input as single query
-    if not queries:
-        queries = [user_input]
+    return queries or [user_input]
+
+def search_queries(queries, max_results=5):
+    """
+    Menjalankan daftar query ke Spoonacular (paralel) dan mengambil top-k by rating.
+    Di-cache per (query ternormalisasi, max_results), sama untuk semua user.
+    """
+    kunci = json.dumps([[_normalisasi_input(q) for q in queries], max_results], ensure_ascii=False)
+    cached = ai_result_cache.get(kunci)
+    llm_metrics.catat_cache('ai_search_results', cached is not None)
+    if cached is not None:
+        return cached
 
-    # Now execute searches (use spoonacular client if available)
+    # Now execute searches — semua query dikirim bersamaan lewat client async
     recipes = []
     try:
-        from src.api_client import cari_resep_spoonacular
+        from src.api_client_async import cari_resep_banyak
     except Exception:
-        cari_resep_spoonacular = None
+        cari_resep_banyak = None
 
+    daftar_bahan = []
     for q in queries:
-        if not q or len(recipes) >= (max_results * 3):  # Fetch more, then filter
-            break
+        if not q:
+            continue
         # Convert query string to bahan list (split by comma or space)
         if ',' in q:
             bahan_list = [s.strip() for s in q.split(',') if s.strip()]
         else:
             bahan_list = [s.strip() for s in q.split() if s.strip()]
+        if bahan_list:
+            daftar_bahan.append(bahan_list)
 
-        if cari_resep_spoonacular:
-            try:
-                found = cari_resep_spoonacular(bahan_list, diet=None, tipe=None, max_kalori=10000)
-                if found:
-                    for r in found:
-                        if len(recipes) >= (max_results * 3):
-                            break
-                        # avoid duplicates by id
-                        if not any(rr.get('id') == r.get('id') for rr in recipes):
-                            recipes.append(r)
-            except Exception:
-                pass
-
-    # Sort by rating (descending) and take top max_results
-    recipes.sort(key=lambda r: r.get('rating', 0), reverse=True)
-    recipes = recipes[:max_results]
+    if cari_resep_banyak and daftar_bahan:
+        try:
+            # Deadline per query: query yang lambat dilewati, hasil query lain tetap dipakai
+            semua_hasil = cari_resep_banyak(daftar_bahan, diet=None, tipe=None, max_kalori=10000,
+                                            timeout=AI_SEARCH_TIMEOUT, batas_per_query=AI_SEARCH_QUERY_TIMEOUT)
+        except Exception as e:
+            llm_metrics.catat_error('ai_search', e)
+            semua_hasil = []
+        recipes = _top_k_by_rating(semua_hasil, max_results)
+
+    # Hasil kosong tidak disimpan (bisa karena timeout / kuota habis)
+    if recipes:
+        ai_result_cache.set(kunci, recipes)
+    return recipes
+
+def ai_search_recipes(user_input, username=None, max_results=5):
+    """Gunakan Google Gemini (jika tersedia) untuk mengubah input pengguna
+    menjadi beberapa query pencarian resep, lalu panggil `cari_resep_spoonacular`
+    sebagai fallback/eksekutor pencarian. Mengembalikan list max 5 resep terbaik (sorted by rating).
+
+    Kedua langkah (ekspansi query & hasil pencarian) di-cache tanpa username;
+    pencatatan ke chat history tetap dilakukan setiap kali dipanggil.
+    """
+    # Simpan query ke chat history
+    if username:
+        add_chat_message(username, 'user', f"Mencari resep: {user_input}")
+
+    recipes = search_queries(expand_queries(user_input), max_results=max_results)
 
     # If still empty, return empty list
     if username:
@@ -1,10 +1,15 @@
 import os
+import time
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from src.gemini_router import jenis_error
+from src.llm_metrics import ambil_usage, llm_metrics
+
 # Load environment
 load_dotenv()
 API_KEY = os.getenv("GOOGLE_API_KEY")
+MODEL_NAME = 'models/gemini-1.5-flash'
 
 def tanya_chef_ai(pertanyaan, username="Pengguna"):
     """
@@ -13,10 +18,11 @@ def tanya_chef_ai(pertanyaan, username="Pengguna"):
     if not API_KEY:
         return "Maaf, API Key Chef AI belum dipasang."
 
+    mulai = time.monotonic()
     try:
         # Konfigurasi
         genai.configure(api_key=API_KEY)
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        model = genai.GenerativeModel(MODEL_NAME)
         
         # --- PROMPT ENGINEERING ---
         # Kita bungkus pertanyaan user dengan instruksi agar AI bertingkah seperti Chef
@@ -34,7 +40,15 @@ def tanya_chef_ai(pertanyaan, username="Pengguna"):
         """
 
         response = model.generate_content(prompt_khusus)
-        return response.text
+        teks = response.text
+        latency = time.monotonic() - mulai
+        llm_metrics.catat_panggilan(MODEL_NAME, latency, bool(teks), None if teks else 'kosong',
+                                    usage=ambil_usage(response), operasi='chef_ai_legacy')
+        llm_metrics.catat_permintaan('chef_ai_legacy', latency, bool(teks), depth=0)
+        return teks
         
     except Exception as e:
+        latency = time.monotonic() - mulai
+        llm_metrics.catat_panggilan(MODEL_NAME, latency, False, jenis_error(e), operasi='chef_ai_legacy')
+        llm_metrics.catat_permintaan('chef_ai_legacy', latency, False)
         return f"Waduh, Chef AI sedang sibuk (Error: {e})"
\ No newline at end of file
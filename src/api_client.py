@@ -1,29 +1,65 @@
 import requests # Library untuk mengirim permintaan ke internet (API)
 import os       # Library untuk mengakses sistem operasi (mengambil API Key)
+import json     # Untuk membentuk kunci cache pencarian
 from dotenv import load_dotenv # Library untuk membaca file .env
+from src.http_session import http_get # Session HTTP bersama (keep-alive + retry)
+from src.recipe_cache import get_cached_recipe, get_cached_recipes, set_cached_recipe # Cache detail resep (SQLite)
+from src.search_cache import search_cache # Cache hasil pencarian (memori + disk)
+from src.negative_cache import negative_cache # Cache pencarian kosong & resep 404
+from src.singleflight import SingleFlight # Penggabung request identik yang sedang berjalan
+from src.rate_limiter import PermintaanDitolak, spoonacular_guard # Rate limiter + circuit breaker kuota
 
 # 1. Memuat konfigurasi rahasia dari .env
 load_dotenv() # Membaca file .env
 API_KEY = os.environ.get("SPOONACULAR_API_KEY") # Mengambil kunci rahasia
 
 # URL (Alamat) API Spoonacular
-BASE_URL = "https://api.spoonacular.com/recipes/complexSearch" # Untuk cari resep
-RANDOM_URL = "https://api.spoonacular.com/recipes/random"      # Untuk resep acak
-DETAIL_URL = "https://api.spoonacular.com/recipes/{id}/information" # Untuk detail resep
+# Bisa diarahkan ke server tiruan (mock_spoonacular.py) lewat SPOONACULAR_BASE_URL
+API_ROOT = os.environ.get("SPOONACULAR_BASE_URL", "https://api.spoonacular.com").rstrip("/")
+BASE_URL = f"{API_ROOT}/recipes/complexSearch" # Untuk cari resep
+RANDOM_URL = f"{API_ROOT}/recipes/random"      # Untuk resep acak
+DETAIL_URL = API_ROOT + "/recipes/{id}/information" # Untuk detail resep
+BULK_URL = f"{API_ROOT}/recipes/informationBulk" # Untuk detail banyak resep sekaligus
 
-# --- FUNGSI PENCARIAN UTAMA ---
-# Kita tambahkan parameter baru: diet, tipe, dan max_kalori (defaultnya None/Kosong)
-def cari_resep_spoonacular(bahan_bahan_list, diet=None, tipe=None, max_kalori=None):
+# Jumlah ID maksimal per request informationBulk
+BULK_CHUNK_SIZE = 50
+
+# Request identik dari banyak sesi sekaligus cukup dikirim satu kali
+_flight = SingleFlight()
+
+# --- PENYUSUN PARAMETER ---
+# Dipakai bersama oleh versi sync (file ini) dan versi async (api_client_async.py)
+# Slider kalori di UI bergerak per 50 kcal; batas kalori dibulatkan ke bawah
+# ke kelipatan ini supaya permintaan yang mirip memakai kunci cache yang sama
+KALORI_BUCKET = 50
+
+def _kanonik_pencarian(bahan_bahan_list, diet=None, tipe=None, max_kalori=None):
     """
-    Mengirim permintaan ke Spoonacular dengan filter yang dipilih pengguna.
+    Bentuk baku sebuah pencarian, dipakai sebagai kunci cache & single-flight:
+    bahan di-lowercase, spasi dirapikan, duplikat dibuang, lalu diurutkan;
+    diet/tipe di-lowercase ("Semua" = tanpa filter); kalori dibulatkan per bucket.
+    "chicken, rice" dan "Rice ,chicken" menghasilkan bentuk yang sama.
     """
-    # Cek keamanan: Pastikan API Key ada
-    if not API_KEY: 
-        print("Error: API Key hilang - Pastikan SPOONACULAR_API_KEY ada di file .env")
-        return []
+    bahan = sorted({" ".join(str(b).lower().split()) for b in bahan_bahan_list if str(b).strip()})
+
+    def _filter(nilai):
+        if not nilai or str(nilai).strip().lower() == "semua":
+            return None
+        return str(nilai).strip().lower()
+
+    kalori = None
+    if max_kalori and max_kalori < 1000: # Jika diset < 1000, baru kita filter
+        kalori = max(KALORI_BUCKET, int(max_kalori) // KALORI_BUCKET * KALORI_BUCKET)
 
-    # Mengubah list ["ayam", "nasi"] menjadi string "ayam,nasi"
-    bahan_string = ",".join(bahan_bahan_list)
+    return {"bahan": bahan, "diet": _filter(diet), "tipe": _filter(tipe), "max_kalori": kalori}
+
+def _kunci_pencarian(kanonik):
+    """Kunci string dari bentuk baku pencarian (tanpa apiKey)."""
+    return json.dumps(kanonik, sort_keys=True, ensure_ascii=False)
+
+def _params_pencarian(kanonik):
+    """Menyusun parameter complexSearch dari bentuk baku pencarian."""
+    bahan_string = ",".join(kanonik["bahan"])
 
     # Menyiapkan 'Surat' permintaan (Parameters)
     params = {
@@ -37,60 +73,171 @@ def cari_resep_spoonacular(bahan_bahan_list, diet=None, tipe=None, max_kalori=No
 
     # --- LOGIKA FILTER TAMBAHAN ---
     # Jika pengguna memilih Diet (misal: Vegetarian), masukkan ke params
-    if diet and diet != "Semua":
-        params['diet'] = diet
+    if kanonik["diet"]:
+        params['diet'] = kanonik["diet"]
     
     # Jika pengguna memilih Tipe (misal: Sarapan), masukkan ke params
-    if tipe and tipe != "Semua":
-        params['type'] = tipe.lower() # API butuh huruf kecil (breakfast)
+    if kanonik["tipe"]:
+        params['type'] = kanonik["tipe"] # API butuh huruf kecil (breakfast)
 
     # Jika pengguna mengatur Slider Kalori, masukkan ke params
-    if max_kalori and max_kalori < 1000: # Jika diset < 1000, baru kita filter
-        params['maxCalories'] = max_kalori
+    if kanonik["max_kalori"]:
+        params['maxCalories'] = kanonik["max_kalori"]
+
+    return params
+
+def _params_random(jumlah, nutrisi=True):
+    return {
+        "apiKey": API_KEY,
+        "number": jumlah,
+        "tags": "main course", # Hanya ambil makanan berat
+        "includeNutrition": nutrisi
+    }
+
+def _params_detail():
+    return {
+        "apiKey": API_KEY,
+        "includeNutrition": True # Minta info nutrisi juga
+    }
+
+def _params_bulk(potongan_id):
+    return {
+        "apiKey": API_KEY,
+        "ids": ",".join(str(rid) for rid in potongan_id),
+        "includeNutrition": True
+    }
+
+def _normalisasi_daftar_id(daftar_id):
+    """Jadikan integer, buang ID tidak valid & duplikat, tetap jaga urutan."""
+    ids = []
+    sudah = set()
+    for rid in daftar_id:
+        try:
+            rid = int(rid)
+        except (TypeError, ValueError):
+            print(f"Error: ID resep '{rid}' tidak valid.")
+            continue
+        if rid not in sudah:
+            sudah.add(rid)
+            ids.append(rid)
+    return ids
+
+def _simpan_hasil_bulk(hasil, daftar_data, diminta=()):
+    """
+    Memasukkan respons informationBulk ke dict `hasil` dan ke cache.
+    ID yang diminta tapi tidak ada di respons dicatat di cache negatif.
+    """
+    for data in daftar_data or []:
+        if data and data.get('id') is not None:
+            rid = int(data['id'])
+            hasil[rid] = data
+            set_cached_recipe(rid, data)
+    for rid in diminta:
+        if rid not in hasil:
+            negative_cache.tambah(f"detail:{rid}")
+
+def _perlu_diminta(ids, hasil):
+    """ID yang belum ada di `hasil` dan tidak tercatat di cache negatif."""
+    return [rid for rid in ids if rid not in hasil and not negative_cache.ada(f"detail:{rid}")]
+
+def _kirim_get(url, params, endpoint):
+    """
+    `http_get` yang dijaga rate limiter dan circuit breaker.
+    Jika kuota habis / breaker terbuka, langsung melempar PermintaanDitolak
+    (dalam hitungan milidetik) tanpa menyentuh jaringan.
+    """
+    spoonacular_guard.sebelum_request()
+    try:
+        response = http_get(url, params=params, endpoint=endpoint)
+    except Exception as e:
+        spoonacular_guard.catat_gagal(e)
+        raise
+    spoonacular_guard.catat_respons(response)
+    return response
+
+# --- FUNGSI PENCARIAN UTAMA ---
+# Kita tambahkan parameter baru: diet, tipe, dan max_kalori (defaultnya None/Kosong)
+def cari_resep_spoonacular(bahan_bahan_list, diet=None, tipe=None, max_kalori=None):
+    """
+    Mengirim permintaan ke Spoonacular dengan filter yang dipilih pengguna.
+    Permintaan dinormalisasi dulu (lihat `_kanonik_pencarian`) lalu dicek di
+    cache hasil pencarian. Pencarian identik yang sedang berjalan dari sesi
+    lain tidak dikirim ulang, melainkan ikut menunggu hasil request yang sama.
+    """
+    # Cek keamanan: Pastikan API Key ada
+    if not API_KEY: 
+        print("Error: API Key hilang - Pastikan SPOONACULAR_API_KEY ada di file .env")
+        return []
+
+    kanonik = _kanonik_pencarian(bahan_bahan_list, diet, tipe, max_kalori)
+    kunci = _kunci_pencarian(kanonik)
+
+    # 1. Cek cache hasil pencarian (memori lalu disk)
+    cached = search_cache.get(kunci)
+    if cached is not None:
+        return cached
+
+    # Kombinasi bahan yang barusan tidak menghasilkan apa-apa tidak perlu ditanya ulang
+    if negative_cache.ada("search:" + kunci):
+        print(f"Warning: Tidak ada hasil untuk bahan: {','.join(kanonik['bahan'])} (cache negatif)")
+        return []
+
+    # 2. Kirim ke API (digabung dengan request identik yang sedang berjalan)
+    return _flight.do(("search", kunci), _kirim_pencarian, kunci, _params_pencarian(kanonik))
+
+def _kirim_pencarian(kunci, params):
+    """Mengirim satu request complexSearch ke Spoonacular lalu menyimpan hasilnya ke cache."""
+    bahan_string = params.get('includeIngredients', '')
 
     # Mengirim permintaan ke server Spoonacular
     try:
-        response = requests.get(BASE_URL, params=params, timeout=15)
+        response = _kirim_get(BASE_URL, params, "search")
         response.raise_for_status() # Cek jika ada error (misal koneksi putus)
         data = response.json()      # Ubah hasil jadi format Python (Dictionary)
         results = data.get('results', []) # Ambil bagian 'results'
         
         if not results:
             print(f"Warning: Tidak ada hasil untuk bahan: {bahan_string}")
+            negative_cache.tambah("search:" + kunci)
+        else:
+            search_cache.set(kunci, results)
         
         return results
+    except PermintaanDitolak as e:
+        # Kuota habis: pakai hasil lama di cache (walau sudah kadaluarsa) jika ada
+        print(f"Warning: Pencarian '{bahan_string}' dilewati: {e}")
+        return search_cache.get(kunci, izinkan_kadaluarsa=True) or []
     except requests.exceptions.Timeout:
         print(f"Error: Request timeout saat mencari resep dengan bahan {bahan_string}")
         return []
     except requests.exceptions.HTTPError as e:
         print(f"Error HTTP {response.status_code} saat pencarian: {e}")
+        if response.status_code in (402, 429):
+            # Kuota / rate limit: pakai hasil lama di cache seperti di jalur detail
+            return search_cache.get(kunci, izinkan_kadaluarsa=True) or []
         return []
     except Exception as e:
         print(f"Error API Search: {e}")
         return []
 
 # --- FUNGSI RESEP RANDOM ---
-def dapatkan_resep_random(jumlah=3, api_key=None):
+def dapatkan_resep_random(jumlah=3, api_key=None, nutrisi=True):
     """Mengambil resep acak untuk inspirasi dashboard.
 
     Parameters
     - jumlah: jumlah resep yang diminta
     - api_key: tidak digunakan lagi (untuk backward compatibility saja)
+    - nutrisi: sertakan data gizi (respons lebih besar & lebih mahal kuota)
     """
     # Gunakan API_KEY dari .env
     if not API_KEY:
         print("Error: SPOONACULAR_API_KEY tidak ditemukan di file .env")
         return []
 
-    params = {
-        "apiKey": API_KEY,
-        "number": jumlah,
-        "tags": "main course", # Hanya ambil makanan berat
-        "includeNutrition": True
-    }
+    params = _params_random(jumlah, nutrisi)
 
     try:
-        response = requests.get(RANDOM_URL, params=params, timeout=15)
+        response = _kirim_get(RANDOM_URL, params, "random")
         response.raise_for_status()
         # API Random struktur datanya 'recipes', bukan 'results'
         recipes = response.json().get('recipes', [])
@@ -99,6 +246,9 @@ def dapatkan_resep_random(jumlah=3, api_key=None):
             print(f"Warning: Tidak ada resep random yang ditemukan")
         
         return recipes
+    except PermintaanDitolak as e:
+        print(f"Warning: Resep random dilewati: {e}")
+        return []
     except requests.exceptions.Timeout:
         print(f"Error: Request timeout saat mengambil resep random")
         return []
@@ -111,19 +261,36 @@ def dapatkan_resep_random(jumlah=3, api_key=None):
 
 # --- FUNGSI DETAIL RESEP ---
 def dapatkan_detail_resep(id_resep):
-    """Mengambil detail lengkap satu resep berdasarkan ID-nya."""
+    """Mengambil detail lengkap satu resep berdasarkan ID-nya.
+
+    Detail disimpan di cache SQLite (lihat src/recipe_cache.py), jadi resep
+    yang sama tidak perlu diminta ulang ke Spoonacular setiap rerun.
+    """
+    try:
+        cached = get_cached_recipe(id_resep)
+    except (TypeError, ValueError):
+        print(f"Error: ID resep '{id_resep}' tidak valid.")
+        return None
+    if cached:
+        return cached
+
+    # ID yang barusan 404 tidak perlu ditanya ulang
+    if negative_cache.ada(f"detail:{int(id_resep)}"):
+        print(f"Error: Resep ID {id_resep} tidak ditemukan (cache negatif)")
+        return None
+
     if not API_KEY:
         print("Error: API Key hilang - Pastikan SPOONACULAR_API_KEY ada di file .env")
         return None
 
-    url = DETAIL_URL.format(id=id_resep)
-    params = {
-        "apiKey": API_KEY,
-        "includeNutrition": True # Minta info nutrisi juga
-    }
+    return _flight.do(("detail", int(id_resep)), _kirim_detail, id_resep)
 
+def _kirim_detail(id_resep):
+    """Mengirim satu request /information lalu menyimpan hasilnya ke cache."""
+    url = DETAIL_URL.format(id=id_resep)
+    params = _params_detail()
     try:
-        response = requests.get(url, params=params, timeout=15)
+        response = _kirim_get(url, params, "detail")
         response.raise_for_status()
         data = response.json()
         
@@ -132,13 +299,86 @@ def dapatkan_detail_resep(id_resep):
             print(f"Error: Response kosong untuk recipe ID {id_resep}")
             return None
         
+        set_cached_recipe(id_resep, data)
         return data
+    except PermintaanDitolak as e:
+        # Kuota habis: pakai data lama di cache (walau sudah kadaluarsa) jika ada
+        print(f"Warning: Detail resep {id_resep} tidak diminta ke API: {e}")
+        return get_cached_recipe(id_resep, izinkan_kadaluarsa=True)
     except requests.exceptions.Timeout:
         print(f"Error: Request timeout untuk recipe ID {id_resep}")
         return None
     except requests.exceptions.HTTPError as e:
         print(f"Error HTTP {response.status_code} untuk recipe ID {id_resep}: {e}")
+        if response.status_code == 404:
+            negative_cache.tambah(f"detail:{int(id_resep)}")
+        if response.status_code in (402, 429):
+            return get_cached_recipe(id_resep, izinkan_kadaluarsa=True)
         return None
     except Exception as e:
         print(f"Error API Detail untuk recipe ID {id_resep}: {e}")
-        return None
\ No newline at end of file
+        return None
+
+# --- FUNGSI DETAIL RESEP (BULK) ---
+def dapatkan_detail_resep_bulk(daftar_id):
+    """Mengambil detail banyak resep sekaligus lewat endpoint informationBulk.
+
+    - ID yang sudah ada di cache (atau tercatat 404 di cache negatif) tidak diminta ulang ke API.
+    - Sisanya dipecah per BULK_CHUNK_SIZE ID, satu request per potongan.
+    - Hasil dikembalikan sesuai urutan `daftar_id`; resep yang gagal dimuat dilewati.
+    """
+    ids = _normalisasi_daftar_id(daftar_id)
+    if not ids:
+        return []
+
+    # 1. Ambil yang sudah ada di cache
+    hasil = get_cached_recipes(ids)
+    belum_ada = _perlu_diminta(ids, hasil)
+
+    # 2. Minta sisanya ke API, per potongan
+    if belum_ada and not API_KEY:
+        print("Error: API Key hilang - Pastikan SPOONACULAR_API_KEY ada di file .env")
+        belum_ada = []
+
+    for i in range(0, len(belum_ada), BULK_CHUNK_SIZE):
+        potongan = belum_ada[i:i + BULK_CHUNK_SIZE]
+        try:
+            response = _kirim_get(BULK_URL, _params_bulk(potongan), "bulk")
+            response.raise_for_status()
+            _simpan_hasil_bulk(hasil, response.json(), potongan)
+        except PermintaanDitolak as e:
+            # Potongan berikutnya juga pasti ditolak; sisanya diambil dari cache lama
+            print(f"Warning: Detail bulk dihentikan: {e}")
+            sisa = [rid for rid in belum_ada[i:] if rid not in hasil]
+            hasil.update(get_cached_recipes(sisa, izinkan_kadaluarsa=True))
+            break
+        except requests.exceptions.Timeout:
+            print(f"Error: Request timeout saat mengambil detail bulk untuk ID {potongan}")
+        except requests.exceptions.HTTPError as e:
+            print(f"Error HTTP {response.status_code} saat detail bulk: {e}")
+            if response.status_code in (402, 429):
+                # Kuota / rate limit (breaker kini terbuka): sisanya dari cache lama, seperti di atas
+                sisa = [rid for rid in belum_ada[i:] if rid not in hasil]
+                hasil.update(get_cached_recipes(sisa, izinkan_kadaluarsa=True))
+                break
+        except Exception as e:
+            print(f"Error API Detail Bulk: {e}")
+
+    # 3. Susun ulang sesuai urutan input
+    return [hasil[rid] for rid in ids if rid in hasil]
+
+def get_singleflight_stats():
+    """Statistik penggabungan request (berapa panggilan yang ikut menumpang request lain)."""
+    return _flight.stats()
+
+def get_limiter_status():
+    """Status rate limiter, circuit breaker, dan sisa kuota Spoonacular."""
+    return spoonacular_guard.status()
+
+def get_search_cache_stats():
+    """Statistik cache hasil pencarian (tier memori & disk)."""
+    return search_cache.stats()
+
+def get_negative_cache_stats():
+    """Statistik cache negatif (pencarian kosong & resep tidak ditemukan)."""
+    return negative_cache.stats()
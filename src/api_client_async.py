@@ -0,0 +1,389 @@
+"""
+Versi async dari src/api_client.py.
+
+Dipakai ketika satu halaman butuh beberapa request Spoonacular sekaligus
+(misalnya beberapa query dari AI search, atau detail bulk yang dipecah jadi
+beberapa potongan). Semua request dijalankan bersamaan, sehingga waktu tunggu
+total ~ request paling lambat, bukan jumlah semuanya.
+
+Streamlit menjalankan script secara sync, jadi modul ini punya satu event loop
+di background thread. Fungsi facade sync (`jalankan`, `cari_resep_banyak`,
+`dapatkan_detail_resep_bulk_paralel`) mengirim coroutine ke loop tersebut dan
+menunggu hasilnya; jika melewati batas waktu, coroutine dibatalkan.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import CancelledError
+
+# httpx dipakai sebagai HTTP client non-blocking; jika tidak terpasang,
+# request sync dijalankan di thread pool supaya fungsi di sini tetap jalan.
+try:
+    import httpx
+    HAS_HTTPX = True
+except Exception:
+    httpx = None
+    HAS_HTTPX = False
+
+from src import api_client
+from src.http_session import (
+    BACKOFF_FACTOR, BACKOFF_JITTER, BACKOFF_MAX, MAX_RETRIES, POOL_SIZE,
+    RETRY_STATUS, TIMEOUTS, http_get,
+)
+from src.rate_limiter import PermintaanDitolak, spoonacular_guard
+from src.recipe_cache import get_cached_recipe, get_cached_recipes, set_cached_recipe
+from src.search_cache import search_cache
+from src.negative_cache import negative_cache
+from src.singleflight import AsyncSingleFlight
+
+# Maksimal request ke Spoonacular yang berjalan bersamaan dari proses ini
+MAX_CONCURRENCY = int(os.environ.get("ASYNC_MAX_CONCURRENCY", 8))
+# Batas waktu default untuk facade sync (detik)
+DEFAULT_TIMEOUT = float(os.environ.get("ASYNC_DEFAULT_TIMEOUT", 30))
+# Seberapa sering facade sync memeriksa `cancel_event` selama menunggu (detik)
+JEDA_CEK_BATAL = 0.2
+
+_loop = None
+_loop_lock = threading.Lock()
+_client = None
+_semaphore = None
+# Request identik yang sedang berjalan di loop ini digabung. Terpisah dari
+# api_client._flight: panggilan sync dan async dengan kunci sama tidak digabung.
+_flight = AsyncSingleFlight()
+
+
+# --- EVENT LOOP & CLIENT ---
+def _get_loop():
+    """Event loop milik modul ini, berjalan terus di daemon thread."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="spoonacular-async", daemon=True)
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+def _get_client():
+    """AsyncClient dan semaphore dibuat sekali di dalam loop modul."""
+    global _client, _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    if HAS_HTTPX and _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            transport=httpx.AsyncHTTPTransport(retries=MAX_RETRIES),  # retry koneksi gagal
+        )
+    return _client
+
+
+def _backoff(percobaan):
+    dasar = BACKOFF_FACTOR * (2 ** percobaan)
+    return min(BACKOFF_MAX, dasar + random.uniform(0, BACKOFF_JITTER))
+
+
+def _status_http(error):
+    """Status HTTP dari error httpx / requests (tanpa httpx, request lewat session sync)."""
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+def _lepas_izin(izin):
+    """Izin yang keluar setelah pemanggilnya dibatalkan tidak terpakai: lepaskan slot half-open."""
+    if not izin.cancelled() and izin.exception() is None:
+        spoonacular_guard.breaker.batal()
+
+
+async def _minta_izin():
+    """
+    `spoonacular_guard.sebelum_request` di thread (menunggu token bisa memakai
+    sleep, jadi loop tidak boleh ikut macet). Jika pemanggil dibatalkan saat
+    thread masih menunggu, thread tetap selesai di belakang; izin yang
+    diberikannya dilepas lagi supaya breaker tidak tertahan di half_open.
+    """
+    izin = asyncio.ensure_future(asyncio.to_thread(spoonacular_guard.sebelum_request))
+    try:
+        await asyncio.shield(izin)
+    except asyncio.CancelledError:
+        izin.add_done_callback(_lepas_izin)
+        raise
+
+
+async def _get_json(url, params, endpoint):
+    """
+    GET async dengan batas konkurensi dan retry + jitter pada 5xx
+    (kebijakan yang sama dengan session sync di http_session.py; 429
+    langsung diteruskan ke SpoonacularGuard), dijaga
+    rate limiter + circuit breaker yang sama dengan api_client.
+    Melempar exception jika gagal; pemanggil yang memutuskan nilai fallback.
+    """
+    client = _get_client()
+    async with _semaphore:
+        await _minta_izin()
+        try:
+            if not HAS_HTTPX:
+                response = await asyncio.to_thread(http_get, url, params=params, endpoint=endpoint)
+            else:
+                connect, read = TIMEOUTS.get(endpoint, TIMEOUTS["default"])
+                timeout = httpx.Timeout(read, connect=connect)
+                for percobaan in range(MAX_RETRIES + 1):
+                    response = await client.get(url, params=params, timeout=timeout)
+                    if response.status_code in RETRY_STATUS and percobaan < MAX_RETRIES:
+                        await asyncio.sleep(_backoff(percobaan))
+                        continue
+                    break
+        except asyncio.CancelledError:
+            spoonacular_guard.breaker.batal()
+            raise
+        except Exception as e:
+            spoonacular_guard.catat_gagal(e)
+            raise
+        spoonacular_guard.catat_respons(response)
+        response.raise_for_status()
+        return response.json()
+
+
+# --- FUNGSI ASYNC ---
+async def cari_resep_async(bahan_bahan_list, diet=None, tipe=None, max_kalori=None):
+    """Versi async dari `cari_resep_spoonacular` (memakai cache pencarian yang sama)."""
+    if not api_client.API_KEY:
+        print("Error: API Key hilang - Pastikan SPOONACULAR_API_KEY ada di file .env")
+        return []
+    kanonik = api_client._kanonik_pencarian(bahan_bahan_list, diet, tipe, max_kalori)
+    kunci = api_client._kunci_pencarian(kanonik)
+    # Tier disk cache berupa SQLite: jangan jalankan di event loop bersama
+    cached = await asyncio.to_thread(search_cache.get, kunci)
+    if cached is not None:
+        return cached
+    if negative_cache.ada("search:" + kunci):
+        return []
+    return await _flight.do(("search", kunci), _kirim_pencarian_async, kunci, kanonik)
+
+
+async def _kirim_pencarian_async(kunci, kanonik):
+    """Satu request complexSearch; hasilnya disimpan ke cache pencarian / cache negatif."""
+    try:
+        data = await _get_json(api_client.BASE_URL, api_client._params_pencarian(kanonik), "search")
+        results = data.get('results', [])
+        if results:
+            await asyncio.to_thread(search_cache.set, kunci, results)
+        else:
+            negative_cache.tambah("search:" + kunci)
+        return results
+    except asyncio.CancelledError:
+        raise
+    except PermintaanDitolak as e:
+        print(f"Warning: Pencarian (async) '{','.join(kanonik['bahan'])}' dilewati: {e}")
+        return await asyncio.to_thread(search_cache.get, kunci, True) or []
+    except Exception as e:
+        print(f"Error API Search (async) untuk bahan {','.join(kanonik['bahan'])}: {e}")
+        if _status_http(e) in (402, 429):
+            return await asyncio.to_thread(search_cache.get, kunci, True) or []
+        return []
+
+
+async def dapatkan_resep_random_async(jumlah=3):
+    """Versi async dari `dapatkan_resep_random`."""
+    if not api_client.API_KEY:
+        print("Error: SPOONACULAR_API_KEY tidak ditemukan di file .env")
+        return []
+    try:
+        data = await _get_json(api_client.RANDOM_URL, api_client._params_random(jumlah), "random")
+        return data.get('recipes', [])
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Error API Random (async): {e}")
+        return []
+
+
+async def dapatkan_detail_resep_async(id_resep):
+    """Versi async dari `dapatkan_detail_resep` (memakai cache yang sama)."""
+    try:
+        cached = await asyncio.to_thread(get_cached_recipe, id_resep)
+    except (TypeError, ValueError):
+        print(f"Error: ID resep '{id_resep}' tidak valid.")
+        return None
+    if cached:
+        return cached
+    if negative_cache.ada(f"detail:{int(id_resep)}"):
+        return None
+    if not api_client.API_KEY:
+        print("Error: API Key hilang - Pastikan SPOONACULAR_API_KEY ada di file .env")
+        return None
+    return await _flight.do(("detail", int(id_resep)), _kirim_detail_async, id_resep)
+
+
+async def _kirim_detail_async(id_resep):
+    """Satu request /information; hasilnya disimpan ke cache resep."""
+    try:
+        url = api_client.DETAIL_URL.format(id=id_resep)
+        data = await _get_json(url, api_client._params_detail(), "detail")
+        if not data:
+            return None
+        await asyncio.to_thread(set_cached_recipe, id_resep, data)
+        return data
+    except asyncio.CancelledError:
+        raise
+    except PermintaanDitolak as e:
+        print(f"Warning: Detail resep {id_resep} tidak diminta ke API: {e}")
+        return await asyncio.to_thread(get_cached_recipe, id_resep, True)
+    except Exception as e:
+        print(f"Error API Detail (async) untuk recipe ID {id_resep}: {e}")
+        if _status_http(e) == 404:
+            negative_cache.tambah(f"detail:{int(id_resep)}")
+        if _status_http(e) in (402, 429):
+            return await asyncio.to_thread(get_cached_recipe, id_resep, True)
+        return None
+
+
+async def dapatkan_detail_resep_bulk_async(daftar_id):
+    """
+    Versi async dari `dapatkan_detail_resep_bulk`: potongan informationBulk
+    diminta bersamaan, bukan satu per satu. Potongan yang sama persis dengan
+    request yang sedang berjalan ikut menunggu hasilnya (single-flight).
+    """
+    ids = api_client._normalisasi_daftar_id(daftar_id)
+    if not ids:
+        return []
+    hasil = await asyncio.to_thread(get_cached_recipes, ids)
+    belum_ada = api_client._perlu_diminta(ids, hasil)
+    if belum_ada and not api_client.API_KEY:
+        print("Error: API Key hilang - Pastikan SPOONACULAR_API_KEY ada di file .env")
+        belum_ada = []
+
+    ukuran = api_client.BULK_CHUNK_SIZE
+    potongan = [belum_ada[i:i + ukuran] for i in range(0, len(belum_ada), ukuran)]
+    respons = await asyncio.gather(
+        *(_flight.do(("bulk", tuple(p)), _get_json, api_client.BULK_URL, api_client._params_bulk(p), "bulk")
+          for p in potongan),
+        return_exceptions=True,
+    )
+    ditolak = []
+    for p, r in zip(potongan, respons):
+        if isinstance(r, PermintaanDitolak) or _status_http(r) in (402, 429):
+            ditolak.extend(p)
+        elif isinstance(r, BaseException):
+            print(f"Error API Detail Bulk (async) untuk ID {p}: {r}")
+        else:
+            await asyncio.to_thread(api_client._simpan_hasil_bulk, hasil, r, p)
+    if ditolak:
+        # Kuota habis / breaker terbuka: pakai data lama di cache jika ada
+        print(f"Warning: {len(ditolak)} detail resep tidak diminta ke API (kuota/breaker)")
+        hasil.update(await asyncio.to_thread(get_cached_recipes, ditolak, True))
+
+    return [hasil[rid] for rid in ids if rid in hasil]
+
+
+async def _cari_dengan_batas(bahan, diet, tipe, max_kalori, batas_per_query):
+    """Satu pencarian dengan deadline sendiri; lewat batas dianggap hasil kosong."""
+    if not batas_per_query:
+        return await cari_resep_async(bahan, diet, tipe, max_kalori)
+    try:
+        return await asyncio.wait_for(cari_resep_async(bahan, diet, tipe, max_kalori), batas_per_query)
+    except asyncio.TimeoutError:
+        print(f"Error: Pencarian {bahan} melewati batas {batas_per_query} detik")
+        return []
+
+
+async def cari_resep_banyak_async(daftar_bahan, diet=None, tipe=None, max_kalori=None, batas_per_query=None,
+                                  batas_total=None):
+    """
+    Menjalankan beberapa pencarian bersamaan (dibatasi MAX_CONCURRENCY).
+    Hasil: list of list, urutan sama dengan input. Jika `batas_per_query`
+    diisi, query yang lambat diganti [] sehingga hasil query lain tetap kembali.
+    Jika `batas_total` habis, query yang sudah selesai tetap dikembalikan;
+    hanya yang belum selesai dibatalkan dan diganti [].
+    """
+    tugas = [asyncio.ensure_future(_cari_dengan_batas(bahan, diet, tipe, max_kalori, batas_per_query))
+             for bahan in daftar_bahan]
+    if not tugas:
+        return []
+    try:
+        selesai, tertunda = await asyncio.wait(tugas, timeout=batas_total)
+    except asyncio.CancelledError:
+        for t in tugas:
+            t.cancel()
+        raise
+    for t in tertunda:
+        t.cancel()
+    if tertunda:
+        print(f"Error: {len(tertunda)} dari {len(tugas)} pencarian melewati batas {batas_total} detik")
+
+    hasil = []
+    for bahan, t in zip(daftar_bahan, tugas):
+        if t in selesai and t.exception() is None:
+            hasil.append(t.result())
+        else:
+            if t in selesai:
+                print(f"Error: Pencarian {bahan} gagal: {t.exception()}")
+            hasil.append([])
+    return hasil
+
+
+def get_singleflight_stats():
+    """Statistik penggabungan request di loop async."""
+    return _flight.stats()
+
+
+# --- FACADE SYNC (UNTUK STREAMLIT) ---
+def jalankan(coro, timeout=DEFAULT_TIMEOUT, cancel_event=None):
+    """
+    Menjalankan coroutine di loop background dan menunggu hasilnya.
+    Jika lewat `timeout`, coroutine dibatalkan lalu TimeoutError dilempar.
+    Jika `cancel_event` (threading.Event, misal dari job_manager) di-set,
+    coroutine dibatalkan lalu CancelledError dilempar.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+    try:
+        if cancel_event is None:
+            return future.result(timeout=timeout)
+        batas = time.monotonic() + timeout
+        while True:
+            if cancel_event.is_set():
+                raise CancelledError()
+            sisa = batas - time.monotonic()
+            if sisa <= 0:
+                raise TimeoutError()
+            try:
+                return future.result(timeout=min(sisa, JEDA_CEK_BATAL))
+            except TimeoutError:
+                pass
+    except BaseException:
+        # Timeout, KeyboardInterrupt, atau script Streamlit dihentikan: batalkan request yang tersisa
+        future.cancel()
+        raise
+
+
+def cari_resep_banyak(daftar_bahan, diet=None, tipe=None, max_kalori=None, timeout=DEFAULT_TIMEOUT,
+                      batas_per_query=None):
+    """
+    Facade sync untuk `cari_resep_banyak_async`. Jika lewat `timeout`, hasil
+    query yang sudah selesai tetap dikembalikan; [] hanya untuk yang belum.
+    """
+    try:
+        # Deadline dijaga di dalam loop (batas_total); timeout jalankan hanya
+        # cadangan jika loop sendiri macet
+        return jalankan(cari_resep_banyak_async(daftar_bahan, diet, tipe, max_kalori, batas_per_query,
+                                                batas_total=timeout),
+                        timeout=timeout + 1)
+    except TimeoutError:
+        print(f"Error: Pencarian paralel melewati batas {timeout} detik")
+        return [[] for _ in daftar_bahan]
+
+
+def dapatkan_detail_resep_bulk_paralel(daftar_id, timeout=DEFAULT_TIMEOUT, cancel_event=None):
+    """
+    Facade sync untuk `dapatkan_detail_resep_bulk_async`. Jika `cancel_event`
+    di-set (job dibatalkan), request yang tersisa dibatalkan dan
+    CancelledError dilempar.
+    """
+    try:
+        return jalankan(dapatkan_detail_resep_bulk_async(daftar_id), timeout=timeout,
+                        cancel_event=cancel_event)
+    except TimeoutError:
+        print(f"Error: Memuat detail bulk melewati batas {timeout} detik")
+        return []
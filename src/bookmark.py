@@ -1,10 +1,28 @@
 import json
 import os
+import sqlite3
+
+from src import storage
+from src.json_store import JsonStore
 
 # --- KONFIGURASI FILE ---
+# Dipakai jika STORAGE_BACKEND=json; defaultnya data ada di SQLite (src/storage.py)
 DATA_FOLDER = 'data'
 BOOKMARK_FILE = os.path.join(DATA_FOLDER, 'bookmarks.json')
 
+# Di file: {username: [id, ...]}. Di memori: {username: {id: None, ...}} --
+# dict sebagai set yang menjaga urutan tambah, jadi cek/tambah/hapus O(1).
+def _ke_set(data):
+    return {user: dict.fromkeys(int(rid) for rid in daftar) for user, daftar in data.items()}
+
+
+def _ke_list(data):
+    return {user: list(ids) for user, ids in data.items()}
+
+
+# Isi file di-cache per proses; ditulis atomik di bawah kunci file (src/json_store.py)
+bookmark_store = JsonStore(BOOKMARK_FILE, dari_json=_ke_set, ke_json=_ke_list)
+
 def ensure_data_exists():
     """
     Memastikan folder 'data' dan file 'bookmarks.json' tersedia.
@@ -20,24 +38,16 @@ def ensure_data_exists():
 
 def load_bookmarks():
     """
-    Membaca seluruh data bookmark dari file JSON.
+    Membaca seluruh data bookmark {username: [id, ...]} (salinan dari cache,
+    file hanya dibaca jika berubah).
     """
-    ensure_data_exists()
-    try:
-        with open(BOOKMARK_FILE, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {}
+    return _ke_list(bookmark_store.baca())
 
 def save_bookmarks(data):
     """
-    Menulis kembali data ke file JSON.
+    Menulis kembali data {username: [id, ...]} ke file JSON (atomik, cache ikut diperbarui).
     """
-    ensure_data_exists()
-    with open(BOOKMARK_FILE, 'w') as f:
-        # indent=4 biar rapi kalau mau dibaca manusia, 
-        # tapi karena isinya cuma angka, ini tetap hemat memori.
-        json.dump(data, f, indent=4)
+    bookmark_store.simpan(_ke_set(data))
 
 def add_bookmark(username, recipe_id):
     """
@@ -47,29 +57,32 @@ def add_bookmark(username, recipe_id):
     if not username:
         return False
 
-    data = load_bookmarks()
-    
-    # Buat list kosong jika user belum punya bookmark
-    if username not in data:
-        data[username] = []
-    
+    if storage.pakai_sqlite():
+        try:
+            return storage.storage.bookmark_tambah(username, int(recipe_id))
+        except ValueError:
+            print(f"Error: ID resep '{recipe_id}' tidak valid.")
+        except sqlite3.Error as e:
+            print(f"Error menyimpan bookmark: {e}")
+        return False
+
     try:
         # Pastikan ID disimpan sebagai integer agar seragam
         rid = int(recipe_id)
-        
-        # Cek duplikasi: hanya simpan jika belum ada
-        if rid not in data[username]:
-            data[username].append(rid)
-            save_bookmarks(data)
-            return True
-        else:
-            # Sudah ada, anggap sukses tapi tidak nambah
-            return False
-            
     except ValueError:
         print(f"Error: ID resep '{recipe_id}' tidak valid.")
         return False
 
+    def tambah(data):
+        # Cek duplikasi: hanya simpan jika belum ada (sudah ada -> False, file tidak ditulis)
+        ids = data.setdefault(username, {})
+        if rid in ids:
+            return False
+        ids[rid] = None
+        return True
+
+    return bookmark_store.perbarui(tambah)
+
 def remove_bookmark(username, recipe_id):
     """
     Menghapus ID resep dari daftar bookmark user.
@@ -77,21 +90,61 @@ def remove_bookmark(username, recipe_id):
     if not username:
         return False
 
-    data = load_bookmarks()
-    
-    if username in data:
+    if storage.pakai_sqlite():
         try:
-            rid = int(recipe_id)
-            if rid in data[username]:
-                data[username].remove(rid)
-                save_bookmarks(data)
-                return True
+            return storage.storage.bookmark_hapus(username, int(recipe_id))
         except ValueError:
             return False
-            
-    return False
+        except sqlite3.Error as e:
+            print(f"Error menghapus bookmark: {e}")
+            return False
+
+    try:
+        rid = int(recipe_id)
+    except ValueError:
+        return False
+
+    def hapus(data):
+        ids = data.get(username, {})
+        if rid in ids:
+            del ids[rid]
+            return True
+        return False
+
+    return bookmark_store.perbarui(hapus)
 
 def get_user_bookmarks(username):
-    data = load_bookmarks()
+    if storage.pakai_sqlite():
+        try:
+            return storage.storage.bookmark_daftar(username)
+        except sqlite3.Error as e:
+            print(f"Error membaca bookmark: {e}")
+            return []
+
     # Kembalikan list kosong [] jika user tidak ditemukan
-    return data.get(username, [])
\ No newline at end of file
+    return list(bookmark_store.baca().get(username, ()))
+
+def is_bookmarked_many(username, recipe_ids):
+    """
+    Status bookmark banyak resep sekaligus (misal 30 kartu di grid):
+    {id: True/False}. ID yang tidak valid dilewati.
+    """
+    daftar_id = []
+    for rid in recipe_ids:
+        try:
+            daftar_id.append(int(rid))
+        except (TypeError, ValueError):
+            continue
+    if not username or not daftar_id:
+        return {rid: False for rid in daftar_id}
+
+    if storage.pakai_sqlite():
+        try:
+            ada = storage.storage.bookmark_ada_banyak(username, daftar_id)
+        except sqlite3.Error as e:
+            print(f"Error membaca bookmark: {e}")
+            ada = set()
+        return {rid: rid in ada for rid in daftar_id}
+
+    ids = bookmark_store.baca().get(username, {})
+    return {rid: rid in ids for rid in daftar_id}
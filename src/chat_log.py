@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from src import storage
+
+# --- PENYIMPANAN CHAT (APPEND-ONLY, SATU FILE PER USER) ---
+# Setiap pesan = satu baris JSON di data/ai_chats/<user>.jsonl. Menambah pesan
+# cukup append satu baris (tidak menyentuh data user lain), membaca riwayat
+# terbaru cukup membaca ekor file.
+# Dengan STORAGE_BACKEND=sqlite (default) pesan disimpan di tabel chats
+# data/app.db (src/storage.py); file di bawah ini hanya sumber migrasi.
+DATA_FOLDER = os.path.join("data")
+CHAT_DIR = os.path.join(DATA_FOLDER, "ai_chats")
+LEGACY_FILE = os.path.join(DATA_FOLDER, "ai_chats.json")
+MIGRATION_MARKER = os.path.join(CHAT_DIR, ".migrated")
+
+# Jumlah pesan yang dipertahankan per user (sama dengan batas lama)
+MAX_MESSAGES = int(os.environ.get("CHAT_MAX_MESSAGES", 100))
+# File dipadatkan ulang ke MAX_MESSAGES baris terakhir setelah mencapai batas ini
+COMPACT_AT = int(os.environ.get("CHAT_COMPACT_AT", MAX_MESSAGES * 2))
+# Ukuran blok saat membaca file dari belakang
+_BLOK = 8192
+
+_lock = threading.Lock()
+_jumlah_baris = {}  # path -> jumlah baris (diketahui setelah disentuh pertama kali)
+_migrasi_selesai = False
+
+
+def _path_user(username):
+    """Nama file aman untuk username apa pun (ditambah hash jika ada karakter aneh)."""
+    nama = str(username)
+    aman = re.sub(r"[^A-Za-z0-9_.-]", "_", nama).strip(".") or "_"
+    if aman != nama:
+        aman = f"{aman}-{hashlib.blake2b(nama.encode('utf-8'), digest_size=4).hexdigest()}"
+    return os.path.join(CHAT_DIR, f"{aman}.jsonl")
+
+
+def _tulis_baris(path, entri_list, mode):
+    data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entri_list)
+    with open(path, mode, encoding="utf-8") as f:
+        f.write(data)
+
+
+def _hitung_baris(path):
+    try:
+        with open(path, "rb") as f:
+            return sum(blok.count(b"\n") for blok in iter(lambda: f.read(65536), b""))
+    except OSError:
+        return 0
+
+
+def _baca_ekor(path, n):
+    """Membaca n baris terakhir dengan seek dari akhir file (tanpa membaca seluruh file)."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            posisi = f.tell()
+            data = b""
+            while posisi > 0 and data.count(b"\n") <= n:
+                baca = min(_BLOK, posisi)
+                posisi -= baca
+                f.seek(posisi)
+                data = f.read(baca) + data
+    except OSError:
+        return []
+    hasil = []
+    for baris in data.splitlines()[-n:] if n else []:
+        try:
+            hasil.append(json.loads(baris.decode("utf-8")))
+        except (ValueError, UnicodeDecodeError):
+            # Baris terpotong (misal proses mati saat menulis) dilewati
+            continue
+    return hasil
+
+
+def _padatkan(path):
+    """Tulis ulang file hanya dengan MAX_MESSAGES pesan terakhir (atomik)."""
+    entri = _baca_ekor(path, MAX_MESSAGES)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    _tulis_baris(tmp, entri, "w")
+    os.replace(tmp, path)
+    _jumlah_baris[path] = len(entri)
+
+
+def migrasi_dari_json():
+    """
+    Memindahkan isi data/ai_chats.json lama ke file per user (sekali saja).
+    File lama dibiarkan; penanda .migrated mencegah migrasi berulang.
+    """
+    global _migrasi_selesai
+    if _migrasi_selesai:
+        return
+    with _lock:
+        if _migrasi_selesai:
+            return
+        os.makedirs(CHAT_DIR, exist_ok=True)
+        if not os.path.exists(MIGRATION_MARKER) and os.path.exists(LEGACY_FILE):
+            try:
+                with open(LEGACY_FILE, "r", encoding="utf-8") as f:
+                    lama = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error membaca {LEGACY_FILE} untuk migrasi: {e}")
+                lama = {}
+            for username, pesan in lama.items():
+                path = _path_user(username)
+                if pesan and not os.path.exists(path):
+                    _tulis_baris(path, pesan[-MAX_MESSAGES:], "w")
+        if not os.path.exists(MIGRATION_MARKER):
+            with open(MIGRATION_MARKER, "w", encoding="utf-8") as f:
+                f.write("ai_chats.json -> ai_chats/*.jsonl\n")
+        _migrasi_selesai = True
+
+
+def append(username, entri):
+    """Menambahkan satu pesan ke log user. O(1), kecuali saat pemadatan berkala."""
+    if storage.pakai_sqlite():
+        storage.storage.chat_tambah(username, entri, MAX_MESSAGES)
+        return
+    migrasi_dari_json()
+    path = _path_user(username)
+    with _lock:
+        if path not in _jumlah_baris:
+            _jumlah_baris[path] = _hitung_baris(path)
+        _tulis_baris(path, [entri], "a")
+        _jumlah_baris[path] += 1
+        if _jumlah_baris[path] >= COMPACT_AT:
+            _padatkan(path)
+
+
+def tail(username, n=MAX_MESSAGES):
+    """n pesan terakhir milik user, urut dari yang terlama."""
+    if storage.pakai_sqlite():
+        try:
+            return storage.storage.chat_ekor(username, min(n, MAX_MESSAGES))
+        except sqlite3.Error as e:
+            print(f"Error membaca chat: {e}")
+            return []
+    migrasi_dari_json()
+    return _baca_ekor(_path_user(username), min(n, MAX_MESSAGES))
+
+
+def clear(username):
+    """Hapus seluruh log user. True jika sebelumnya ada pesan."""
+    if storage.pakai_sqlite():
+        try:
+            return storage.storage.chat_hapus(username)
+        except sqlite3.Error as e:
+            print(f"Error menghapus chat: {e}")
+            return False
+    migrasi_dari_json()
+    path = _path_user(username)
+    with _lock:
+        ada = os.path.exists(path) and os.path.getsize(path) > 0
+        if ada:
+            os.remove(path)
+        _jumlah_baris[path] = 0
+        return ada
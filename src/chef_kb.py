@@ -0,0 +1,256 @@
+import json
+import math
+import os
+import threading
+from collections import Counter, defaultdict, deque
+
+from src.semantic_cache import normalisasi
+
+# --- KNOWLEDGE BASE CHEF AI (LOKAL, TANPA LLM) ---
+DATA_FOLDER = os.path.join("data")
+# Tanya-jawab kurasi (ikut repo)
+KB_FILE = os.path.join(DATA_FOLDER, "chef_kb.json")
+# Jawaban Gemini yang dikumpulkan otomatis (append-only, tidak ikut repo)
+HARVEST_FILE = os.path.join(DATA_FOLDER, "chef_kb_harvest.jsonl")
+# Maksimal entri harvest di index (saat startup maupun saat berjalan); yang terlama dibuang
+HARVEST_MAX = int(os.environ.get("CHEF_KB_HARVEST_MAX", 2000))
+
+# Ambang "yakin": porsi bobot IDF kata pertanyaan user yang ditemukan di
+# pertanyaan KB. Di bawah ini pertanyaan diteruskan ke Gemini.
+KB_MIN_COVERAGE = float(os.environ.get("CHEF_KB_MIN_COVERAGE", 0.75))
+# Porsi minimal pertanyaan KB yang harus tercakup (lebih longgar, karena
+# variasi pertanyaan KB boleh memuat kata keterangan tambahan)
+KB_MIN_DOC_COVERAGE = float(os.environ.get("CHEF_KB_MIN_DOC_COVERAGE", 0.5))
+# Ambang yang lebih longgar untuk jawaban fallback (Gemini tidak tersedia)
+KB_FALLBACK_COVERAGE = float(os.environ.get("CHEF_KB_FALLBACK_COVERAGE", 0.4))
+
+# Parameter BM25 standar
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Imbuhan umum bahasa Indonesia: "pengganti" ~ "ganti", "kalorinya" ~ "kalori"
+_AWALAN = ('meng', 'peng', 'mem', 'pem', 'men', 'pen', 'ber', 'ter', 'me', 'pe', 'di')
+_AKHIRAN = ('nya', 'kan')
+# Kata yang tidak membedakan satu FAQ dengan FAQ lain (dicek setelah imbuhan dipotong)
+_KATA_UMUM = {'kenapa', 'mengapa', 'agar', 'supaya', 'biar', 'sama', 'bikin', 'buat', 'tidak',
+              'tanpa', 'jadi', 'pakai', 'satu', 'sudah', 'masih', 'tetap', 'yang'}
+
+
+def _akar(kata):
+    """Pemotongan imbuhan sederhana (bukan stemmer lengkap), sisa minimal 4 huruf."""
+    for akhiran in _AKHIRAN:
+        if kata.endswith(akhiran) and len(kata) - len(akhiran) >= 4:
+            kata = kata[:-len(akhiran)]
+            break
+    for awalan in _AWALAN:
+        if kata.startswith(awalan) and len(kata) - len(awalan) >= 4:
+            return kata[len(awalan):]
+    return kata
+
+
+def tokenisasi(teks):
+    token = [_akar(k) for k in normalisasi(teks)]
+    return [t for t in token if t not in _KATA_UMUM]
+
+
+class ChefKB:
+    """
+    Mesin retrieval lokal untuk pertanyaan masak yang sering muncul.
+
+    Setiap variasi pertanyaan di KB menjadi satu dokumen di inverted index
+    (token -> {doc_id: frekuensi}). Pertanyaan user diskor dengan BM25;
+    dokumen terbaik dianggap cocok jika bobot IDF kata yang sama menutup
+    cukup besar porsi pertanyaan user *dan* pertanyaan KB (dua arah), supaya
+    "kalori telur" tidak dijawab dengan "pengganti telur".
+
+    Entri harvest dibatasi `harvest_max`: jika lewat, entri harvest terlama
+    dikeluarkan dari index (slotnya dikosongkan, lalu index dipadatkan ulang
+    setelah slot kosong lebih banyak dari yang terisi).
+    """
+
+    def __init__(self, kb_file=KB_FILE, harvest_file=HARVEST_FILE, harvest_max=HARVEST_MAX):
+        self.kb_file = kb_file
+        self.harvest_file = harvest_file
+        self.harvest_max = harvest_max
+        self._lock = threading.Lock()
+        self._entri = []                 # {"answer", "source", "docs"} atau None jika sudah dibuang
+        self._dok = []                   # (entri_idx, Counter token, panjang) atau None
+        self._index = defaultdict(dict)  # token -> {doc_id: tf}
+        self._jumlah_dok = 0             # dokumen yang masih hidup (untuk IDF & rata-rata panjang)
+        self._total_panjang = 0
+        self._harvest_keys = set()
+        self._harvest_urut = deque()     # (kunci, entri_idx) entri harvest, dari yang terlama
+        self._stats = {"lookups": 0, "hits": 0, "curated_hits": 0, "harvested_hits": 0, "harvested": 0,
+                       "harvest_evicted": 0}
+        self._muat()
+
+    # --- PEMBANGUNAN INDEX ---
+    def _tambah_entri(self, pertanyaan_list, jawaban, sumber):
+        idx = len(self._entri)
+        docs = []
+        for q in pertanyaan_list:
+            token = tokenisasi(q)
+            if not token:
+                continue
+            doc_id = len(self._dok)
+            tf = Counter(token)
+            self._dok.append((idx, tf, len(token)))
+            self._jumlah_dok += 1
+            self._total_panjang += len(token)
+            for t, n in tf.items():
+                self._index[t][doc_id] = n
+            docs.append(doc_id)
+        self._entri.append({"answer": jawaban, "source": sumber, "docs": docs})
+        return idx
+
+    def _hapus_entri(self, idx):
+        """Mengeluarkan satu entri beserta dokumennya dari index."""
+        entri, self._entri[idx] = self._entri[idx], None
+        for doc_id in entri["docs"]:
+            _, tf, panjang = self._dok[doc_id]
+            self._dok[doc_id] = None
+            self._jumlah_dok -= 1
+            self._total_panjang -= panjang
+            for t in tf:
+                posting = self._index[t]
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._index[t]
+
+    def _padatkan(self):
+        """Menyusun ulang list entri/dokumen tanpa slot kosong (token tidak dihitung ulang)."""
+        entri_lama, dok_lama = self._entri, self._dok
+        self._entri, self._dok, self._index = [], [], defaultdict(dict)
+        peta = {}
+        for idx_lama, entri in enumerate(entri_lama):
+            if entri is None:
+                continue
+            idx = peta[idx_lama] = len(self._entri)
+            docs = []
+            for doc_lama in entri["docs"]:
+                _, tf, panjang = dok_lama[doc_lama]
+                doc_id = len(self._dok)
+                self._dok.append((idx, tf, panjang))
+                for t, n in tf.items():
+                    self._index[t][doc_id] = n
+                docs.append(doc_id)
+            self._entri.append(dict(entri, docs=docs))
+        self._harvest_urut = deque((kunci, peta[idx]) for kunci, idx in self._harvest_urut)
+
+    def _tambah_harvest(self, kunci, pertanyaan, jawaban):
+        """Menambah entri harvest; entri harvest terlama dibuang jika lewat `harvest_max`."""
+        self._harvest_keys.add(kunci)
+        self._harvest_urut.append((kunci, self._tambah_entri([pertanyaan], jawaban, "harvested")))
+        while len(self._harvest_urut) > max(0, self.harvest_max):
+            kunci_lama, idx = self._harvest_urut.popleft()
+            self._harvest_keys.discard(kunci_lama)
+            self._hapus_entri(idx)
+            self._stats["harvest_evicted"] += 1
+        if len(self._dok) > 2 * self._jumlah_dok + 64:
+            self._padatkan()
+
+    def _muat(self):
+        try:
+            with open(self.kb_file, 'r', encoding='utf-8') as f:
+                kurasi = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error membaca knowledge base {self.kb_file}: {e}")
+            kurasi = []
+        for item in kurasi:
+            self._tambah_entri(item.get("questions", []), item.get("answer", ""), "curated")
+
+        try:
+            with open(self.harvest_file, 'r', encoding='utf-8') as f:
+                baris = f.readlines()[-self.harvest_max:] if self.harvest_max > 0 else []
+        except OSError:
+            baris = []
+        for b in baris:
+            try:
+                item = json.loads(b)
+            except ValueError:
+                continue
+            kunci = " ".join(tokenisasi(item.get("question", "")))
+            if kunci and kunci not in self._harvest_keys:
+                self._tambah_harvest(kunci, item["question"], item.get("answer", ""))
+
+    # --- PENCARIAN ---
+    def _idf(self, token):
+        n = len(self._index.get(token, ()))
+        return math.log(1 + (self._jumlah_dok - n + 0.5) / (n + 0.5))
+
+    def cari(self, pertanyaan, min_coverage=KB_MIN_COVERAGE):
+        """
+        Mengembalikan {"answer", "source", "score", "coverage"} untuk entri KB
+        terbaik, atau None jika tidak ada yang cukup yakin.
+        """
+        token_q = set(tokenisasi(pertanyaan))
+        if not token_q:
+            return None
+        with self._lock:
+            if not self._jumlah_dok:
+                return None
+            rata_panjang = self._total_panjang / self._jumlah_dok
+            idf = {t: self._idf(t) for t in token_q}
+            skor = defaultdict(float)
+            for t in token_q:
+                for doc_id, tf in self._index.get(t, {}).items():
+                    panjang = self._dok[doc_id][2]
+                    skor[doc_id] += idf[t] * tf * (BM25_K1 + 1) / (
+                        tf + BM25_K1 * (1 - BM25_B + BM25_B * panjang / rata_panjang))
+
+            terbaik = None
+            for doc_id, s in sorted(skor.items(), key=lambda x: x[1], reverse=True)[:10]:
+                entri_idx, tf_doc, _ = self._dok[doc_id]
+                sama = token_q & tf_doc.keys()
+                bobot_q = sum(idf.values())
+                bobot_doc = sum(self._idf(t) for t in tf_doc)
+                cakupan = sum(idf[t] for t in sama) / bobot_q if bobot_q else 0.0
+                cakupan_doc = sum(self._idf(t) for t in sama) / bobot_doc if bobot_doc else 0.0
+                if (cakupan >= min_coverage and cakupan_doc >= KB_MIN_DOC_COVERAGE
+                        and (terbaik is None or cakupan > terbaik["coverage"])):
+                    entri = self._entri[entri_idx]
+                    terbaik = {"answer": entri["answer"], "source": entri["source"],
+                               "score": round(s, 3), "coverage": round(cakupan, 3)}
+            return terbaik
+
+    def jawab(self, pertanyaan):
+        """Jalur cepat sebelum LLM: jawaban KB jika cocok dengan yakin, selain itu None."""
+        hasil = self.cari(pertanyaan)
+        with self._lock:
+            self._stats["lookups"] += 1
+            if hasil:
+                self._stats["hits"] += 1
+                self._stats[f"{hasil['source']}_hits"] += 1
+        return hasil["answer"] if hasil else None
+
+    # --- HARVEST ---
+    def harvest(self, pertanyaan, jawaban):
+        """Menyimpan jawaban Gemini supaya pertanyaan yang sama bisa dijawab lokal."""
+        kunci = " ".join(tokenisasi(pertanyaan))
+        if not kunci or not jawaban:
+            return
+        with self._lock:
+            if kunci in self._harvest_keys:
+                return
+            self._tambah_harvest(kunci, pertanyaan, jawaban)
+            self._stats["harvested"] += 1
+            try:
+                if not os.path.exists(DATA_FOLDER):
+                    os.makedirs(DATA_FOLDER)
+                with open(self.harvest_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({"question": pertanyaan, "answer": jawaban}, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"Error menyimpan harvest knowledge base: {e}")
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data["entries"] = len(self._entri) - self._entri.count(None)
+            data["documents"] = self._jumlah_dok
+            data["harvest_entries"] = len(self._harvest_urut)
+        data["hit_rate"] = round(data["hits"] / data["lookups"], 3) if data["lookups"] else 0.0
+        return data
+
+
+# Satu knowledge base untuk seluruh proses
+chef_kb = ChefKB()
@@ -1,69 +1,182 @@
-import pandas as pd # Library Pandas: Untuk membaca dan mengedit file Excel
-import os           # Library OS: Untuk mengatur lokasi file di komputer
+import hashlib       # Hash password (scrypt / PBKDF2, bawaan Python)
+import hmac          # Perbandingan hash yang aman dari timing attack
+import os            # Library OS: Untuk mengatur lokasi file di komputer
+import secrets       # Salt acak per user
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 
-# Menentukan lokasi file database (users.xlsx) di dalam folder data
+from src import storage
+
+# Optional import: openpyxl hanya dibutuhkan untuk mengimpor users.xlsx lama
+try:
+    from openpyxl import load_workbook
+    HAS_OPENPYXL = True
+except Exception:
+    load_workbook = None
+    HAS_OPENPYXL = False
+
+# Akun user disimpan di tabel users (data/app.db, src/storage.py).
+# File Excel lama diimpor sekali lewat `python migrate_users.py`, lalu dihapus.
 DB_PATH = os.path.join("data", "users.xlsx")
 
-def load_user_db():
+# Parameter scrypt (~16 MiB memori, puluhan ms per hash): lambat untuk brute force
+SCRYPT_N = int(os.environ.get("PASSWORD_SCRYPT_N", 2 ** 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+# Dipakai jika OpenSSL tidak menyediakan scrypt
+PBKDF2_ITERASI = int(os.environ.get("PASSWORD_PBKDF2_ITERATIONS", 600_000))
+# Jumlah baris per transaksi saat impor
+IMPOR_BATCH = 1000
+# Thread untuk hashing saat impor
+IMPOR_WORKERS = int(os.environ.get("PASSWORD_IMPORT_WORKERS", os.cpu_count() or 4))
+
+
+def hash_password(password):
+    """Hash password dengan salt acak. Format: 'scrypt$n$r$p$salt$hash' atau 'pbkdf2$iterasi$salt$hash'."""
+    salt = secrets.token_bytes(16)
+    data = str(password).encode("utf-8")
+    try:
+        hasil = hashlib.scrypt(data, salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=32)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${hasil.hex()}"
+    except (AttributeError, ValueError):
+        hasil = hashlib.pbkdf2_hmac("sha256", data, salt, PBKDF2_ITERASI)
+        return f"pbkdf2${PBKDF2_ITERASI}${salt.hex()}${hasil.hex()}"
+
+
+def cek_password(password, password_hash):
+    """True jika password cocok dengan hash tersimpan (parameter dibaca dari hash itu sendiri)."""
+    data = str(password).encode("utf-8")
+    try:
+        bagian = password_hash.split("$")
+        if bagian[0] == "scrypt":
+            n, r, p = int(bagian[1]), int(bagian[2]), int(bagian[3])
+            hasil = hashlib.scrypt(data, salt=bytes.fromhex(bagian[4]), n=n, r=r, p=p, dklen=32)
+            return hmac.compare_digest(hasil.hex(), bagian[5])
+        if bagian[0] == "pbkdf2":
+            hasil = hashlib.pbkdf2_hmac("sha256", data, bytes.fromhex(bagian[2]), int(bagian[1]))
+            return hmac.compare_digest(hasil.hex(), bagian[3])
+    except (AttributeError, IndexError, ValueError) as e:
+        print(f"Error membaca hash password: {e}")
+    return False
+
+
+# Hash pembanding untuk username yang tidak ada, supaya waktu login tidak
+# membocorkan apakah sebuah username terdaftar
+_HASH_DUMMY = None
+
+
+def _hash_dummy():
+    global _HASH_DUMMY
+    if _HASH_DUMMY is None:
+        _HASH_DUMMY = hash_password(secrets.token_hex(8))
+    return _HASH_DUMMY
+
+
+def impor_dari_xlsx(path=DB_PATH, hapus_asli=True, workers=IMPOR_WORKERS):
     """
-    Fungsi untuk Membaca Database Pengguna.
-    Mencoba membuka file Excel. Jika file tidak ada atau rusak,
-    dia akan membuat tabel kosong baru agar aplikasi tidak error.
+    Mengimpor users.xlsx lama ke tabel users (langkah offline, lihat
+    migrate_users.py -- tidak pernah dijalankan dari login/registrasi,
+    karena hashing semua baris bisa makan waktu lama).
+
+    File dibaca streaming (openpyxl read_only), password di-hash paralel
+    (hashlib.scrypt melepas GIL), lalu dimasukkan per batch. Username yang
+    sudah ada tidak ditimpa. Jika berhasil, file Excel (berisi password
+    plaintext) dihapus kecuali `hapus_asli=False`.
+    Mengembalikan jumlah user yang diimpor, atau None jika gagal.
     """
-    if os.path.exists(DB_PATH):
+    if not os.path.exists(path):
+        print(f"{path} tidak ditemukan, tidak ada yang diimpor.")
+        return 0
+    if not HAS_OPENPYXL:
+        print(f"openpyxl tidak tersedia, {path} belum bisa diimpor.")
+        return None
+
+    def _hash_batch(pool, batch):
+        hashes = pool.map(hash_password, [pw for _, pw in batch])
+        return storage.storage.user_tambah_banyak(zip([u for u, _ in batch], hashes))
+
+    jumlah = 0
+    try:
+        wb = load_workbook(path, read_only=True)
         try:
-            # Buka file Excel dengan engine openpyxl
-            return pd.read_excel(DB_PATH, engine='openpyxl')
-        except Exception as e:
-            print(f"File rusak/kosong, buat baru. Error: {e}")
-            return pd.DataFrame(columns=["username", "password"])
+            baris = wb.active.iter_rows(values_only=True)
+            header = [str(h).strip().lower() if h is not None else "" for h in next(baris, ())]
+            if "username" not in header or "password" not in header:
+                print(f"Kolom username/password tidak ditemukan di {path}.")
+                return None
+            i_user, i_pass = header.index("username"), header.index("password")
+            batch = []
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash") as pool:
+                for row in baris:
+                    if row is None or len(row) <= max(i_user, i_pass) or row[i_user] is None:
+                        continue
+                    # Login lama membandingkan setelah strip(), jadi yang di-hash juga versi strip
+                    username = str(row[i_user]).strip()
+                    password = "" if row[i_pass] is None else str(row[i_pass]).strip()
+                    if username:
+                        batch.append((username, password))
+                    if len(batch) >= IMPOR_BATCH:
+                        jumlah += _hash_batch(pool, batch)
+                        batch = []
+                        print(f"  {jumlah} user diimpor...")
+                if batch:
+                    jumlah += _hash_batch(pool, batch)
+        finally:
+            wb.close()
+    except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+        print(f"Error mengimpor {path}: {e}")
+        return None
+    storage.storage.meta_set("migrated_users_xlsx", jumlah)
+    if hapus_asli:
+        os.remove(path)
+        print(f"{path} (password plaintext) dihapus setelah impor.")
     else:
-        # Jika file belum ada, buat tabel kosong dengan kolom username & password
-        return pd.DataFrame(columns=["username", "password"])
+        print(f"PERINGATAN: {path} masih berisi password plaintext, hapus file ini.")
+    return jumlah
+
+
+_xlsx_dicek = False
+
+
+def _peringatan_xlsx():
+    """Login tidak mengimpor apa pun; cukup ingatkan sekali jika users.xlsx belum diimpor."""
+    global _xlsx_dicek
+    if not _xlsx_dicek:
+        _xlsx_dicek = True
+        if os.path.exists(DB_PATH):
+            print(f"PERINGATAN: {DB_PATH} belum diimpor / belum dihapus. "
+                  f"Jalankan: python migrate_users.py")
 
-def save_user_db(df):
-    """
-    Fungsi untuk Menyimpan Database.
-    Menulis data (DataFrame) kembali ke file Excel users.xlsx.
-    """
-    df.to_excel(DB_PATH, index=False, engine='openpyxl')
 
 def authenticate_user(username, password):
     """
     Fungsi Login.
-    Mengecek apakah username ada di Excel dan passwordnya cocok.
+    Lookup username lewat primary key lalu cocokkan hash password.
     """
-    df_users = load_user_db() # 1. Baca data terbaru
-    
-    # 2. Cari baris yang username-nya sama dengan input (dengan strip whitespace)
-    user = df_users[df_users["username"].astype(str).str.strip() == str(username).strip()]
-    
-    if not user.empty:
-        # 3. Jika ketemu, cek passwordnya (dengan strip whitespace)
-        stored_password = str(user.iloc[0]["password"]).strip()
-        input_password = str(password).strip()
-        if stored_password == input_password:
-            return True # Login Sukses
-    
-    return False # Login Gagal
+    _peringatan_xlsx()
+    try:
+        password_hash = storage.storage.user_ambil_hash(str(username).strip())
+    except sqlite3.Error as e:
+        print(f"Error membaca data user: {e}")
+        return False
+    if password_hash is None:
+        cek_password(password, _hash_dummy())
+        return False
+    return cek_password(str(password).strip(), password_hash)
+
 
 def register_user(username, password):
     """
     Fungsi Pendaftaran.
-    Menambah pengguna baru ke baris paling bawah Excel.
+    Insert atomik ke tabel users; dua pendaftaran bersamaan dengan username
+    yang sama tidak bisa saling menimpa.
     """
-    df_users = load_user_db() # 1. Baca data lama
-    
-    # 2. Cek apakah username sudah dipakai
-    if not df_users[df_users["username"] == username].empty:
-        return "Username sudah terdaftar."
-    
-    # 3. Buat baris data baru
-    new_user = pd.DataFrame([{"username": username, "password": password}])
-    
-    # 4. Gabungkan data lama + data baru
-    df_updated = pd.concat([df_users, new_user], ignore_index=True)
-    
-    # 5. Simpan ke file Excel
-    save_user_db(df_updated)
-    return "Registrasi berhasil!"
\ No newline at end of file
+    _peringatan_xlsx()
+    username = str(username).strip()
+    try:
+        if not storage.storage.user_tambah(username, hash_password(str(password).strip())):
+            return "Username sudah terdaftar."
+    except sqlite3.Error as e:
+        print(f"Error menyimpan data user: {e}")
+        return "Registrasi gagal, coba lagi."
+    return "Registrasi berhasil!"
@@ -0,0 +1,522 @@
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from src.llm_metrics import ambil_usage, llm_metrics
+
+# Cooldown (detik) setelah model gagal; naik dua kali lipat tiap gagal beruntun
+COOLDOWN_DASAR = 30
+COOLDOWN_MAKS = 15 * 60
+# Kuota/rate limit habis: istirahatkan model lebih lama
+COOLDOWN_KUOTA = 5 * 60
+# Model tidak ada / tidak didukung: praktis dimatikan sampai proses restart
+COOLDOWN_TIDAK_ADA = 24 * 3600
+
+# --- HEDGING & DEADLINE ---
+# Batas total satu panggilan (detik); lewat dari ini pemanggil memakai jawaban fallback
+LLM_DEADLINE = float(os.environ.get("LLM_DEADLINE", 20))
+# Jika model utama belum menjawab setelah persentil latensi ini, kirim cadangan ke model berikutnya
+HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", 0.9))
+# Jeda hedging saat sampel latensi belum cukup, dan batas bawahnya
+HEDGE_DEFAULT_DELAY = float(os.environ.get("LLM_HEDGE_DEFAULT_DELAY", 4))
+HEDGE_MIN_DELAY = float(os.environ.get("LLM_HEDGE_MIN_DELAY", 1))
+# Maksimal panggilan paralel untuk satu pertanyaan (utama + cadangan)
+HEDGE_MAX_PARALLEL = int(os.environ.get("LLM_HEDGE_MAX_PARALLEL", 2))
+# Jumlah sampel latensi per model yang disimpan untuk menghitung persentil
+LATENCY_WINDOW = 50
+MIN_SAMPLES = 5
+# Batas waktu list_models saat discovery (detik); lewat dari ini semua model preferensi dicoba
+DISCOVER_TIMEOUT = float(os.environ.get("GEMINI_DISCOVER_TIMEOUT", 5))
+
+
+# --- DAFTAR MODEL (dipakai juga oleh run_list_models.py) ---
+def list_models(genai, api_key):
+    """
+    Mengambil daftar model dari library google-generativeai (berbagai versi).
+    Mengembalikan list of (nama_model, metode_yang_didukung_atau_None).
+    """
+    if hasattr(genai, 'configure'):
+        genai.configure(api_key=api_key)
+        models = genai.list_models()
+    else:
+        try:
+            from google.generativeai import Client
+            client = Client(api_key=api_key)
+            models = client.list_models()
+        except Exception:
+            models = genai.list_models()
+
+    if models is None:
+        return []
+
+    # models bisa berupa dict dengan key 'models' atau iterable/generator
+    if isinstance(models, dict) and 'models' in models:
+        items = models['models']
+    else:
+        items = models
+    try:
+        items_list = list(items)
+    except TypeError:
+        items_list = [items]
+
+    hasil = []
+    for m in items_list:
+        mid = None
+        methods = None
+        try:
+            if isinstance(m, dict):
+                mid = m.get('name') or m.get('id') or m.get('model')
+                methods = m.get('metadata', {}).get('supportedMethods') or m.get('capabilities') or m.get('supported_methods')
+            else:
+                mid = getattr(m, 'name', None) or getattr(m, 'id', None) or str(m)
+                methods = (getattr(m, 'supported_generation_methods', None) or getattr(m, 'supportedMethods', None)
+                           or getattr(m, 'capabilities', None) or getattr(m, 'supported_methods', None))
+        except Exception:
+            mid = str(m)
+        hasil.append((mid, list(methods) if methods else None))
+    return hasil
+
+
+def ambil_teks(resp):
+    """Mengambil teks jawaban dari berbagai bentuk respons SDK."""
+    if resp is None:
+        return None
+    try:
+        if hasattr(resp, 'text') and resp.text:
+            return resp.text
+    except Exception:
+        # resp.text melempar error jika kandidat diblokir safety filter
+        pass
+    if isinstance(resp, dict):
+        cand = resp.get('candidates')
+        if cand and isinstance(cand, list):
+            c0 = cand[0]
+            return c0.get('content') or c0.get('text') or str(c0)
+        return resp.get('output') or None
+    if hasattr(resp, 'candidates') and resp.candidates:
+        cand = resp.candidates[0]
+        return getattr(cand, 'content', None) or getattr(cand, 'text', None) or str(cand)
+    return None
+
+
+def jenis_error(error):
+    """
+    Mengelompokkan error SDK: 'tidak_ada', 'kuota', atau 'lain'. Dipakai untuk
+    lama cooldown router dan sebagai alasan gagal di llm_metrics.
+    """
+    teks = f"{type(error).__name__} {error}".lower()
+    if 'notfound' in teks or '404' in teks or 'not found' in teks or 'not supported' in teks:
+        return 'tidak_ada'
+    if 'resourceexhausted' in teks or '429' in teks or 'quota' in teks or 'rate limit' in teks:
+        return 'kuota'
+    return 'lain'
+
+
+class ModelRouter:
+    """
+    Mengarahkan setiap panggilan Gemini langsung ke model sehat terbaik.
+
+    - `discover()` (sekali, di thread latar): configure API key, membaca daftar
+      model (dengan batas waktu), lalu memilih strategi pemanggilan yang didukung tiap model
+      (GenerativeModel.generate_content, generate_text, atau Client.generate).
+    - Instance GenerativeModel / Client dibuat sekali lalu dipakai ulang.
+    - Setiap model punya catatan kesehatan; model yang gagal masuk cooldown
+      (makin lama jika gagal beruntun) dan dilewati sampai cooldown selesai.
+    """
+
+    def __init__(self, genai, api_key, preferred_models):
+        self.genai = genai
+        self.api_key = api_key
+        self.preferred_models = list(preferred_models)
+        self._lock = threading.Lock()
+        # Terpisah dari _lock: discovery (I/O jaringan) tidak boleh menahan lock router
+        self._discover_lock = threading.Lock()
+        self._discover_dimulai = False
+        self._siap = False
+        self._strategi = {}   # nama_model -> 'generative_model' | 'generate_text' | 'client'
+        self._instance = {}   # nama_model -> objek GenerativeModel
+        self._client = None
+        self._kesehatan = {m: self._kesehatan_baru() for m in self.preferred_models}
+        # Alasan `generate` terakhir mengembalikan None, per thread pemanggil
+        self._lokal = threading.local()
+        self._latensi = {m: deque(maxlen=LATENCY_WINDOW) for m in self.preferred_models}
+        # Thread pekerja untuk panggilan SDK (blocking); panggilan yang kalah
+        # hedging dibiarkan selesai di sini dan tetap dicatat kesehatannya.
+        # Setiap panggilan membawa timeout = sisa deadline (`_opsi_generate`),
+        # jadi model yang macet tidak menahan thread lebih lama dari deadline
+        self._pool = ThreadPoolExecutor(max_workers=max(2, HEDGE_MAX_PARALLEL * 4),
+                                        thread_name_prefix="gemini-call")
+
+    @staticmethod
+    def _kesehatan_baru():
+        return {"successes": 0, "failures": 0, "consecutive_failures": 0, "timeouts": 0,
+                "cooldown_until": 0.0, "last_error": None, "last_latency": None}
+
+    # --- DISCOVERY ---
+    def discover(self):
+        """
+        Menentukan model & strategi yang bisa dipakai. Aman dipanggil berkali-kali
+        dan dari banyak thread (hanya satu yang benar-benar menjalankan discovery).
+
+        list_models (panggilan jaringan) dibatasi DISCOVER_TIMEOUT dan tidak
+        dijalankan di bawah `self._lock`, jadi status()/generate() tidak ikut
+        tertahan. Jika gagal / lewat batas, semua model preferensi dicoba.
+        """
+        with self._discover_lock:
+            if self._siap:
+                return
+            genai = self.genai
+            try:
+                if hasattr(genai, 'configure'):
+                    genai.configure(api_key=self.api_key)
+            except Exception:
+                # configure mungkin tidak tersedia pada beberapa versi, lanjutkan
+                pass
+
+            tersedia = None
+            try:
+                # Daftar kosong dianggap "tidak diketahui", bukan "tidak ada model"
+                tersedia = dict(self._pool.submit(list_models, genai, self.api_key)
+                                .result(timeout=DISCOVER_TIMEOUT)) or None
+            except FuturesTimeout:
+                print(f"Warning: Daftar model Gemini tidak didapat dalam {DISCOVER_TIMEOUT} detik; "
+                      f"semua model preferensi dicoba")
+            except Exception as e:
+                print(f"Warning: Gagal membaca daftar model Gemini ({e}); semua model preferensi dicoba")
+
+            with self._lock:
+                for nama in self.preferred_models:
+                    metode = None
+                    if tersedia is not None:
+                        if nama not in tersedia:
+                            self._set_cooldown(nama, COOLDOWN_TIDAK_ADA, "model tidak ada di list_models")
+                            continue
+                        metode = tersedia[nama]
+                    self._strategi[nama] = self._pilih_strategi(metode)
+                self._siap = True
+
+    def mulai_discover(self):
+        """Menjalankan discovery di thread latar (sekali), tanpa menunggu hasilnya."""
+        with self._lock:
+            if self._siap or self._discover_dimulai:
+                return
+            self._discover_dimulai = True
+        threading.Thread(target=self.discover, name="gemini-discover", daemon=True).start()
+
+    def _strategi_model(self, nama):
+        """Strategi hasil discovery; sebelum discovery selesai pakai tebakan dari library."""
+        return self._strategi.get(nama) or self._pilih_strategi(None)
+
+    def _pilih_strategi(self, metode):
+        genai = self.genai
+        metode = [m.lower() for m in (metode or [])]
+        if hasattr(genai, 'GenerativeModel') and (not metode or 'generatecontent' in metode):
+            return 'generative_model'
+        if hasattr(genai, 'generate_text') and (not metode or 'generatetext' in metode):
+            return 'generate_text'
+        return 'client'
+
+    # --- KESEHATAN ---
+    def _set_cooldown(self, nama, durasi, alasan):
+        k = self._kesehatan.setdefault(nama, self._kesehatan_baru())
+        k["cooldown_until"] = time.time() + durasi
+        k["last_error"] = alasan
+
+    def model_sehat(self):
+        """
+        Model yang tidak sedang cooldown, urut sesuai preferensi. Tidak
+        menunggu discovery: selama belum selesai, semua model preferensi dipakai.
+        """
+        self.mulai_discover()
+        sekarang = time.time()
+        with self._lock:
+            return [m for m in self.preferred_models
+                    if (not self._siap or m in self._strategi)
+                    and self._kesehatan[m]["cooldown_until"] <= sekarang]
+
+    def catat_sukses(self, nama, latency):
+        with self._lock:
+            k = self._kesehatan[nama]
+            k["successes"] += 1
+            k["consecutive_failures"] = 0
+            k["cooldown_until"] = 0.0
+            k["last_latency"] = round(latency, 3)
+            self._latensi.setdefault(nama, deque(maxlen=LATENCY_WINDOW)).append(latency)
+
+    def catat_timeout(self, nama):
+        """Deadline habis: dicatat saja, tanpa cooldown (model lambat belum tentu rusak)."""
+        with self._lock:
+            self._kesehatan[nama]["timeouts"] += 1
+
+    def jeda_hedge(self, nama):
+        """Berapa lama menunggu model `nama` sebelum mengirim permintaan cadangan."""
+        with self._lock:
+            sampel = sorted(self._latensi.get(nama, ()))
+        if len(sampel) < MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        idx = min(len(sampel) - 1, int(HEDGE_PERCENTILE * len(sampel)))
+        return max(HEDGE_MIN_DELAY, sampel[idx])
+
+    def catat_gagal(self, nama, error):
+        jenis = jenis_error(error)
+        with self._lock:
+            k = self._kesehatan[nama]
+            k["failures"] += 1
+            k["consecutive_failures"] += 1
+            if jenis == 'tidak_ada':
+                durasi = COOLDOWN_TIDAK_ADA
+            elif jenis == 'kuota':
+                durasi = COOLDOWN_KUOTA
+            else:
+                durasi = min(COOLDOWN_MAKS, COOLDOWN_DASAR * 2 ** (k["consecutive_failures"] - 1))
+            self._set_cooldown(nama, durasi, f"{type(error).__name__}: {error}"[:200])
+
+    # --- PEMANGGILAN ---
+    def _model(self, nama):
+        with self._lock:
+            if nama not in self._instance:
+                self._instance[nama] = self.genai.GenerativeModel(nama)
+            return self._instance[nama]
+
+    @staticmethod
+    def _opsi_generate(max_output_tokens, temperature, batas):
+        """
+        Argumen generate_content: batas token jawaban, dan timeout request =
+        sisa deadline pemanggil, supaya panggilan yang kalah hedging / lewat
+        deadline tidak menahan thread pool lebih lama dari itu.
+        """
+        opsi = {"generation_config": {"max_output_tokens": max_output_tokens, "temperature": temperature}}
+        if batas != float('inf'):
+            opsi["request_options"] = {"timeout": max(1.0, batas - time.monotonic())}
+        return opsi
+
+    def _panggil(self, nama, prompt, max_output_tokens, temperature, batas=float('inf')):
+        """Satu panggilan ke satu model dengan strategi yang sudah dipilih. Hasil: (teks, usage)."""
+        strategi = self._strategi_model(nama)
+        if strategi == 'generative_model':
+            resp = self._model(nama).generate_content(
+                prompt, **self._opsi_generate(max_output_tokens, temperature, batas))
+        elif strategi == 'generate_text':
+            resp = self.genai.generate_text(model=nama, prompt=prompt, max_output_tokens=max_output_tokens,
+                                            temperature=temperature)
+        else:
+            with self._lock:
+                if self._client is None:
+                    from google.generativeai import Client
+                    self._client = Client(api_key=self.api_key)
+                client = self._client
+            resp = client.generate(model=nama, prompt=prompt, max_output_tokens=max_output_tokens)
+        return ambil_teks(resp), ambil_usage(resp)
+
+    def _panggil_tercatat(self, nama, prompt, max_output_tokens, temperature, operasi=None,
+                          batas=float('inf')):
+        """Dijalankan di thread pool: panggil model lalu catat sukses/gagal (kesehatan & metrik)."""
+        mulai = time.monotonic()
+        if mulai >= batas:
+            # Sempat antre di pool sampai deadline pemanggil habis: jangan kirim lagi
+            return None
+        try:
+            teks, usage = self._panggil(nama, prompt, max_output_tokens, temperature, batas)
+        except Exception as e:
+            self.catat_gagal(nama, e)
+            llm_metrics.catat_panggilan(nama, time.monotonic() - mulai, False, jenis_error(e), operasi=operasi)
+            return None
+        latency = time.monotonic() - mulai
+        if teks:
+            self.catat_sukses(nama, latency)
+            llm_metrics.catat_panggilan(nama, latency, True, usage=usage, operasi=operasi)
+            return teks
+        self.catat_gagal(nama, RuntimeError("respons kosong"))
+        llm_metrics.catat_panggilan(nama, latency, False, 'kosong', usage=usage, operasi=operasi)
+        return None
+
+    def generate(self, prompt, max_output_tokens=250, temperature=0.2, deadline=LLM_DEADLINE, hedge=True,
+                 operasi="generate"):
+        """
+        Kirim prompt ke model sehat terbaik dan kembalikan teks jawabannya.
+
+        - Model gagal -> slotnya langsung dipakai model berikutnya, juga
+          ketika permintaan lain masih berjalan.
+        - Model utama belum menjawab setelah `jeda_hedge` (persentil latensi
+          historisnya) -> permintaan cadangan dikirim ke model berikutnya;
+          jawaban yang datang lebih dulu dipakai.
+        - Lewat `deadline` detik -> mengembalikan None, pemanggil memakai fallback.
+
+        Mengembalikan None jika semua gagal / cooldown / deadline habis;
+        bedanya bisa dibaca lewat `alasan_gagal()`.
+        Setiap permintaan dicatat di llm_metrics dengan nama `operasi`.
+        """
+        self._lokal.alasan = None
+        kandidat = iter(self.model_sehat())
+        mulai = time.monotonic()
+        batas = mulai + deadline if deadline else float('inf')
+        maks_paralel = HEDGE_MAX_PARALLEL if hedge else 1
+        berjalan = {}  # future -> (urutan model, nama model)
+        hedged = False
+
+        def kirim_berikutnya():
+            nama = next(kandidat, None)
+            if nama is None:
+                return None
+            future = self._pool.submit(self._panggil_tercatat, nama, prompt, max_output_tokens, temperature,
+                                       operasi, batas)
+            berjalan[future] = (next(urutan), nama)
+            return nama
+
+        urutan = itertools.count()
+        nama = kirim_berikutnya()
+        waktu_hedge = time.monotonic() + self.jeda_hedge(nama) if nama else batas
+        while berjalan:
+            sekarang = time.monotonic()
+            if sekarang >= batas:
+                for _, nama in berjalan.values():
+                    self.catat_timeout(nama)
+                llm_metrics.catat_permintaan(operasi, sekarang - mulai, False, hedged=hedged, deadline=True)
+                self._lokal.alasan = 'deadline'
+                return None
+            selesai, _ = wait(list(berjalan), timeout=min(waktu_hedge, batas) - sekarang,
+                              return_when=FIRST_COMPLETED)
+            gagal = False
+            for future in selesai:
+                depth, _ = berjalan.pop(future)
+                teks = future.result()
+                if teks:
+                    # Panggilan lain yang masih jalan dibiarkan selesai di background
+                    llm_metrics.catat_permintaan(operasi, time.monotonic() - mulai, True, depth=depth,
+                                                 hedged=hedged)
+                    return teks
+                gagal = True
+            if gagal and len(berjalan) < maks_paralel:
+                # Ada yang gagal: slotnya langsung dipakai model berikutnya tanpa
+                # menunggu jeda hedge (tetap dihitung hedging jika yang lain masih jalan)
+                paralel = bool(berjalan)
+                nama = kirim_berikutnya()
+                hedged = hedged or (paralel and nama is not None)
+                waktu_hedge = time.monotonic() + self.jeda_hedge(nama) if nama else batas
+            elif time.monotonic() >= waktu_hedge and len(berjalan) < maks_paralel:
+                nama = kirim_berikutnya()
+                hedged = hedged or nama is not None
+                waktu_hedge = time.monotonic() + self.jeda_hedge(nama) if nama else batas
+            elif time.monotonic() >= waktu_hedge:
+                # Slot penuh: tunggu sampai ada yang selesai; slot yang gagal diisi di atas
+                waktu_hedge = batas
+        llm_metrics.catat_permintaan(operasi, time.monotonic() - mulai, False, hedged=hedged)
+        # urutan berikutnya > 0 berarti minimal satu model sudah dicoba
+        self._lokal.alasan = 'semua_gagal' if next(urutan) else 'tidak_ada_model'
+        return None
+
+    def alasan_gagal(self):
+        """
+        Kenapa `generate` terakhir di thread ini mengembalikan None:
+        'deadline', 'semua_gagal' (setiap model dicoba dan gagal),
+        'tidak_ada_model' (semua sedang cooldown), atau None jika berhasil.
+        """
+        return getattr(self._lokal, 'alasan', None)
+
+    def _alirkan(self, nama, prompt, max_output_tokens, temperature, antrian, berhenti, operasi=None,
+                 batas=float('inf')):
+        """Producer stream (thread): potongan teks dimasukkan ke `antrian`."""
+        mulai = time.monotonic()
+        terkirim = False
+        usage = None
+        try:
+            if self._strategi_model(nama) == 'generative_model':
+                opsi = self._opsi_generate(max_output_tokens, temperature, batas)
+                for chunk in self._model(nama).generate_content(prompt, stream=True, **opsi):
+                    if berhenti.is_set():
+                        llm_metrics.catat_panggilan(nama, time.monotonic() - mulai, False, 'timeout',
+                                                    usage=usage, operasi=operasi)
+                        return
+                    # usage_metadata lengkap biasanya ada di potongan terakhir
+                    usage = ambil_usage(chunk) or usage
+                    teks = ambil_teks(chunk)
+                    if teks:
+                        terkirim = True
+                        antrian.put(("teks", teks))
+            else:
+                # Strategi lama tidak mendukung streaming: kirim utuh sebagai satu potongan
+                teks, usage = self._panggil(nama, prompt, max_output_tokens, temperature, batas)
+                if teks:
+                    terkirim = True
+                    antrian.put(("teks", teks))
+        except Exception as e:
+            self.catat_gagal(nama, e)
+            llm_metrics.catat_panggilan(nama, time.monotonic() - mulai, False, jenis_error(e),
+                                        usage=usage, operasi=operasi)
+            antrian.put(("gagal", e))
+            return
+        latency = time.monotonic() - mulai
+        if terkirim:
+            self.catat_sukses(nama, latency)
+            llm_metrics.catat_panggilan(nama, latency, True, usage=usage, operasi=operasi)
+            antrian.put(("selesai", None))
+        else:
+            self.catat_gagal(nama, RuntimeError("respons kosong"))
+            llm_metrics.catat_panggilan(nama, latency, False, 'kosong', usage=usage, operasi=operasi)
+            antrian.put(("gagal", None))
+
+    def generate_stream(self, prompt, max_output_tokens=250, temperature=0.2, deadline=LLM_DEADLINE,
+                        operasi="generate_stream"):
+        """
+        Versi streaming dari `generate`: menghasilkan potongan teks segera
+        setelah diterima dari model (generate_content(stream=True)).
+
+        Jika model gagal sebelum potongan pertama, model berikutnya dicoba.
+        Jika gagal di tengah jalan, error diteruskan ke pemanggil (teks yang
+        sudah terkirim tidak bisa ditarik kembali). `deadline` membatasi total
+        waktu stream: habis sebelum potongan pertama -> tidak menghasilkan
+        apa-apa; habis di tengah -> TimeoutError. Tanpa hedging, karena dua
+        stream tidak bisa digabung setelah salah satunya mulai tampil.
+        """
+        mulai = time.monotonic()
+        batas = mulai + deadline if deadline else float('inf')
+        for depth, nama in enumerate(self.model_sehat()):
+            antrian = queue.Queue()
+            berhenti = threading.Event()
+            self._pool.submit(self._alirkan, nama, prompt, max_output_tokens, temperature, antrian, berhenti,
+                              operasi, batas)
+            terkirim = False
+            while True:
+                sisa = batas - time.monotonic()
+                try:
+                    jenis, isi = antrian.get(timeout=max(0.0, sisa))
+                except queue.Empty:
+                    berhenti.set()
+                    self.catat_timeout(nama)
+                    llm_metrics.catat_permintaan(operasi, time.monotonic() - mulai, terkirim, depth=depth,
+                                                 deadline=True)
+                    if terkirim:
+                        raise TimeoutError(f"Stream {nama} melewati batas {deadline} detik")
+                    return
+                if jenis == "teks":
+                    terkirim = True
+                    yield isi
+                elif jenis == "selesai":
+                    llm_metrics.catat_permintaan(operasi, time.monotonic() - mulai, True, depth=depth)
+                    return
+                else:
+                    if terkirim:
+                        llm_metrics.catat_permintaan(operasi, time.monotonic() - mulai, False, depth=depth)
+                        raise isi or RuntimeError("stream terputus")
+                    break
+        llm_metrics.catat_permintaan(operasi, time.monotonic() - mulai, False)
+
+    def status(self):
+        """Strategi & kesehatan per model (untuk debugging / panel admin)."""
+        sekarang = time.time()
+        jeda = {nama: round(self.jeda_hedge(nama), 3) for nama in self.preferred_models}
+        with self._lock:
+            hasil = {}
+            for nama in self.preferred_models:
+                k = dict(self._kesehatan.get(nama, {}))
+                k["strategy"] = self._strategi.get(nama)
+                k["hedge_delay"] = jeda[nama]
+                k["cooldown_sec"] = round(max(0.0, k.get("cooldown_until", 0) - sekarang), 1)
+                k.pop("cooldown_until", None)
+                hasil[nama] = k
+            return {"discovered": self._siap, "models": hasil}
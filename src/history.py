@@ -1,10 +1,28 @@
+import atexit
 import json
 import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 
+from src import storage
+from src.json_store import JsonStore
+
 # --- KONFIGURASI FILE ---
+# Dipakai jika STORAGE_BACKEND=json; defaultnya data ada di SQLite (src/storage.py)
 DATA_FOLDER = 'data'
 HISTORY_FILE = os.path.join(DATA_FOLDER, 'history.json')
+# Jumlah history terbaru yang disimpan per user
+HISTORY_MAX = int(os.environ.get("HISTORY_MAX", 20))
+# Resep yang sama dibuka ulang dalam jendela ini (detik) tidak dicatat ulang
+# (rerun halaman detail, klik ganda, dll)
+HISTORY_DEBOUNCE_SEC = float(os.environ.get("HISTORY_DEBOUNCE_SEC", 30))
+# Perubahan dikumpulkan selama ini (detik) sebelum ditulis ke storage oleh thread latar
+HISTORY_FLUSH_SEC = float(os.environ.get("HISTORY_FLUSH_SEC", 2))
+# Isi file di-cache per proses; ditulis atomik di bawah kunci file (src/json_store.py)
+history_store = JsonStore(HISTORY_FILE)
 
 def ensure_data_exists():
     """
@@ -13,35 +31,186 @@ def ensure_data_exists():
     """
     if not os.path.exists(DATA_FOLDER):
         os.makedirs(DATA_FOLDER)
-    
+
     if not os.path.exists(HISTORY_FILE):
         with open(HISTORY_FILE, 'w') as f:
             json.dump({}, f)
 
 def load_history():
     """
-    Membaca seluruh data history dari file JSON.
+    Membaca seluruh data history dari file JSON (salinan dari cache, file
+    hanya dibaca jika berubah). Perubahan yang belum di-flush tidak ikut.
     """
-    ensure_data_exists()
-    try:
-        with open(HISTORY_FILE, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {}
+    return history_store.salinan()
 
 def save_history(data):
     """
-    Menulis kembali data ke file JSON.
+    Menulis kembali data ke file JSON (atomik, cache ikut diperbarui).
     """
-    ensure_data_exists()
-    with open(HISTORY_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
+    history_lru.flush()
+    history_store.simpan(data)
+    history_lru.lupakan()
+
+
+class HistoryLRU:
+    """
+    History per user sebagai LRU: OrderedDict {recipe_id: viewed_at}
+    (hash map + urutan tertaut), yang paling baru di ujung kanan.
+
+    - Melihat resep: move_to_end + popitem(last=False) jika lewat kapasitas,
+      semuanya O(1).
+    - Resep yang sama dibuka ulang dalam HISTORY_DEBOUNCE_SEC diabaikan.
+    - Write-behind: perubahan hanya menandai user sebagai "kotor"; thread
+      latar menulis semua user kotor ke storage sekaligus setiap
+      HISTORY_FLUSH_SEC, dan sisa perubahan di-flush saat proses keluar.
+
+    Data user dimuat dari storage saat pertama kali disentuh, lalu memori
+    proses ini yang menjadi acuan (aplikasi Streamlit berjalan satu proses).
+    """
+
+    def __init__(self, kapasitas=HISTORY_MAX, debounce=HISTORY_DEBOUNCE_SEC, jeda_flush=HISTORY_FLUSH_SEC):
+        self.kapasitas = kapasitas
+        self.debounce = debounce
+        self.jeda_flush = jeda_flush
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._lru = {}           # username -> OrderedDict
+        self._terakhir = {}      # username -> (recipe_id, time.monotonic()) view terakhir yang dicatat
+        self._kotor = set()
+        self._ada_perubahan = threading.Event()
+        self._thread = None
+        self._stats = {"views": 0, "debounced": 0, "flushes": 0, "flush_errors": 0}
+
+    # --- MUAT / SIMPAN KE STORAGE ---
+    @staticmethod
+    def _baca_storage(username):
+        """History user dari storage, urut dari yang terbaru."""
+        if storage.pakai_sqlite():
+            return storage.storage.history_daftar(username)
+        return history_store.baca().get(username, [])
+
+    def _data_user(self, username):
+        lru = self._lru.get(username)
+        if lru is None:
+            try:
+                daftar = self._baca_storage(username)
+            except sqlite3.Error as e:
+                print(f"Error membaca history: {e}")
+                daftar = []
+            lru = OrderedDict()
+            for item in reversed(daftar[:self.kapasitas]):
+                if item.get("recipe_id"):
+                    lru[int(item["recipe_id"])] = item.get("viewed_at", "")
+            self._lru[username] = lru
+        return lru
+
+    def flush(self):
+        """Menulis semua user yang berubah ke storage (dipanggil thread latar & atexit)."""
+        with self._flush_lock:
+            with self._lock:
+                kotor, self._kotor = self._kotor, set()
+                # Disalin (urut dari yang terlama) supaya penulisan tidak menahan lock LRU
+                per_user = {u: list(self._lru.get(u, {}).items()) for u in kotor}
+            if not per_user:
+                return
+            try:
+                if storage.pakai_sqlite():
+                    storage.storage.history_ganti(per_user)
+                else:
+                    def ganti(data):
+                        for username, daftar in per_user.items():
+                            data[username] = [{"recipe_id": rid, "viewed_at": waktu}
+                                              for rid, waktu in reversed(daftar)]
+                        return True
+                    history_store.perbarui(ganti)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Error menyimpan history: {e}")
+                # Dicoba lagi pada flush berikutnya
+                with self._lock:
+                    self._kotor |= kotor
+                    self._stats["flush_errors"] += 1
+                self._ada_perubahan.set()
+                return
+            with self._lock:
+                self._stats["flushes"] += 1
+
+    def _penulis(self):
+        while True:
+            self._ada_perubahan.wait()
+            # Kumpulkan perubahan lain yang datang berdekatan, lalu tulis sekali
+            time.sleep(self.jeda_flush)
+            self._ada_perubahan.clear()
+            self.flush()
+
+    def _tandai_kotor(self, username):
+        self._kotor.add(username)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._penulis, name="history-writer", daemon=True)
+            self._thread.start()
+        self._ada_perubahan.set()
+
+    # --- OPERASI ---
+    def lihat(self, username, recipe_id, viewed_at):
+        """Mencatat satu view. False jika diabaikan karena debounce."""
+        sekarang = time.monotonic()
+        with self._lock:
+            self._stats["views"] += 1
+            lru = self._data_user(username)
+            terakhir = self._terakhir.get(username)
+            if (terakhir and terakhir[0] == recipe_id and sekarang - terakhir[1] < self.debounce
+                    and next(reversed(lru), None) == recipe_id):
+                self._stats["debounced"] += 1
+                return False
+            lru[recipe_id] = viewed_at
+            lru.move_to_end(recipe_id)
+            while len(lru) > self.kapasitas:
+                lru.popitem(last=False)
+            self._terakhir[username] = (recipe_id, sekarang)
+            self._tandai_kotor(username)
+            return True
+
+    def daftar(self, username):
+        """[{"recipe_id", "viewed_at"}, ...] dari yang terbaru (termasuk yang belum di-flush)."""
+        with self._lock:
+            lru = self._data_user(username)
+            return [{"recipe_id": rid, "viewed_at": waktu} for rid, waktu in reversed(lru.items())]
+
+    def hapus(self, username):
+        """Mengosongkan history user. True jika sebelumnya ada isinya."""
+        with self._lock:
+            lru = self._data_user(username)
+            ada = bool(lru)
+            lru.clear()
+            self._terakhir.pop(username, None)
+            if ada:
+                self._tandai_kotor(username)
+            return ada
+
+    def lupakan(self):
+        """Membuang data di memori (dimuat ulang dari storage saat dibutuhkan)."""
+        with self._lock:
+            self._lru.clear()
+            self._terakhir.clear()
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data["users"] = len(self._lru)
+            data["pending"] = len(self._kotor)
+        return data
+
+
+# Satu LRU history untuk seluruh proses; sisa perubahan ditulis saat proses keluar
+history_lru = HistoryLRU()
+atexit.register(history_lru.flush)
+
 
 def add_to_history(username, recipe_id):
     """
     Menambahkan ID resep ke history user.
     Menyimpan ID dan timestamp kapan resep dilihat.
-    
+    Tidak menunggu disk: penulisan dilakukan thread latar (write-behind).
+
     Format data:
     {
         "username": [
@@ -53,47 +222,22 @@ def add_to_history(username, recipe_id):
     if not username:
         return False
 
-    data = load_history()
-    
-    # Buat list kosong jika user belum punya history
-    if username not in data:
-        data[username] = []
-    
     try:
         rid = int(recipe_id)
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Cek apakah recipe_id sudah ada di history
-        # Jika sudah ada, pindahkan ke posisi teratas (update timestamp)
-        for item in data[username]:
-            if item.get("recipe_id") == rid:
-                data[username].remove(item)
-                break
-        
-        # Tambahkan ke bagian paling atas (most recent)
-        data[username].insert(0, {
-            "recipe_id": rid,
-            "viewed_at": current_time
-        })
-        
-        # Simpan hanya 20 history terbaru per user
-        data[username] = data[username][:20]
-        
-        save_history(data)
-        return True
-            
     except ValueError:
         print(f"Error: ID resep '{recipe_id}' tidak valid.")
         return False
 
+    history_lru.lihat(username, rid, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    return True
+
 def get_user_history(username):
     """
     Mengambil history resep user.
     Mengembalikan list ID resep yang paling baru dilihat (sorted by time).
     """
-    data = load_history()
-    history_data = data.get(username, [])
-    
+    history_data = get_user_history_detailed(username)
+
     # Extract hanya recipe_id dari history
     return [item.get("recipe_id") for item in history_data if item.get("recipe_id")]
 
@@ -101,8 +245,7 @@ def get_user_history_detailed(username):
     """
     Mengambil history lengkap dengan timestamp untuk tampilan.
     """
-    data = load_history()
-    return data.get(username, [])
+    return history_lru.daftar(username)
 
 def clear_user_history(username):
     """
@@ -111,11 +254,4 @@ def clear_user_history(username):
     if not username:
         return False
 
-    data = load_history()
-    
-    if username in data:
-        data[username] = []
-        save_history(data)
-        return True
-    
-    return False
+    return history_lru.hapus(username)
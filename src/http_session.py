@@ -0,0 +1,104 @@
+import os
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- KONFIGURASI KONEKSI ---
+# Semua angka bisa diubah lewat environment variable (.env)
+POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 20))          # Koneksi keep-alive per host
+MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))       # Batas percobaan ulang
+BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))  # 0.5s, 1s, 2s, ...
+BACKOFF_JITTER = float(os.environ.get("HTTP_BACKOFF_JITTER", 0.5))  # Acak 0..0.5s tambahan
+BACKOFF_MAX = float(os.environ.get("HTTP_BACKOFF_MAX", 8))
+
+# Status yang layak dicoba ulang: error server (5xx). 429 sengaja tidak dicoba
+# ulang di sini -- langsung diteruskan ke SpoonacularGuard (src/rate_limiter.py)
+# yang mengatur jeda dan circuit breaker-nya.
+RETRY_STATUS = (500, 502, 503, 504)
+
+# Timeout (connect, read) dalam detik per jenis endpoint.
+# Connect dibuat pendek supaya host yang mati cepat ketahuan;
+# read disesuaikan dengan beratnya respons tiap endpoint.
+TIMEOUTS = {
+    "search": (3.05, 15),
+    "random": (3.05, 15),
+    "detail": (3.05, 10),
+    "bulk": (3.05, 20),
+    "image": (3.05, 5),
+    "default": (3.05, 15),
+}
+
+
+def _timeout_dari_env(endpoint, bawaan):
+    """Membaca override timeout, contoh: HTTP_TIMEOUT_SEARCH="2,10"."""
+    nilai = os.environ.get(f"HTTP_TIMEOUT_{endpoint.upper()}")
+    if not nilai:
+        return bawaan
+    try:
+        connect, read = (float(x) for x in nilai.split(","))
+        return (connect, read)
+    except ValueError:
+        print(f"Warning: format HTTP_TIMEOUT_{endpoint.upper()} salah, pakai bawaan {bawaan}")
+        return bawaan
+
+
+TIMEOUTS = {nama: _timeout_dari_env(nama, t) for nama, t in TIMEOUTS.items()}
+
+
+class _JitterRetry(Retry):
+    """Retry dengan exponential backoff + jitter acak supaya banyak sesi
+    yang gagal bersamaan tidak mencoba ulang di detik yang sama."""
+
+    def get_backoff_time(self):
+        dasar = super().get_backoff_time()
+        if dasar <= 0:
+            return 0
+        return min(BACKOFF_MAX, dasar + random.uniform(0, BACKOFF_JITTER))
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def buat_session():
+    """Membuat requests.Session baru dengan connection pool dan kebijakan retry."""
+    retry = _JitterRetry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        # Retry-After dari server bisa sangat panjang; jeda retry selalu dari backoff (maks BACKOFF_MAX)
+        respect_retry_after_header=False,
+        raise_on_status=False,  # Respons terakhir tetap dikembalikan, raise_for_status() di pemanggil
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_session():
+    """Session global (satu per proses) yang dipakai bersama semua sesi Streamlit."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = buat_session()
+    return _session
+
+
+def http_get(url, params=None, endpoint="default", **kwargs):
+    """
+    Pengganti `requests.get` yang memakai session global.
+    `endpoint` menentukan timeout (lihat TIMEOUTS) kecuali `timeout` diberikan.
+    """
+    kwargs.setdefault("timeout", TIMEOUTS.get(endpoint, TIMEOUTS["default"]))
+    return get_session().get(url, params=params, **kwargs)
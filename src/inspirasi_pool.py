@@ -0,0 +1,166 @@
+import json
+import os
+import random
+import threading
+import time
+
+from src.api_client import dapatkan_resep_random
+
+# --- KONFIGURASI POOL INSPIRASI ---
+DATA_FOLDER = 'data'
+POOL_FILE = os.path.join(DATA_FOLDER, 'inspirasi_pool.json')
+
+# Jumlah resep random yang disimpan di pool (100 = satu request per refresh)
+POOL_TARGET = int(os.environ.get("INSPIRASI_POOL_SIZE", 100))
+# Minta data gizi untuk pool (hanya dipakai untuk label kalori di kartu);
+# matikan supaya respons refresh lebih kecil dan hemat kuota
+POOL_NUTRISI = os.environ.get("INSPIRASI_POOL_NUTRISI", "1") == "1"
+# Setelah berapa detik pool dianggap basi dan diperbarui di background
+POOL_REFRESH_SEC = int(os.environ.get("INSPIRASI_POOL_REFRESH", 3600))
+# Jeda sebelum mencoba lagi jika pembaruan gagal (misal kuota habis)
+POOL_RETRY_SEC = int(os.environ.get("INSPIRASI_POOL_RETRY", 300))
+# Endpoint random Spoonacular maksimal 100 resep per request
+RANDOM_BATCH = 100
+
+_lock = threading.Lock()
+# Cold start: hanya satu pemanggil yang mengisi pool, yang lain menunggu hasilnya
+_isi_lock = threading.Lock()
+_pool = {"updated_at": 0, "recipes": []}
+_pool_mtime = None
+_refresh_berjalan = False
+_gagal_terakhir = 0
+
+
+def _baca_file():
+    """Memuat pool dari disk jika file berubah (misal diperbarui proses lain)."""
+    global _pool, _pool_mtime
+    try:
+        mtime = os.path.getmtime(POOL_FILE)
+    except OSError:
+        return
+    if mtime == _pool_mtime:
+        return
+    try:
+        with open(POOL_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data.get("recipes"), list):
+            _pool = data
+            _pool_mtime = mtime
+    except (OSError, ValueError) as e:
+        print(f"Error membaca pool inspirasi: {e}")
+
+
+def _tulis_file(data):
+    """Tulis atomik: ke file sementara dulu, lalu rename."""
+    if not os.path.exists(DATA_FOLDER):
+        os.makedirs(DATA_FOLDER)
+    tmp = f"{POOL_FILE}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, POOL_FILE)
+
+
+def refresh_pool():
+    """
+    Mengisi ulang pool dari endpoint random (beberapa batch @100 resep).
+    Jika gagal total, pool lama tetap dipakai.
+    """
+    global _pool, _pool_mtime, _refresh_berjalan, _gagal_terakhir
+    try:
+        terkumpul = {}
+        # Beberapa batch tambahan untuk menutup duplikat antar batch
+        for _ in range((POOL_TARGET + RANDOM_BATCH - 1) // RANDOM_BATCH + 1):
+            if len(terkumpul) >= POOL_TARGET:
+                break
+            batch = dapatkan_resep_random(jumlah=min(RANDOM_BATCH, POOL_TARGET - len(terkumpul)),
+                                          nutrisi=POOL_NUTRISI)
+            if not batch:
+                break
+            for resep in batch:
+                if resep.get('id') is not None:
+                    terkumpul[resep['id']] = resep
+
+        if not terkumpul:
+            print("Warning: Pool inspirasi gagal diperbarui, tetap memakai data lama")
+            with _lock:
+                _gagal_terakhir = time.time()
+            return False
+
+        data = {"updated_at": time.time(), "recipes": list(terkumpul.values())[:POOL_TARGET]}
+        try:
+            _tulis_file(data)
+        except OSError as e:
+            print(f"Error menyimpan pool inspirasi: {e}")
+        with _lock:
+            _pool = data
+            try:
+                _pool_mtime = os.path.getmtime(POOL_FILE)
+            except OSError:
+                _pool_mtime = None
+            _gagal_terakhir = 0
+        return True
+    finally:
+        with _lock:
+            _refresh_berjalan = False
+
+
+def _mulai_refresh_background():
+    """Jalankan refresh_pool di thread terpisah (paling banyak satu sekaligus)."""
+    global _refresh_berjalan
+    with _lock:
+        if _refresh_berjalan or time.time() - _gagal_terakhir < POOL_RETRY_SEC:
+            return
+        _refresh_berjalan = True
+    threading.Thread(target=refresh_pool, name="inspirasi-refresh", daemon=True).start()
+
+
+def _isi_pool_awal():
+    """
+    Cold start: pool diisi langsung (bukan di background) supaya halaman
+    pertama tidak kosong. Pemanggil lain menunggu refresh yang sama, jadi
+    tidak ada request random tambahan. Setelah gagal, pool kosong dipakai
+    sampai POOL_RETRY_SEC lewat.
+    """
+    global _refresh_berjalan
+    with _isi_lock:
+        with _lock:
+            _baca_file()
+            if _pool["recipes"] or _refresh_berjalan or time.time() - _gagal_terakhir < POOL_RETRY_SEC:
+                return _pool
+            _refresh_berjalan = True
+        refresh_pool()
+        with _lock:
+            return _pool
+
+
+def ambil_sampel_inspirasi(jumlah=12):
+    """
+    Mengambil `jumlah` resep acak dari pool (tanpa request API).
+
+    Stale-while-revalidate: jika pool sudah basi, sampel tetap diambil dari
+    pool lama, sementara pembaruan berjalan di background. Hanya saat pool
+    benar-benar kosong (pertama kali jalan) pemanggil menunggu pengisian pool.
+    """
+    with _lock:
+        _baca_file()
+        pool = _pool
+
+    if not pool["recipes"]:
+        pool = _isi_pool_awal()
+        if not pool["recipes"]:
+            return []
+
+    if time.time() - pool.get("updated_at", 0) > POOL_REFRESH_SEC:
+        _mulai_refresh_background()
+
+    resep = pool["recipes"]
+    return random.sample(resep, min(jumlah, len(resep)))
+
+
+def status_pool():
+    with _lock:
+        return {
+            "size": len(_pool["recipes"]),
+            "age_sec": round(time.time() - _pool["updated_at"]) if _pool["updated_at"] else None,
+            "refreshing": _refresh_berjalan,
+        }
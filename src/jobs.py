@@ -0,0 +1,163 @@
+"""
+Antrian job sederhana di dalam proses untuk pekerjaan lambat (AI search,
+memuat detail bulk, membuat PDF, dll).
+
+Script Streamlit cukup mengirim job (`job_manager.submit`) lalu menyimpan
+job id di st.session_state. Pekerjaan berjalan di worker pool, sehingga
+script bisa langsung selesai dan UI tetap responsif; status dicek ulang
+secara berkala (polling) sampai hasilnya siap diambil.
+"""
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+# Jumlah worker untuk seluruh proses (dipakai bersama semua sesi user)
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 8))
+# Job yang sudah selesai tapi tidak pernah diambil hasilnya dibuang setelah ini (detik)
+JOB_TTL = int(os.environ.get("JOB_TTL", 15 * 60))
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+CANCELLED = "cancelled"
+UNKNOWN = "unknown"
+
+
+class Job:
+    def __init__(self, job_id, label):
+        self.id = job_id
+        self.label = label
+        self.future = None
+        self.dibuat = time.time()
+        self.mulai = None
+        self.selesai = None
+        self.dibatalkan = threading.Event()
+
+
+class JobManager:
+    """
+    Worker pool + registry job. Job yang dibatalkan sebelum mulai tidak akan
+    dijalankan; job yang sudah berjalan tidak bisa dihentikan paksa (kode
+    SDK/HTTP bersifat blocking), tetapi hasilnya dibuang. Fungsi yang
+    menerima argumen `cancel_event` (submit dengan `cancel_event=True`) bisa
+    berhenti lebih awal secara kooperatif dengan melempar CancelledError,
+    misal `api_client_async.dapatkan_detail_resep_bulk_paralel`.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, ttl=JOB_TTL):
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self._stats = {"submitted": 0, "done": 0, "error": 0, "cancelled": 0}
+
+    def _jalankan(self, job, fungsi, args, kwargs):
+        if job.dibatalkan.is_set():
+            raise CancelledError()
+        job.mulai = time.time()
+        try:
+            hasil = fungsi(*args, **kwargs)
+        except CancelledError:
+            with self._lock:
+                self._stats["cancelled"] += 1
+            raise
+        finally:
+            job.selesai = time.time()
+        with self._lock:
+            self._stats["cancelled" if job.dibatalkan.is_set() else "done"] += 1
+        return hasil
+
+    def _bersihkan(self):
+        batas = time.time() - self.ttl
+        for job_id in [j for j, job in self._jobs.items() if job.selesai and job.selesai < batas]:
+            del self._jobs[job_id]
+
+    def submit(self, fungsi, *args, label=None, cancel_event=False, **kwargs):
+        """
+        Menjadwalkan fungsi(*args, **kwargs) dan mengembalikan job id.
+        Jika `cancel_event=True`, fungsi menerima kwargs `cancel_event`
+        (threading.Event) yang di-set saat job dibatalkan.
+        """
+        with self._lock:
+            self._bersihkan()
+            job = Job(f"job-{next(self._counter)}", label or getattr(fungsi, "__name__", "job"))
+            self._jobs[job.id] = job
+            self._stats["submitted"] += 1
+        if cancel_event:
+            kwargs["cancel_event"] = job.dibatalkan
+        job.future = self._pool.submit(self._jalankan, job, fungsi, args, kwargs)
+        job.future.add_done_callback(lambda f, job=job: self._catat_selesai(job, f))
+        return job.id
+
+    def _catat_selesai(self, job, future):
+        if job.selesai is None:
+            job.selesai = time.time()
+        if not future.cancelled() and future.exception() is not None \
+                and not isinstance(future.exception(), CancelledError):
+            with self._lock:
+                self._stats["error"] += 1
+
+    def status(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return UNKNOWN
+        if job.dibatalkan.is_set():
+            return CANCELLED
+        f = job.future
+        if not f.done():
+            return RUNNING if f.running() else PENDING
+        if f.cancelled() or isinstance(f.exception(), CancelledError):
+            return CANCELLED
+        return ERROR if f.exception() is not None else DONE
+
+    def result(self, job_id, hapus=True):
+        """
+        Hasil job yang sudah DONE (exception job diteruskan jika ERROR).
+        Secara default job dihapus dari registry setelah hasilnya diambil.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        try:
+            return job.future.result(timeout=0)
+        finally:
+            if hapus:
+                with self._lock:
+                    self._jobs.pop(job_id, None)
+
+    def cancel(self, job_id):
+        """Membatalkan job; True jika job masih ada (belum diambil hasilnya)."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        job.dibatalkan.set()
+        if job.future.cancel():
+            with self._lock:
+                self._stats["cancelled"] += 1
+        return True
+
+    def info(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        sekarang = time.time()
+        return {"id": job.id, "label": job.label, "status": self.status(job_id),
+                "waited_sec": round((job.mulai or sekarang) - job.dibuat, 3),
+                "elapsed_sec": round((job.selesai or sekarang) - (job.mulai or sekarang), 3)}
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            aktif = list(self._jobs)
+        data["running"] = sum(1 for j in aktif if self.status(j) == RUNNING)
+        data["pending"] = sum(1 for j in aktif if self.status(j) == PENDING)
+        return data
+
+
+# Satu job manager untuk seluruh proses Streamlit
+job_manager = JobManager()
@@ -0,0 +1,153 @@
+import copy
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Optional import: kunci file antar proses (fcntl di Linux/macOS, msvcrt di Windows)
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    fcntl = None
+    HAS_FCNTL = False
+try:
+    import msvcrt
+    HAS_MSVCRT = True
+except ImportError:
+    msvcrt = None
+    HAS_MSVCRT = False
+
+# --- CACHE FILE JSON (DIPAKAI JIKA STORAGE_BACKEND=json) ---
+# Dalam jendela ini (detik) setelah file terakhir dicek, isi cache langsung
+# dipakai tanpa stat() sama sekali; 0 = selalu cek mtime/ukuran
+JSON_STORE_CHECK_SEC = float(os.environ.get("JSON_STORE_CHECK_SEC", 1.0))
+
+
+class JsonStore:
+    """
+    Satu file JSON yang di-cache di memori untuk seluruh proses.
+
+    - Baca: isi file di-parse sekali; dipakai ulang selama (mtime, ukuran)
+      file tidak berubah. Dalam JSON_STORE_CHECK_SEC setelah pengecekan
+      terakhir bahkan stat() dilewati, jadi rerun Streamlit tidak menyentuh disk.
+    - Tulis: write-through lewat `perbarui` -- di bawah kunci file antar
+      proses, data terbaru dimuat, diubah, ditulis ke file sementara lalu
+      os.replace (atomik), dan cache ikut diperbarui.
+
+    `dari_json` / `ke_json` (opsional) mengubah isi file ke struktur di memori
+    dan sebaliknya, misal list di file menjadi dict berurutan di memori.
+    """
+
+    def __init__(self, path, default=dict, dari_json=None, ke_json=None):
+        self.path = path
+        self.default = default
+        self.dari_json = dari_json or (lambda data: data)
+        self.ke_json = ke_json or (lambda data: data)
+        self._lock = threading.RLock()
+        self._data = None
+        self._tanda = None       # (mtime_ns, ukuran) saat data dimuat/ditulis
+        self._dicek = 0.0        # time.monotonic() pengecekan terakhir
+        self._stats = {"reads": 0, "loads": 0, "writes": 0}
+
+    def _tanda_file(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _muat(self, paksa_cek=False):
+        """Data di cache; dimuat ulang dari file hanya jika file berubah."""
+        sekarang = time.monotonic()
+        if self._data is not None and not paksa_cek and sekarang - self._dicek < JSON_STORE_CHECK_SEC:
+            return self._data
+        tanda = self._tanda_file()
+        self._dicek = sekarang
+        if self._data is not None and tanda == self._tanda:
+            return self._data
+        data = self.default()
+        if tanda is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = self.dari_json(json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                print(f"Error membaca {self.path}: {e}")
+                data = self.default()
+        self._data, self._tanda = data, tanda
+        self._stats["loads"] += 1
+        return data
+
+    @contextmanager
+    def _kunci_file(self):
+        """Kunci eksklusif antar proses pada file <path>.lock selama blok berjalan."""
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+        with open(self.path + '.lock', 'a+') as f:
+            if HAS_FCNTL:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            elif HAS_MSVCRT:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if HAS_FCNTL:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                elif HAS_MSVCRT:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _tulis(self, data):
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.ke_json(data), f, ensure_ascii=False, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._data, self._tanda, self._dicek = data, self._tanda_file(), time.monotonic()
+        self._stats["writes"] += 1
+
+    def baca(self):
+        """Isi file (objek di cache, jangan diubah langsung -- pakai `perbarui`)."""
+        with self._lock:
+            self._stats["reads"] += 1
+            return self._muat()
+
+    def salinan(self):
+        """Deep copy isi file, aman untuk diubah pemanggil."""
+        return copy.deepcopy(self.baca())
+
+    def perbarui(self, fungsi):
+        """
+        Menjalankan fungsi(data) pada data terbaru di bawah kunci file, lalu
+        menulis file jika fungsi mengembalikan nilai truthy. Mengembalikan
+        nilai kembalian fungsi.
+        """
+        with self._lock, self._kunci_file():
+            data = self._muat(paksa_cek=True)
+            try:
+                hasil = fungsi(data)
+                if hasil:
+                    self._tulis(data)
+            except BaseException:
+                # Data di cache mungkin sudah setengah diubah: muat ulang dari file nanti
+                self._data = self._tanda = None
+                raise
+            return hasil
+
+    def simpan(self, data):
+        """Menimpa seluruh isi file dengan data (struktur memori), atomik dan write-through."""
+        with self._lock, self._kunci_file():
+            self._tulis(data)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+# --- INSTRUMENTASI PANGGILAN LLM (GEMINI) ---
+# Batas atas bucket histogram latensi (detik); bucket terakhir = +Inf
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32)
+# Jumlah event terakhir yang disimpan untuk panel admin
+EVENT_LOG_SIZE = int(os.environ.get("LLM_METRICS_EVENTS", 200))
+
+
+def ambil_usage(resp):
+    """Jumlah token dari usage_metadata respons Gemini: (prompt, respons, total) atau None."""
+    usage = getattr(resp, 'usage_metadata', None)
+    if usage is None and isinstance(resp, dict):
+        usage = resp.get('usage_metadata') or resp.get('usageMetadata')
+    if not usage:
+        return None
+
+    def _ambil(*nama):
+        for n in nama:
+            nilai = usage.get(n) if isinstance(usage, dict) else getattr(usage, n, None)
+            if nilai:
+                return int(nilai)
+        return 0
+
+    prompt = _ambil('prompt_token_count', 'promptTokenCount')
+    respons = _ambil('candidates_token_count', 'candidatesTokenCount')
+    total = _ambil('total_token_count', 'totalTokenCount') or prompt + respons
+    return prompt, respons, total
+
+
+class _StatModel:
+    def __init__(self):
+        self.calls = 0
+        self.successes = 0
+        self.failures = defaultdict(int)   # alasan -> jumlah
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.total_tokens = 0
+
+
+class _StatOperasi:
+    def __init__(self):
+        self.requests = 0
+        self.answered = 0
+        self.fallbacks = 0
+        self.deadline_hits = 0
+        self.hedged = 0
+        self.depth = defaultdict(int)      # urutan model yang menjawab (0 = model utama)
+        self.latency_sum = 0.0
+
+
+class LLMMetrics:
+    """
+    Pengumpul metrik panggilan LLM (thread-safe, di memori per proses).
+
+    - per model: jumlah panggilan, sukses, alasan gagal, histogram latensi, token
+    - per operasi (chef_ai, query_expansion, ...): jawaban, fallback, deadline,
+      hedging, dan kedalaman fallback (model ke berapa yang akhirnya menjawab)
+    - hit/miss cache per sumber (semantic cache, knowledge base, dll)
+
+    Bisa diekspor sebagai dict/JSON atau format teks Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._kosongkan()
+
+    def _kosongkan(self):
+        self._mulai = time.time()
+        self._model = defaultdict(_StatModel)
+        self._operasi = defaultdict(_StatOperasi)
+        self._cache = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._event = deque(maxlen=EVENT_LOG_SIZE)
+
+    def _log(self, **data):
+        data["ts"] = round(time.time(), 3)
+        self._event.append(data)
+
+    def catat_panggilan(self, model, latency, sukses, alasan=None, usage=None, operasi=None):
+        """Satu panggilan ke satu model (sukses atau gagal)."""
+        with self._lock:
+            m = self._model[model]
+            m.calls += 1
+            m.latency_sum += latency
+            idx = next((i for i, batas in enumerate(LATENCY_BUCKETS) if latency <= batas), len(LATENCY_BUCKETS))
+            m.buckets[idx] += 1
+            if sukses:
+                m.successes += 1
+            else:
+                m.failures[alasan or 'lain'] += 1
+            if usage:
+                m.prompt_tokens += usage[0]
+                m.response_tokens += usage[1]
+                m.total_tokens += usage[2]
+            self._log(kind="call", model=model, operation=operasi, ok=sukses, reason=alasan,
+                      latency=round(latency, 3), tokens=usage[2] if usage else None)
+
+    def catat_permintaan(self, operasi, latency, dijawab, depth=None, hedged=False, deadline=False):
+        """Satu permintaan tingkat aplikasi (bisa terdiri dari beberapa panggilan model)."""
+        with self._lock:
+            o = self._operasi[operasi]
+            o.requests += 1
+            o.latency_sum += latency
+            if dijawab:
+                o.answered += 1
+                o.depth[depth or 0] += 1
+            else:
+                o.fallbacks += 1
+            if deadline:
+                o.deadline_hits += 1
+            if hedged:
+                o.hedged += 1
+            self._log(kind="request", operation=operasi, answered=dijawab, depth=depth,
+                      hedged=hedged, deadline=deadline, latency=round(latency, 3))
+
+    def catat_cache(self, sumber, hit):
+        with self._lock:
+            self._cache[sumber]["hits" if hit else "misses"] += 1
+
+    def catat_error(self, operasi, error):
+        """Error yang sebelumnya ditelan diam-diam (misal parsing jawaban)."""
+        with self._lock:
+            self._log(kind="error", operation=operasi, error=f"{type(error).__name__}: {error}"[:300])
+
+    # --- EKSPOR ---
+    def snapshot(self):
+        with self._lock:
+            models = {}
+            for nama, m in self._model.items():
+                models[nama] = {
+                    "calls": m.calls, "successes": m.successes, "failures": dict(m.failures),
+                    "avg_latency": round(m.latency_sum / m.calls, 3) if m.calls else None,
+                    "latency_sum": round(m.latency_sum, 3),
+                    "latency_histogram": {
+                        (f"le_{b}" if i < len(LATENCY_BUCKETS) else "le_inf"): m.buckets[i]
+                        for i, b in enumerate(LATENCY_BUCKETS + (None,))
+                    },
+                    "prompt_tokens": m.prompt_tokens, "response_tokens": m.response_tokens,
+                    "total_tokens": m.total_tokens,
+                }
+            operasi = {}
+            for nama, o in self._operasi.items():
+                operasi[nama] = {
+                    "requests": o.requests, "answered": o.answered, "fallbacks": o.fallbacks,
+                    "deadline_hits": o.deadline_hits, "hedged": o.hedged,
+                    "fallback_depth": dict(sorted(o.depth.items())),
+                    "avg_latency": round(o.latency_sum / o.requests, 3) if o.requests else None,
+                }
+            cache = {}
+            for nama, c in self._cache.items():
+                total = c["hits"] + c["misses"]
+                cache[nama] = dict(c, hit_rate=round(c["hits"] / total, 3) if total else 0.0)
+            return {"since": round(self._mulai), "models": models, "operations": operasi,
+                    "cache": cache, "recent_events": list(self._event)}
+
+    def export_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def export_prometheus(self):
+        """Format teks Prometheus (bisa di-scrape / disimpan ke file)."""
+        data = self.snapshot()
+        baris = []
+
+        def tulis(nama, nilai, **label):
+            isi = ",".join(f'{k}="{v}"' for k, v in label.items())
+            baris.append(f"{nama}{{{isi}}} {nilai}" if isi else f"{nama} {nilai}")
+
+        for model, m in data["models"].items():
+            tulis("llm_calls_total", m["calls"], model=model)
+            tulis("llm_success_total", m["successes"], model=model)
+            for alasan, n in m["failures"].items():
+                tulis("llm_failures_total", n, model=model, reason=alasan)
+            kumulatif = 0
+            for n, b in zip(m["latency_histogram"].values(), LATENCY_BUCKETS + ("+Inf",)):
+                kumulatif += n
+                tulis("llm_latency_seconds_bucket", kumulatif, model=model, le=b)
+            tulis("llm_latency_seconds_sum", m["latency_sum"], model=model)
+            tulis("llm_latency_seconds_count", m["calls"], model=model)
+            tulis("llm_tokens_total", m["prompt_tokens"], model=model, kind="prompt")
+            tulis("llm_tokens_total", m["response_tokens"], model=model, kind="response")
+        for op, o in data["operations"].items():
+            tulis("llm_requests_total", o["requests"], operation=op)
+            tulis("llm_fallbacks_total", o["fallbacks"], operation=op)
+            tulis("llm_deadline_hits_total", o["deadline_hits"], operation=op)
+            tulis("llm_hedged_total", o["hedged"], operation=op)
+            for depth, n in o["fallback_depth"].items():
+                tulis("llm_answer_depth_total", n, operation=op, depth=depth)
+        for sumber, c in data["cache"].items():
+            tulis("llm_cache_hits_total", c["hits"], source=sumber)
+            tulis("llm_cache_misses_total", c["misses"], source=sumber)
+        return "\n".join(baris) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._kosongkan()
+
+
+# Satu pengumpul metrik untuk seluruh proses
+llm_metrics = LLMMetrics()
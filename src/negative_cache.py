@@ -0,0 +1,134 @@
+import hashlib
+import math
+import os
+import threading
+import time
+
+# --- KONFIGURASI CACHE NEGATIF ---
+# TTL sengaja pendek: resep/bahan yang hari ini kosong bisa saja ada besok
+NEGATIVE_TTL = int(os.environ.get("NEGATIVE_CACHE_TTL", 15 * 60))
+# Selama jumlah entri masih di bawah batas ini, disimpan di dict biasa (tepat)
+NEGATIVE_EXACT_MAX = int(os.environ.get("NEGATIVE_CACHE_EXACT_MAX", 5000))
+# Kapasitas & false positive rate per generasi Bloom filter
+BLOOM_KAPASITAS = int(os.environ.get("NEGATIVE_CACHE_BLOOM_CAPACITY", 100000))
+BLOOM_FP_RATE = float(os.environ.get("NEGATIVE_CACHE_BLOOM_FP", 0.001))
+
+
+class BloomFilter:
+    """
+    Bloom filter sederhana di atas bytearray.
+    Tidak pernah false negative; false positive ~ `fp_rate` saat terisi `kapasitas` item.
+    """
+
+    def __init__(self, kapasitas, fp_rate):
+        # Rumus standar: m = -n ln p / (ln 2)^2, k = m/n ln 2
+        self.jumlah_bit = max(8, int(-kapasitas * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.jumlah_hash = max(1, round(self.jumlah_bit / kapasitas * math.log(2)))
+        self.bits = bytearray((self.jumlah_bit + 7) // 8)
+        self.jumlah_item = 0
+
+    def _posisi(self, kunci):
+        # Double hashing dari satu digest blake2b: h1 + i*h2
+        digest = hashlib.blake2b(kunci.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.jumlah_bit for i in range(self.jumlah_hash)]
+
+    def tambah(self, kunci):
+        for pos in self._posisi(kunci):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.jumlah_item += 1
+
+    def __contains__(self, kunci):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._posisi(kunci))
+
+
+class NegativeCache:
+    """
+    Mengingat permintaan yang hasilnya kosong / tidak ditemukan (404) untuk
+    sementara, terpisah dari cache positif.
+
+    Mode normal memakai dict {kunci: waktu_kadaluarsa}. Jika entri melebihi
+    `max_exact`, entri baru masuk ke Bloom filter bergenerasi: generasi baru
+    dibuat setiap TTL/2 detik dan generasi yang lebih tua dari TTL dibuang
+    utuh, jadi entri hilang dengan sendirinya setelah TTL/2 .. TTL detik tanpa
+    perlu dihapus satu per satu. Memori tetap kecil berapapun jumlah kunci.
+    """
+
+    def __init__(self, ttl=NEGATIVE_TTL, max_exact=NEGATIVE_EXACT_MAX,
+                 bloom_kapasitas=BLOOM_KAPASITAS, bloom_fp=BLOOM_FP_RATE):
+        self.ttl = ttl
+        self.max_exact = max_exact
+        self.bloom_kapasitas = bloom_kapasitas
+        self.bloom_fp = bloom_fp
+        self._lock = threading.Lock()
+        self._exact = {}
+        self._generasi = []  # [(waktu_mulai, BloomFilter)], terbaru di akhir
+        self._stats = {"hits": 0, "misses": 0, "added": 0}
+
+    def _rotasi(self, sekarang):
+        """Buang generasi Bloom yang sudah lebih tua dari TTL."""
+        self._generasi = [(t, b) for t, b in self._generasi if sekarang - t < self.ttl]
+
+    def _bersihkan_exact(self, sekarang):
+        for kunci in [k for k, kadaluarsa in self._exact.items() if kadaluarsa <= sekarang]:
+            del self._exact[kunci]
+
+    def tambah(self, kunci):
+        """Catat bahwa `kunci` baru saja tidak menghasilkan apa-apa."""
+        sekarang = time.time()
+        with self._lock:
+            self._stats["added"] += 1
+            self._rotasi(sekarang)
+            if len(self._exact) >= self.max_exact:
+                self._bersihkan_exact(sekarang)
+            if len(self._exact) < self.max_exact and not self._generasi:
+                self._exact[kunci] = sekarang + self.ttl
+                return
+            # Mode ringkas: masuk ke Bloom filter generasi saat ini
+            if (not self._generasi or sekarang - self._generasi[-1][0] >= self.ttl / 2
+                    or self._generasi[-1][1].jumlah_item >= self.bloom_kapasitas):
+                self._generasi.append((sekarang, BloomFilter(self.bloom_kapasitas, self.bloom_fp)))
+            self._generasi[-1][1].tambah(kunci)
+
+    def ada(self, kunci):
+        """True jika `kunci` tercatat kosong dan belum kadaluarsa."""
+        sekarang = time.time()
+        with self._lock:
+            kadaluarsa = self._exact.get(kunci)
+            if kadaluarsa is not None:
+                if kadaluarsa > sekarang:
+                    self._stats["hits"] += 1
+                    return True
+                del self._exact[kunci]
+            if self._generasi:
+                self._rotasi(sekarang)
+                if any(kunci in bloom for _, bloom in self._generasi):
+                    self._stats["hits"] += 1
+                    return True
+            self._stats["misses"] += 1
+            return False
+
+    def hapus(self, kunci):
+        """Hapus entri (hanya bisa untuk mode dict; Bloom filter tidak mendukung hapus)."""
+        with self._lock:
+            self._exact.pop(kunci, None)
+
+    def clear(self):
+        with self._lock:
+            self._exact.clear()
+            self._generasi = []
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data["exact_entries"] = len(self._exact)
+            data["bloom_generations"] = len(self._generasi)
+            data["bloom_items"] = sum(b.jumlah_item for _, b in self._generasi)
+        total = data["hits"] + data["misses"]
+        data["hit_rate"] = round(data["hits"] / total, 3) if total else 0.0
+        return data
+
+
+# Satu cache negatif untuk seluruh proses (pencarian kosong & resep 404)
+negative_cache = NegativeCache()
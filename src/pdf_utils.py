@@ -5,8 +5,8 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Page
 from reportlab.lib import colors
 from reportlab.pdfgen import canvas
 from bs4 import BeautifulSoup
-import requests
 from io import BytesIO
+from src.http_session import http_get
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import os
@@ -204,7 +204,7 @@ def generate_pdf_bytes(resep_data):
         image_url = resep_data.get('image')
         if image_url:
             try:
-                response = requests.get(image_url, timeout=5)
+                response = http_get(image_url, endpoint="image")
                 if response.status_code == 200:
                     img_data = BytesIO(response.content)
                     # Tentukan ukuran gambar
@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# --- KONFIGURASI ---
+# Laju request lokal ke Spoonacular (token per detik) dan ukuran burst
+RATE_PER_SEC = float(os.environ.get("SPOONACULAR_RATE_PER_SEC", 5))
+BURST = int(os.environ.get("SPOONACULAR_BURST", 10))
+# Berapa lama boleh menunggu token sebelum menyerah (detik)
+MAX_TUNGGU_TOKEN = float(os.environ.get("SPOONACULAR_MAX_WAIT", 2))
+# Circuit breaker: jumlah gagal beruntun sebelum "open", dan lama open (detik)
+BATAS_GAGAL = int(os.environ.get("SPOONACULAR_BREAKER_FAILURES", 5))
+COOLDOWN_GAGAL = float(os.environ.get("SPOONACULAR_BREAKER_COOLDOWN", 30))
+COOLDOWN_429 = float(os.environ.get("SPOONACULAR_429_COOLDOWN", 60))
+
+
+class PermintaanDitolak(Exception):
+    """Request tidak dikirim karena kuota habis / breaker terbuka / rate limit lokal."""
+
+
+def detik_sampai_reset_kuota():
+    """Kuota harian Spoonacular di-reset setiap tengah malam UTC."""
+    sekarang = datetime.now(timezone.utc)
+    besok = (sekarang + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (besok - sekarang).total_seconds()
+
+
+class TokenBucket:
+    """Token bucket klasik: `laju` token/detik, maksimal `kapasitas` token."""
+
+    def __init__(self, laju, kapasitas):
+        self.laju = laju
+        self.kapasitas = kapasitas
+        self._token = float(kapasitas)
+        self._terakhir = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _isi_ulang(self):
+        sekarang = time.monotonic()
+        self._token = min(self.kapasitas, self._token + (sekarang - self._terakhir) * self.laju)
+        self._terakhir = sekarang
+
+    def ambil(self, max_tunggu=0.0):
+        """Ambil satu token; tunggu paling lama `max_tunggu` detik. True jika berhasil."""
+        batas = time.monotonic() + max_tunggu
+        while True:
+            with self._lock:
+                self._isi_ulang()
+                if self._token >= 1:
+                    self._token -= 1
+                    return True
+                tunggu = (1 - self._token) / self.laju
+            if time.monotonic() + tunggu > batas:
+                return False
+            time.sleep(tunggu)
+
+    def status(self):
+        with self._lock:
+            self._isi_ulang()
+            return {"tokens": round(self._token, 2), "rate_per_sec": self.laju, "capacity": self.kapasitas}
+
+
+class CircuitBreaker:
+    """
+    Tiga keadaan:
+    - closed: request jalan normal
+    - open: semua request langsung ditolak sampai `buka_sampai`
+    - half_open: setelah cooldown, satu request percobaan diizinkan;
+      jika sukses kembali closed, jika gagal open lagi
+    """
+
+    def __init__(self, batas_gagal=BATAS_GAGAL, cooldown=COOLDOWN_GAGAL):
+        self.batas_gagal = batas_gagal
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._gagal_beruntun = 0
+        self._buka_sampai = 0.0
+        self._alasan = ""
+        self._percobaan_berjalan = False
+
+    def izinkan(self):
+        with self._lock:
+            if self._state == "open":
+                if time.time() < self._buka_sampai:
+                    return False
+                self._state = "half_open"
+                self._percobaan_berjalan = False
+            if self._state == "half_open":
+                if self._percobaan_berjalan:
+                    return False
+                self._percobaan_berjalan = True
+            return True
+
+    def buka(self, durasi, alasan):
+        with self._lock:
+            self._state = "open"
+            self._buka_sampai = max(self._buka_sampai, time.time() + durasi)
+            self._alasan = alasan
+            self._percobaan_berjalan = False
+
+    def sukses(self):
+        with self._lock:
+            self._state = "closed"
+            self._gagal_beruntun = 0
+            self._alasan = ""
+            self._percobaan_berjalan = False
+
+    def batal(self):
+        """Melepas slot percobaan half-open tanpa menghitungnya sebagai gagal."""
+        with self._lock:
+            self._percobaan_berjalan = False
+
+    def gagal(self, alasan):
+        with self._lock:
+            self._gagal_beruntun += 1
+            buka = self._state == "half_open" or self._gagal_beruntun >= self.batas_gagal
+        if buka:
+            self.buka(self.cooldown, alasan)
+        else:
+            with self._lock:
+                self._percobaan_berjalan = False
+
+    def status(self):
+        with self._lock:
+            sisa = max(0.0, self._buka_sampai - time.time()) if self._state == "open" else 0.0
+            return {
+                "state": self._state,
+                "consecutive_failures": self._gagal_beruntun,
+                "open_for_sec": round(sisa, 1),
+                "reason": self._alasan,
+            }
+
+
+class SpoonacularGuard:
+    """
+    Gabungan token bucket + circuit breaker + pelacak kuota Spoonacular.
+    Dipanggil sebelum setiap request (`sebelum_request`) dan setelah
+    respons/exception (`catat_respons` / `catat_gagal`).
+    """
+
+    def __init__(self):
+        self.bucket = TokenBucket(RATE_PER_SEC, BURST)
+        self.breaker = CircuitBreaker()
+        self._lock = threading.Lock()
+        self._kuota = {"used": None, "left": None, "last_request_cost": None, "updated_at": None}
+        self._stats = {"allowed": 0, "rejected_breaker": 0, "rejected_rate": 0}
+
+    def sebelum_request(self):
+        """Melempar PermintaanDitolak jika request tidak boleh dikirim sekarang."""
+        if not self.breaker.izinkan():
+            with self._lock:
+                self._stats["rejected_breaker"] += 1
+            raise PermintaanDitolak(f"circuit breaker terbuka ({self.breaker.status()['reason']})")
+        if not self.bucket.ambil(MAX_TUNGGU_TOKEN):
+            with self._lock:
+                self._stats["rejected_rate"] += 1
+            # Token habis bukan salah server; lepaskan slot percobaan half-open
+            self.breaker.batal()
+            raise PermintaanDitolak("rate limit lokal tercapai")
+        with self._lock:
+            self._stats["allowed"] += 1
+
+    def catat_respons(self, response):
+        """Membaca header kuota dan status HTTP untuk memperbarui breaker."""
+        headers = getattr(response, "headers", {}) or {}
+        kuota = {}
+        for kunci, header in (("used", "X-API-Quota-Used"), ("left", "X-API-Quota-Left"),
+                              ("last_request_cost", "X-API-Quota-Request")):
+            try:
+                if header in headers:
+                    kuota[kunci] = float(headers[header])
+            except (TypeError, ValueError):
+                pass
+        if kuota:
+            with self._lock:
+                self._kuota.update(kuota)
+                self._kuota["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        status = getattr(response, "status_code", 0)
+        if status == 402:
+            self.breaker.buka(detik_sampai_reset_kuota(), "kuota harian habis (402)")
+        elif status == 429:
+            self.breaker.buka(COOLDOWN_429, "terlalu banyak request (429)")
+        elif status >= 500:
+            self.breaker.gagal(f"error server {status}")
+        else:
+            self.breaker.sukses()
+            sisa = kuota.get("left")
+            biaya = kuota.get("last_request_cost") or 1
+            if sisa is not None and sisa < biaya:
+                # Request berikutnya pasti ditolak server, jadi tolak dari sini saja
+                self.breaker.buka(detik_sampai_reset_kuota(), "sisa kuota harian habis")
+
+    def catat_gagal(self, error):
+        """Timeout / koneksi putus dihitung sebagai kegagalan breaker."""
+        self.breaker.gagal(f"{type(error).__name__}")
+
+    def status(self):
+        with self._lock:
+            data = {"quota": dict(self._kuota), "requests": dict(self._stats)}
+        data["breaker"] = self.breaker.status()
+        data["bucket"] = self.bucket.status()
+        return data
+
+
+# Satu guard untuk seluruh proses (semua sesi Streamlit berbagi kuota yang sama)
+spoonacular_guard = SpoonacularGuard()
@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# --- KONFIGURASI CACHE ---
+DATA_FOLDER = 'data'
+CACHE_DB = os.path.join(DATA_FOLDER, 'recipe_cache.db')
+
+# Detail resep jarang berubah, jadi TTL default dibuat panjang (7 hari)
+DETAIL_TTL = int(os.environ.get("RECIPE_CACHE_TTL", 7 * 24 * 3600))
+# Batas jumlah resep yang disimpan; kalau lewat, yang paling lama tidak dipakai dibuang (LRU)
+DETAIL_MAX_ENTRIES = int(os.environ.get("RECIPE_CACHE_MAX_ENTRIES", 2000))
+
+
+class SQLiteCache:
+    """
+    Cache key-value berbasis SQLite yang dipakai bersama oleh semua sesi
+    Streamlit (dan semua proses) yang membuka file database yang sama.
+
+    - TTL: entri yang lebih tua dari `ttl` detik dianggap kadaluarsa.
+    - LRU: setiap hit memperbarui `last_access`; jika jumlah entri melebihi
+      `max_entri`, entri dengan `last_access` paling lama dibuang.
+    - Counter hit/miss disimpan per proses dan bisa dilihat lewat `stats()`.
+    """
+
+    def __init__(self, tabel, ttl, max_entri, path=CACHE_DB):
+        self.tabel = tabel
+        self.ttl = ttl
+        self.max_entri = max_entri
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stats = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+
+    def _koneksi(self):
+        """Membuka koneksi (sekali saja) dan membuat tabel jika belum ada."""
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            # WAL supaya pembaca tidak terblokir oleh penulis dari proses lain
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.tabel} ("
+                " kunci TEXT PRIMARY KEY,"
+                " nilai TEXT NOT NULL,"
+                " dibuat REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.tabel}_access ON {self.tabel} (last_access)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, kunci, izinkan_kadaluarsa=False):
+        """
+        Mengambil nilai dari cache. Mengembalikan None jika tidak ada
+        atau sudah kadaluarsa (kecuali `izinkan_kadaluarsa=True`).
+        """
+        kunci = str(kunci)
+        sekarang = time.time()
+        try:
+            with self._lock:
+                conn = self._koneksi()
+                row = conn.execute(
+                    f"SELECT nilai, dibuat FROM {self.tabel} WHERE kunci = ?", (kunci,)
+                ).fetchone()
+                if row is None or (not izinkan_kadaluarsa and sekarang - row[1] > self.ttl):
+                    self._stats["misses"] += 1
+                    return None
+                conn.execute(
+                    f"UPDATE {self.tabel} SET last_access = ? WHERE kunci = ?", (sekarang, kunci)
+                )
+                conn.commit()
+                self._stats["hits"] += 1
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error membaca cache {self.tabel}: {e}")
+            return None
+
+    def get_many(self, daftar_kunci, izinkan_kadaluarsa=False):
+        """
+        Versi bulk dari `get`: satu query untuk banyak kunci.
+        Mengembalikan dict {kunci: nilai} hanya untuk kunci yang hit.
+        """
+        daftar_kunci = [str(k) for k in daftar_kunci]
+        if not daftar_kunci:
+            return {}
+        sekarang = time.time()
+        hasil = {}
+        try:
+            with self._lock:
+                conn = self._koneksi()
+                # SQLite membatasi jumlah parameter, jadi query dipecah per 500 kunci
+                for i in range(0, len(daftar_kunci), 500):
+                    potongan = daftar_kunci[i:i + 500]
+                    tanda = ",".join("?" * len(potongan))
+                    rows = conn.execute(
+                        f"SELECT kunci, nilai, dibuat FROM {self.tabel} WHERE kunci IN ({tanda})",
+                        potongan,
+                    ).fetchall()
+                    for kunci, nilai, dibuat in rows:
+                        if izinkan_kadaluarsa or sekarang - dibuat <= self.ttl:
+                            hasil[kunci] = nilai
+                if hasil:
+                    conn.executemany(
+                        f"UPDATE {self.tabel} SET last_access = ? WHERE kunci = ?",
+                        [(sekarang, k) for k in hasil],
+                    )
+                    conn.commit()
+                self._stats["hits"] += len(hasil)
+                self._stats["misses"] += len(set(daftar_kunci)) - len(hasil)
+            return {k: json.loads(v) for k, v in hasil.items()}
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error membaca cache {self.tabel}: {e}")
+            return {}
+
+    def set(self, kunci, nilai):
+        """Menyimpan nilai (harus bisa di-serialize ke JSON) lalu menjalankan eviksi LRU."""
+        sekarang = time.time()
+        try:
+            teks = json.dumps(nilai, ensure_ascii=False)
+            with self._lock:
+                conn = self._koneksi()
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.tabel} (kunci, nilai, dibuat, last_access)"
+                    " VALUES (?, ?, ?, ?)",
+                    (str(kunci), teks, sekarang, sekarang),
+                )
+                self._stats["sets"] += 1
+                self._evict(conn)
+                conn.commit()
+            return True
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Error menulis cache {self.tabel}: {e}")
+            return False
+
+    def _evict(self, conn):
+        """Membuang entri yang paling lama tidak diakses jika melebihi batas."""
+        jumlah = conn.execute(f"SELECT COUNT(*) FROM {self.tabel}").fetchone()[0]
+        lebih = jumlah - self.max_entri
+        if lebih > 0:
+            conn.execute(
+                f"DELETE FROM {self.tabel} WHERE kunci IN ("
+                f" SELECT kunci FROM {self.tabel} ORDER BY last_access ASC LIMIT ?)",
+                (lebih,),
+            )
+            self._stats["evictions"] += lebih
+
+    def delete(self, kunci):
+        try:
+            with self._lock:
+                conn = self._koneksi()
+                conn.execute(f"DELETE FROM {self.tabel} WHERE kunci = ?", (str(kunci),))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error menghapus cache {self.tabel}: {e}")
+
+    def clear(self):
+        try:
+            with self._lock:
+                conn = self._koneksi()
+                conn.execute(f"DELETE FROM {self.tabel}")
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error mengosongkan cache {self.tabel}: {e}")
+
+    def stats(self):
+        """Statistik cache: hit, miss, hit rate, jumlah entri, dll."""
+        with self._lock:
+            data = dict(self._stats)
+            try:
+                data["entries"] = self._koneksi().execute(
+                    f"SELECT COUNT(*) FROM {self.tabel}"
+                ).fetchone()[0]
+            except sqlite3.Error:
+                data["entries"] = None
+        total = data["hits"] + data["misses"]
+        data["hit_rate"] = round(data["hits"] / total, 3) if total else 0.0
+        return data
+
+
+# Cache detail resep (key = ID resep) yang dipakai oleh api_client
+detail_cache = SQLiteCache("recipe_detail", ttl=DETAIL_TTL, max_entri=DETAIL_MAX_ENTRIES)
+
+
+def get_cached_recipe(recipe_id, izinkan_kadaluarsa=False):
+    return detail_cache.get(int(recipe_id), izinkan_kadaluarsa=izinkan_kadaluarsa)
+
+
+def get_cached_recipes(daftar_id, izinkan_kadaluarsa=False):
+    """Mengembalikan dict {id (int): detail} untuk resep yang ada di cache."""
+    hasil = detail_cache.get_many((int(rid) for rid in daftar_id), izinkan_kadaluarsa=izinkan_kadaluarsa)
+    return {int(k): v for k, v in hasil.items()}
+
+
+def set_cached_recipe(recipe_id, data):
+    return detail_cache.set(int(recipe_id), data)
+
+
+def get_cache_stats():
+    return detail_cache.stats()
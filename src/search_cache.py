@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.recipe_cache import SQLiteCache
+
+# --- KONFIGURASI CACHE PENCARIAN ---
+# Hasil pencarian lebih cepat basi daripada detail resep, jadi TTL-nya lebih pendek
+SEARCH_TTL = int(os.environ.get("SEARCH_CACHE_TTL", 6 * 3600))
+SEARCH_MEMORY_MAX = int(os.environ.get("SEARCH_CACHE_MEMORY_MAX", 256))
+SEARCH_DISK_MAX = int(os.environ.get("SEARCH_CACHE_DISK_MAX", 5000))
+
+
+class MemoryCache:
+    """
+    Cache LRU di memori (OrderedDict) dengan TTL.
+    Nilai disimpan apa adanya (tanpa serialisasi), jadi anggap read-only.
+    """
+
+    def __init__(self, ttl, max_entri):
+        self.ttl = ttl
+        self.max_entri = max_entri
+        self._data = OrderedDict()  # kunci -> (waktu_simpan, nilai)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, kunci, izinkan_kadaluarsa=False):
+        with self._lock:
+            item = self._data.get(kunci)
+            if item is None or (not izinkan_kadaluarsa and time.time() - item[0] > self.ttl):
+                self._stats["misses"] += 1
+                return None
+            self._data.move_to_end(kunci)
+            self._stats["hits"] += 1
+            return item[1]
+
+    def set(self, kunci, nilai, waktu=None):
+        with self._lock:
+            self._data[kunci] = (waktu or time.time(), nilai)
+            self._data.move_to_end(kunci)
+            while len(self._data) > self.max_entri:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def delete(self, kunci):
+        with self._lock:
+            self._data.pop(kunci, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data["entries"] = len(self._data)
+        total = data["hits"] + data["misses"]
+        data["hit_rate"] = round(data["hits"] / total, 3) if total else 0.0
+        return data
+
+
+class TieredCache:
+    """
+    Cache dua tingkat: memori (cepat, per proses) lalu disk SQLite
+    (dipakai bersama antar proses & bertahan setelah restart).
+    Hit di disk dipromosikan ke memori.
+    """
+
+    def __init__(self, memori, disk):
+        self.memori = memori
+        self.disk = disk
+
+    def get(self, kunci, izinkan_kadaluarsa=False):
+        nilai = self.memori.get(kunci, izinkan_kadaluarsa=izinkan_kadaluarsa)
+        if nilai is not None:
+            return nilai
+        nilai = self.disk.get(kunci, izinkan_kadaluarsa=izinkan_kadaluarsa)
+        if nilai is not None:
+            self.memori.set(kunci, nilai)
+        return nilai
+
+    def set(self, kunci, nilai):
+        self.memori.set(kunci, nilai)
+        self.disk.set(kunci, nilai)
+
+    def delete(self, kunci):
+        self.memori.delete(kunci)
+        self.disk.delete(kunci)
+
+    def clear(self):
+        self.memori.clear()
+        self.disk.clear()
+
+    def stats(self):
+        return {"memory": self.memori.stats(), "disk": self.disk.stats()}
+
+
+# Cache hasil complexSearch, dipakai tab "Cari Menu" dan ai_search_recipes
+search_cache = TieredCache(
+    MemoryCache(ttl=SEARCH_TTL, max_entri=SEARCH_MEMORY_MAX),
+    SQLiteCache("search_results", ttl=SEARCH_TTL, max_entri=SEARCH_DISK_MAX),
+)
+
+
+def get_search_cache_stats():
+    return search_cache.stats()
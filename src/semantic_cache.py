@@ -0,0 +1,180 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# --- KONFIGURASI CACHE JAWABAN CHEF AI ---
+# Kemiripan minimal (Jaccard n-gram karakter, 0..1) agar jawaban lama dipakai ulang
+SEMANTIC_THRESHOLD = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", 0.6))
+SEMANTIC_MAX_ENTRIES = int(os.environ.get("SEMANTIC_CACHE_MAX", 1000))
+SEMANTIC_TTL = int(os.environ.get("SEMANTIC_CACHE_TTL", 7 * 24 * 3600))
+# Setiap kata penting di satu pertanyaan harus punya padanan di pertanyaan lain
+# dengan kemiripan minimal ini ("ganti" ~ "pengganti", tapi "nasi" != "mie")
+TOKEN_MIN = 0.6
+
+NGRAM = 3
+JUMLAH_HASH = 64
+# 32 band x 2 baris: pasangan dengan Jaccard >= 0.4 hampir pasti jadi kandidat,
+# lalu kemiripan sebenarnya dihitung ulang secara tepat
+LSH_BAND = 32
+LSH_BARIS = JUMLAH_HASH // LSH_BAND
+_PRIMA = (1 << 61) - 1
+
+# Kata tanya & kata sambung yang tidak mengubah maksud pertanyaan
+STOPWORDS = {
+    'apa', 'apakah', 'bagaimana', 'gimana', 'berapa', 'cara', 'caranya', 'tolong', 'dong', 'sih',
+    'ya', 'kah', 'nya', 'yang', 'dan', 'atau', 'di', 'ke', 'dari', 'untuk', 'buat', 'dengan',
+    'pada', 'dalam', 'saya', 'aku', 'kamu', 'bisa', 'mau', 'ingin', 'ini', 'itu', 'the', 'a',
+    'an', 'to', 'of', 'for', 'how', 'what', 'is', 'can', 'i',
+    # singkatan yang sering dipakai saat chat
+    'utk', 'yg', 'dgn', 'dg', 'gmn', 'bgmn', 'gk', 'sy', 'aja',
+}
+
+
+def _koefisien(i):
+    """Pasangan (a, b) deterministik untuk fungsi hash ke-i: (a*x + b) mod p."""
+    d = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+    return (int.from_bytes(d[:8], "big") % (_PRIMA - 1)) + 1, int.from_bytes(d[8:], "big") % _PRIMA
+
+
+_KOEF = [_koefisien(i) for i in range(JUMLAH_HASH)]
+
+
+def normalisasi(teks):
+    """Huruf kecil, buang tanda baca & stopword. Hasil: tuple kata penting."""
+    kata = re.findall(r"\w+", (teks or "").lower())
+    penting = tuple(k for k in kata if k not in STOPWORDS)
+    return penting or tuple(kata)
+
+
+def _shingle_kata(kata):
+    k = f" {kata} "
+    return {k[i:i + NGRAM] for i in range(max(1, len(k) - NGRAM + 1))}
+
+
+def _shingle(token):
+    hasil = set()
+    for kata in token:
+        hasil |= _shingle_kata(kata)
+    return hasil
+
+
+def _minhash(shingle):
+    nilai = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingle]
+    return tuple(min((a * x + b) % _PRIMA for x in nilai) for a, b in _KOEF)
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def _kata_tertutup(token_a, token_b):
+    """True jika setiap kata di token_a punya padanan mirip di token_b."""
+    for ka in token_a:
+        sa = _shingle_kata(ka)
+        if not any(len(sa & sb) / min(len(sa), len(sb)) >= TOKEN_MIN
+                   for sb in (_shingle_kata(kb) for kb in token_b)):
+            return False
+    return True
+
+
+class SemanticCache:
+    """
+    Cache jawaban berdasarkan kemiripan pertanyaan, tanpa layanan embedding.
+
+    Pertanyaan dinormalisasi (huruf kecil, tanpa stopword), dipecah jadi
+    n-gram karakter, lalu diringkas dengan MinHash. Index LSH (band dari
+    signature MinHash) dipakai untuk mencari kandidat tanpa membandingkan
+    semua entri; kandidat kemudian diverifikasi dengan Jaccard n-gram yang
+    tepat (>= threshold) dan pencocokan per kata. Entri dibatasi jumlahnya
+    (LRU) dan kadaluarsa setelah TTL. Dipakai bersama oleh semua user.
+    """
+
+    def __init__(self, threshold=SEMANTIC_THRESHOLD, max_entri=SEMANTIC_MAX_ENTRIES, ttl=SEMANTIC_TTL):
+        self.threshold = threshold
+        self.max_entri = max_entri
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entri = OrderedDict()  # token -> {"shingle", "signature", "jawaban", "waktu"}
+        self._band = {}              # (no_band, potongan_signature) -> set(token)
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _kunci_band(self, signature):
+        return [(i, signature[i * LSH_BARIS:(i + 1) * LSH_BARIS]) for i in range(LSH_BAND)]
+
+    def _hapus(self, token):
+        entri = self._entri.pop(token, None)
+        if entri is None:
+            return
+        for kunci in self._kunci_band(entri["signature"]):
+            grup = self._band.get(kunci)
+            if grup is not None:
+                grup.discard(token)
+                if not grup:
+                    del self._band[kunci]
+
+    def cari(self, pertanyaan):
+        """Mengembalikan (jawaban, skor) dari pertanyaan lama yang paling mirip, atau (None, 0.0)."""
+        token = normalisasi(pertanyaan)
+        if not token:
+            return None, 0.0
+        shingle = _shingle(token)
+        signature = _minhash(shingle)
+        sekarang = time.time()
+        with self._lock:
+            kandidat = set()
+            for kunci in self._kunci_band(signature):
+                kandidat |= self._band.get(kunci, set())
+
+            terbaik, skor_terbaik = None, 0.0
+            for tk in kandidat:
+                entri = self._entri[tk]
+                if sekarang - entri["waktu"] > self.ttl:
+                    self._hapus(tk)
+                    continue
+                skor = 1.0 if tk == token else _jaccard(shingle, entri["shingle"])
+                if (skor >= self.threshold and skor > skor_terbaik
+                        and _kata_tertutup(token, tk) and _kata_tertutup(tk, token)):
+                    terbaik, skor_terbaik = tk, skor
+
+            if terbaik is None:
+                self._stats["misses"] += 1
+                return None, 0.0
+            self._entri.move_to_end(terbaik)
+            self._stats["hits"] += 1
+            return self._entri[terbaik]["jawaban"], round(skor_terbaik, 3)
+
+    def simpan(self, pertanyaan, jawaban):
+        token = normalisasi(pertanyaan)
+        if not token or not jawaban:
+            return
+        shingle = _shingle(token)
+        signature = _minhash(shingle)
+        with self._lock:
+            self._hapus(token)
+            self._entri[token] = {"shingle": shingle, "signature": signature,
+                                  "jawaban": jawaban, "waktu": time.time()}
+            for kunci in self._kunci_band(signature):
+                self._band.setdefault(kunci, set()).add(token)
+            while len(self._entri) > self.max_entri:
+                self._hapus(next(iter(self._entri)))
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entri.clear()
+            self._band.clear()
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data["entries"] = len(self._entri)
+        total = data["hits"] + data["misses"]
+        data["hit_rate"] = round(data["hits"] / total, 3) if total else 0.0
+        return data
+
+
+# Satu cache jawaban Chef AI untuk seluruh proses (semua user)
+chef_answer_cache = SemanticCache()
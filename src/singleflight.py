@@ -0,0 +1,116 @@
+import asyncio
+import copy
+import threading
+
+
+class _Panggilan:
+    """Satu request yang sedang berjalan (in-flight) beserta hasilnya."""
+
+    def __init__(self):
+        self.selesai = threading.Event()
+        self.hasil = None
+        self.error = None
+        self.jumlah_penunggu = 0
+
+
+class SingleFlight:
+    """
+    Penggabungan request identik yang sedang berjalan (single-flight).
+
+    Jika beberapa thread (misalnya beberapa sesi Streamlit) memanggil `do`
+    dengan kunci yang sama pada saat bersamaan, hanya thread pertama yang
+    benar-benar menjalankan fungsi. Thread lain menunggu lalu menerima
+    salinan hasil yang sama (atau exception yang sama).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._berjalan = {}
+        self._stats = {"calls": 0, "executed": 0, "coalesced": 0}
+
+    def do(self, kunci, fungsi, *args, **kwargs):
+        with self._lock:
+            self._stats["calls"] += 1
+            panggilan = self._berjalan.get(kunci)
+            if panggilan is not None:
+                # Sudah ada request yang sama: ikut menunggu saja
+                panggilan.jumlah_penunggu += 1
+                self._stats["coalesced"] += 1
+                pemimpin = False
+            else:
+                panggilan = _Panggilan()
+                self._berjalan[kunci] = panggilan
+                self._stats["executed"] += 1
+                pemimpin = True
+
+        if not pemimpin:
+            panggilan.selesai.wait()
+            if panggilan.error is not None:
+                raise panggilan.error
+            # Salinan supaya sesi lain tidak ikut terubah jika hasilnya dimodifikasi
+            return copy.deepcopy(panggilan.hasil)
+
+        try:
+            panggilan.hasil = fungsi(*args, **kwargs)
+            return panggilan.hasil
+        except BaseException as e:
+            panggilan.error = e
+            raise
+        finally:
+            with self._lock:
+                self._berjalan.pop(kunci, None)
+            panggilan.selesai.set()
+
+    def stats(self):
+        """Jumlah panggilan, yang benar-benar dieksekusi, dan yang digabung."""
+        with self._lock:
+            data = dict(self._stats)
+            data["in_flight"] = len(self._berjalan)
+        data["coalesce_rate"] = round(data["coalesced"] / data["calls"], 3) if data["calls"] else 0.0
+        return data
+
+
+class AsyncSingleFlight:
+    """
+    Versi asyncio dari SingleFlight untuk satu event loop (kunci -> Task).
+
+    Coroutine pertama untuk sebuah kunci dijalankan sebagai Task; pemanggil
+    lain dengan kunci yang sama menunggu Task itu dan menerima salinan
+    hasilnya. Task dibungkus asyncio.shield, jadi pemanggil yang dibatalkan
+    (misalnya kena wait_for) tidak ikut membatalkan request milik pemanggil lain.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()   # hanya untuk stats() yang dipanggil dari thread lain
+        self._berjalan = {}
+        self._stats = {"calls": 0, "executed": 0, "coalesced": 0}
+
+    async def do(self, kunci, fungsi, *args, **kwargs):
+        with self._lock:
+            self._stats["calls"] += 1
+            task = self._berjalan.get(kunci)
+            pemimpin = task is None
+            if pemimpin:
+                task = asyncio.ensure_future(fungsi(*args, **kwargs))
+                self._berjalan[kunci] = task
+                self._stats["executed"] += 1
+            else:
+                self._stats["coalesced"] += 1
+        if pemimpin:
+            task.add_done_callback(lambda selesai: self._lepas(kunci, selesai))
+            return await asyncio.shield(task)
+        # Salinan supaya pemanggil lain tidak ikut terubah jika hasilnya dimodifikasi
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def _lepas(self, kunci, task):
+        with self._lock:
+            if self._berjalan.get(kunci) is task:
+                del self._berjalan[kunci]
+
+    def stats(self):
+        """Jumlah panggilan, yang benar-benar dieksekusi, dan yang digabung."""
+        with self._lock:
+            data = dict(self._stats)
+            data["in_flight"] = len(self._berjalan)
+        data["coalesce_rate"] = round(data["coalesced"] / data["calls"], 3) if data["calls"] else 0.0
+        return data
@@ -0,0 +1,321 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# --- STORAGE DATA USER (AKUN, BOOKMARK, HISTORY, CHAT) ---
+# "sqlite": satu database data/app.db (WAL, tabel ber-index per user)
+# "json"  : file JSON lama (bookmarks.json, history.json, ai_chats/*.jsonl)
+# Dibaca setiap panggilan, jadi bisa diganti saat runtime (misal untuk benchmark).
+# Akun user (tabel users) selalu di SQLite, lihat src/data_manager.py.
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "sqlite").lower()
+
+DATA_FOLDER = 'data'
+STORAGE_DB = os.path.join(DATA_FOLDER, 'app.db')
+BOOKMARK_JSON = os.path.join(DATA_FOLDER, 'bookmarks.json')
+HISTORY_JSON = os.path.join(DATA_FOLDER, 'history.json')
+CHAT_LEGACY_JSON = os.path.join(DATA_FOLDER, 'ai_chats.json')
+CHAT_DIR = os.path.join(DATA_FOLDER, 'ai_chats')
+
+_SKEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    kunci TEXT PRIMARY KEY,
+    nilai TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bookmarks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    recipe_id INTEGER NOT NULL,
+    UNIQUE (username, recipe_id)
+);
+CREATE INDEX IF NOT EXISTS idx_bookmarks_user ON bookmarks (username, id);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    recipe_id INTEGER NOT NULL,
+    viewed_at TEXT NOT NULL,
+    UNIQUE (username, recipe_id)
+);
+CREATE INDEX IF NOT EXISTS idx_history_user ON history (username, id);
+CREATE TABLE IF NOT EXISTS chats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chats_user ON chats (username, id);
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    created_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def pakai_sqlite():
+    return STORAGE_BACKEND == "sqlite"
+
+
+class SQLiteStorage:
+    """
+    Penyimpanan data per user di satu file SQLite.
+
+    Setiap operasi hanya menyentuh baris milik satu user lewat index
+    (username, id), jadi biayanya tidak bergantung pada jumlah total user.
+    Urutan disimpan lewat kolom id (AUTOINCREMENT): bookmark urut saat
+    ditambahkan, history & chat urut dari id terbesar = terbaru.
+
+    Saat pertama dibuka, data JSON lama dimigrasikan sekali (lihat
+    `migrasi_dari_json`); penanda disimpan di tabel meta.
+    """
+
+    def __init__(self, path=STORAGE_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _koneksi(self):
+        """
+        Membuka koneksi (sekali saja), membuat tabel, lalu migrasi JSON jika belum.
+        Koneksi baru dipakai setelah migrasi ter-commit; jika gagal, transaksi
+        di-rollback dan migrasi dicoba lagi pada pemanggilan berikutnya.
+        """
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            try:
+                # WAL supaya pembaca tidak terblokir oleh penulis dari proses lain
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(_SKEMA)
+                conn.commit()
+                if conn.execute("SELECT 1 FROM meta WHERE kunci = 'migrated_json'").fetchone() is None:
+                    self._migrasi(conn)
+            except BaseException:
+                conn.rollback()
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    # --- AKUN ---
+    def user_ambil_hash(self, username):
+        """Hash password user (lookup lewat primary key), atau None jika tidak ada."""
+        with self._lock:
+            row = self._koneksi().execute(
+                "SELECT password_hash FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def user_tambah(self, username, password_hash):
+        """Insert atomik: False jika username sudah ada (termasuk dari proses lain)."""
+        with self._lock:
+            conn = self._koneksi()
+            try:
+                conn.execute("INSERT INTO users (username, password_hash, created_at) VALUES (?, ?, ?)",
+                             (username, password_hash, time.time()))
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                return False
+            conn.commit()
+            return True
+
+    def user_tambah_banyak(self, baris):
+        """Insert batch [(username, hash), ...]; username yang sudah ada dilewati. Jumlah yang masuk."""
+        sekarang = time.time()
+        with self._lock:
+            conn = self._koneksi()
+            sebelum = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO users (username, password_hash, created_at) VALUES (?, ?, ?)",
+                             [(u, h, sekarang) for u, h in baris])
+            conn.commit()
+            return conn.total_changes - sebelum
+
+    def user_jumlah(self):
+        with self._lock:
+            return self._koneksi().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def meta_ambil(self, kunci):
+        with self._lock:
+            row = self._koneksi().execute("SELECT nilai FROM meta WHERE kunci = ?", (kunci,)).fetchone()
+        return row[0] if row else None
+
+    def meta_set(self, kunci, nilai):
+        with self._lock:
+            conn = self._koneksi()
+            conn.execute("INSERT OR REPLACE INTO meta (kunci, nilai) VALUES (?, ?)", (kunci, str(nilai)))
+            conn.commit()
+
+    # --- BOOKMARK ---
+    def bookmark_tambah(self, username, recipe_id):
+        """True jika ditambahkan, False jika sudah ada."""
+        with self._lock:
+            conn = self._koneksi()
+            cur = conn.execute("INSERT OR IGNORE INTO bookmarks (username, recipe_id) VALUES (?, ?)",
+                               (username, recipe_id))
+            conn.commit()
+            return cur.rowcount > 0
+
+    def bookmark_hapus(self, username, recipe_id):
+        with self._lock:
+            conn = self._koneksi()
+            cur = conn.execute("DELETE FROM bookmarks WHERE username = ? AND recipe_id = ?",
+                               (username, recipe_id))
+            conn.commit()
+            return cur.rowcount > 0
+
+    def bookmark_daftar(self, username):
+        with self._lock:
+            rows = self._koneksi().execute(
+                "SELECT recipe_id FROM bookmarks WHERE username = ? ORDER BY id", (username,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def bookmark_ada_banyak(self, username, daftar_id):
+        """Subset dari daftar_id yang sudah di-bookmark user (lookup lewat index UNIQUE)."""
+        daftar_id = list(daftar_id)
+        ada = set()
+        with self._lock:
+            conn = self._koneksi()
+            # SQLite membatasi jumlah parameter, jadi query dipecah per 500 ID
+            for i in range(0, len(daftar_id), 500):
+                potongan = daftar_id[i:i + 500]
+                tanda = ",".join("?" * len(potongan))
+                ada.update(r[0] for r in conn.execute(
+                    f"SELECT recipe_id FROM bookmarks WHERE username = ? AND recipe_id IN ({tanda})",
+                    [username] + potongan,
+                ))
+        return ada
+
+    # --- HISTORY ---
+    def history_ganti(self, per_user):
+        """
+        Menimpa history beberapa user sekaligus dalam satu transaksi.
+        per_user: {username: [(recipe_id, viewed_at), ...] dari yang terlama}.
+        """
+        with self._lock:
+            conn = self._koneksi()
+            for username, daftar in per_user.items():
+                conn.execute("DELETE FROM history WHERE username = ?", (username,))
+                conn.executemany("INSERT INTO history (username, recipe_id, viewed_at) VALUES (?, ?, ?)",
+                                 [(username, rid, waktu) for rid, waktu in daftar])
+            conn.commit()
+
+    def history_daftar(self, username):
+        """[{"recipe_id", "viewed_at"}, ...] dari yang terbaru."""
+        with self._lock:
+            rows = self._koneksi().execute(
+                "SELECT recipe_id, viewed_at FROM history WHERE username = ? ORDER BY id DESC", (username,)
+            ).fetchall()
+        return [{"recipe_id": rid, "viewed_at": waktu} for rid, waktu in rows]
+
+    # --- CHAT ---
+    def chat_tambah(self, username, entri, batas):
+        with self._lock:
+            conn = self._koneksi()
+            conn.execute("INSERT INTO chats (username, data) VALUES (?, ?)",
+                         (username, json.dumps(entri, ensure_ascii=False)))
+            self._pangkas(conn, "chats", username, batas)
+            conn.commit()
+
+    def chat_ekor(self, username, n):
+        """n pesan terakhir, urut dari yang terlama."""
+        with self._lock:
+            rows = self._koneksi().execute(
+                "SELECT data FROM chats WHERE username = ? ORDER BY id DESC LIMIT ?", (username, n)
+            ).fetchall()
+        return [json.loads(r[0]) for r in reversed(rows)]
+
+    def chat_hapus(self, username):
+        with self._lock:
+            conn = self._koneksi()
+            cur = conn.execute("DELETE FROM chats WHERE username = ?", (username,))
+            conn.commit()
+            return cur.rowcount > 0
+
+    @staticmethod
+    def _pangkas(conn, tabel, username, batas):
+        """Hapus baris user di luar `batas` terbaru (lewat index, tanpa scan tabel)."""
+        conn.execute(
+            f"DELETE FROM {tabel} WHERE username = ? AND id <= ("
+            f" SELECT id FROM {tabel} WHERE username = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (username, username, batas),
+        )
+
+    # --- MIGRASI ---
+    def migrasi_dari_json(self):
+        """Menjalankan migrasi JSON -> SQLite sekarang (dilewati jika sudah pernah)."""
+        with self._lock:
+            self._koneksi()
+
+    def _migrasi(self, conn):
+        """
+        Salin data/bookmarks.json, data/history.json dan chat (ai_chats/*.jsonl,
+        atau ai_chats.json lama) ke database. File lama tidak diubah.
+        """
+        # Import di sini supaya tidak melingkar (chat_log memakai modul ini)
+        from src import chat_log
+
+        # Kunci tulis sejak awal: proses lain yang migrasi bersamaan menunggu,
+        # lalu melihat penanda di bawah dan tidak menyalin ulang
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute("SELECT 1 FROM meta WHERE kunci = 'migrated_json'").fetchone() is not None:
+            conn.rollback()
+            return
+
+        bookmark = _baca_json(BOOKMARK_JSON)
+        for username, daftar in bookmark.items():
+            conn.executemany("INSERT OR IGNORE INTO bookmarks (username, recipe_id) VALUES (?, ?)",
+                             [(username, rid) for rid in map(_ke_int, daftar) if rid is not None])
+
+        history = _baca_json(HISTORY_JSON)
+        for username, daftar in history.items():
+            # JSON disimpan dari yang terbaru; dimasukkan dari yang terlama supaya id ikut urutan
+            conn.executemany(
+                "INSERT OR IGNORE INTO history (username, recipe_id, viewed_at) VALUES (?, ?, ?)",
+                [(username, rid, item.get("viewed_at", "")) for item in reversed(daftar)
+                 if item.get("recipe_id") and (rid := _ke_int(item["recipe_id"])) is not None],
+            )
+
+        chat = {u: p for u, p in _baca_json(CHAT_LEGACY_JSON).items() if p}
+        if os.path.isdir(CHAT_DIR):
+            for nama in os.listdir(CHAT_DIR):
+                username, ext = os.path.splitext(nama)
+                path = os.path.join(CHAT_DIR, nama)
+                if ext != ".jsonl":
+                    continue
+                if chat_log._path_user(username) != path:
+                    # Nama file berisi hash (username asli tidak bisa dipulihkan)
+                    print(f"Lewati migrasi chat {path}: username tidak diketahui")
+                    continue
+                chat[username] = chat_log._baca_ekor(path, chat_log.MAX_MESSAGES)
+        for username, pesan in chat.items():
+            conn.executemany("INSERT INTO chats (username, data) VALUES (?, ?)",
+                             [(username, json.dumps(p, ensure_ascii=False)) for p in pesan[-chat_log.MAX_MESSAGES:]])
+
+        conn.execute("INSERT OR REPLACE INTO meta (kunci, nilai) VALUES ('migrated_json', '1')")
+        conn.commit()
+
+
+def _ke_int(nilai):
+    """ID resep sebagai int, atau None (dilewati saat migrasi) jika tidak valid."""
+    try:
+        return int(nilai)
+    except (TypeError, ValueError):
+        print(f"Lewati ID resep tidak valid saat migrasi: {nilai!r}")
+        return None
+
+
+def _baca_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+# Satu storage untuk seluruh proses
+storage = SQLiteStorage()
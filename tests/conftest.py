@@ -0,0 +1,77 @@
+"""
+Fixture bersama untuk test.
+
+- `data_dir`: folder kerja sementara berisi data/ kosong. Semua path data di
+  src/ relatif terhadap folder kerja, jadi data asli di repo tidak tersentuh.
+- `mock_server`: mock_spoonacular.py berjalan di port acak (satu per sesi test).
+- `api`: src.api_client yang diarahkan ke mock server, dengan cache, cache
+  negatif, rate limiter dan single-flight baru untuk setiap test.
+"""
+import threading
+
+import pytest
+
+import mock_spoonacular
+from src import api_client, recipe_cache, storage
+from src.negative_cache import NegativeCache
+from src.rate_limiter import SpoonacularGuard
+from src.recipe_cache import SQLiteCache
+from src.search_cache import MemoryCache, TieredCache
+from src.singleflight import SingleFlight
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    return tmp_path / "data"
+
+
+@pytest.fixture
+def sqlite_storage(data_dir, monkeypatch):
+    """SQLiteStorage baru di data/app.db sementara, dipakai sebagai singleton storage."""
+    baru = storage.SQLiteStorage()
+    monkeypatch.setattr(storage, "storage", baru)
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "sqlite")
+    return baru
+
+
+@pytest.fixture(scope="session")
+def mock_server():
+    server = mock_spoonacular.buat_server("127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def mock_state(mock_server):
+    """State mock server (injeksi error, kuota, hitungan request), di-reset per test."""
+    state = mock_server.RequestHandlerClass.state
+    state.latency_ms = state.jitter_ms = 0
+    state.error_rate = state.rate_429 = 0.0
+    state.quota = None
+    state.used = 0.0
+    state.request_count = 0
+    return state
+
+
+@pytest.fixture
+def api(data_dir, mock_server, mock_state, monkeypatch):
+    root = f"http://127.0.0.1:{mock_server.server_address[1]}"
+    monkeypatch.setattr(api_client, "API_KEY", "mock")
+    monkeypatch.setattr(api_client, "BASE_URL", f"{root}/recipes/complexSearch")
+    monkeypatch.setattr(api_client, "RANDOM_URL", f"{root}/recipes/random")
+    monkeypatch.setattr(api_client, "DETAIL_URL", root + "/recipes/{id}/information")
+    monkeypatch.setattr(api_client, "BULK_URL", f"{root}/recipes/informationBulk")
+    monkeypatch.setattr(api_client, "search_cache", TieredCache(
+        MemoryCache(ttl=3600, max_entri=100),
+        SQLiteCache("search_results", ttl=3600, max_entri=100, path=str(data_dir / "cache.db"))))
+    monkeypatch.setattr(api_client, "negative_cache", NegativeCache(ttl=60))
+    monkeypatch.setattr(api_client, "spoonacular_guard", SpoonacularGuard())
+    monkeypatch.setattr(api_client, "_flight", SingleFlight())
+    monkeypatch.setattr(recipe_cache, "detail_cache",
+                        SQLiteCache("recipe_detail", ttl=3600, max_entri=100, path=str(data_dir / "cache.db")))
+    return api_client
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src import ai_helper, api_client_async
+
+
+# --- GABUNG HASIL BANYAK QUERY ---
+def test_top_k_dedupe_dan_urut_rating():
+    hasil = [
+        [{"id": 1, "rating": 3}, {"id": 2, "rating": 5}],
+        [{"id": 2, "rating": 5}, {"id": 3, "rating": 4}, {"id": 4}],
+        None,
+        [{"id": 5, "rating": 5}],
+    ]
+    assert [r["id"] for r in ai_helper._top_k_by_rating(hasil, 3)] == [2, 5, 3]
+    assert [r["id"] for r in ai_helper._top_k_by_rating(hasil, 10)] == [2, 5, 3, 1, 4]
+    assert ai_helper._top_k_by_rating(hasil, 0) == []
+
+
+# --- PENCARIAN PARALEL DENGAN DEADLINE ---
+@pytest.fixture
+def pencarian_palsu(monkeypatch):
+    """cari_resep_async tiruan: bahan 'lambat' butuh 1 detik, lainnya langsung selesai."""
+    async def cari(bahan, diet=None, tipe=None, max_kalori=None):
+        await asyncio.sleep(1.0 if "lambat" in bahan else 0)
+        return [{"id": bahan[0]}]
+
+    monkeypatch.setattr(api_client_async, "cari_resep_async", cari)
+
+
+def test_timeout_total_tetap_mengembalikan_query_yang_selesai(pencarian_palsu):
+    mulai = time.monotonic()
+    hasil = api_client_async.cari_resep_banyak([["a"], ["lambat"], ["b"]], timeout=0.2)
+    assert hasil == [[{"id": "a"}], [], [{"id": "b"}]]
+    assert time.monotonic() - mulai < 0.8
+
+
+def test_batas_per_query(pencarian_palsu):
+    hasil = api_client_async.cari_resep_banyak([["lambat"], ["a"]], timeout=5, batas_per_query=0.2)
+    assert hasil == [[], [{"id": "a"}]]
+
+
+def test_query_yang_error_tidak_menggagalkan_yang_lain(monkeypatch):
+    async def cari(bahan, diet=None, tipe=None, max_kalori=None):
+        if bahan == ["rusak"]:
+            raise ValueError("boom")
+        return [{"id": bahan[0]}]
+
+    monkeypatch.setattr(api_client_async, "cari_resep_async", cari)
+    assert api_client_async.cari_resep_banyak([["rusak"], ["a"]], timeout=5) == [[], [{"id": "a"}]]
+    assert api_client_async.cari_resep_banyak([], timeout=5) == []
+
+
+# --- CACHE AI SEARCH (EKSPANSI QUERY & HASIL) ---
+class _RouterPalsu:
+    def __init__(self, jawaban):
+        self.jawaban = jawaban
+        self.panggilan = 0
+
+    def generate(self, prompt, **kwargs):
+        self.panggilan += 1
+        return self.jawaban
+
+
+@pytest.fixture
+def ai_cache(sqlite_storage, data_dir, monkeypatch):
+    """Cache AI search baru di folder sementara, Gemini & Spoonacular tiruan."""
+    from src.llm_metrics import LLMMetrics
+    from src.recipe_cache import SQLiteCache
+    from src.search_cache import MemoryCache, TieredCache
+
+    path = str(data_dir / "cache.db")
+    monkeypatch.setattr(ai_helper, "query_expansion_cache", TieredCache(
+        MemoryCache(ttl=3600, max_entri=10), SQLiteCache("ai_query_expansion", ttl=3600, max_entri=10, path=path)))
+    monkeypatch.setattr(ai_helper, "ai_result_cache", TieredCache(
+        MemoryCache(ttl=3600, max_entri=10), SQLiteCache("ai_search_results", ttl=3600, max_entri=10, path=path)))
+    monkeypatch.setattr(ai_helper, "llm_metrics", LLMMetrics())
+    monkeypatch.setattr(ai_helper, "HAS_GENAI", True)
+    monkeypatch.setattr(ai_helper, "API_KEY", "kunci")
+    router = _RouterPalsu('{"queries": ["ayam kecap", "nasi goreng"]}')
+    monkeypatch.setattr(ai_helper, "_router", router)
+
+    pencarian = []
+
+    def cari(daftar_bahan, **kwargs):
+        pencarian.append(daftar_bahan)
+        return [[{"id": i, "rating": i}] for i, _ in enumerate(daftar_bahan, 1)]
+
+    monkeypatch.setattr(api_client_async, "cari_resep_banyak", cari)
+    return SimpleNamespace(router=router, pencarian=pencarian)
+
+
+def test_ekspansi_query_di_cache_per_input_ternormalisasi(ai_cache):
+    assert ai_helper.expand_queries("Ayam Kecap!") == ["ayam kecap", "nasi goreng"]
+    assert ai_helper.expand_queries("  ayam   kecap") == ["ayam kecap", "nasi goreng"]
+    assert ai_cache.router.panggilan == 1
+    assert ai_helper.llm_metrics.snapshot()["cache"]["query_expansion"]["hits"] == 1
+
+
+def test_ekspansi_gagal_tidak_di_cache(ai_cache):
+    ai_cache.router.jawaban = None
+    assert ai_helper.expand_queries("ayam kecap") == ["ayam kecap"]
+    ai_cache.router.jawaban = '{"queries": ["ayam bakar"]}'
+    assert ai_helper.expand_queries("ayam kecap") == ["ayam bakar"]
+    assert ai_cache.router.panggilan == 2
+
+
+def test_hasil_pencarian_di_cache_dan_kosong_tidak(ai_cache, monkeypatch):
+    assert [r["id"] for r in ai_helper.search_queries(["Ayam kecap", "nasi, goreng"])] == [2, 1]
+    assert ai_cache.pencarian == [[["Ayam", "kecap"], ["nasi", "goreng"]]]
+    assert [r["id"] for r in ai_helper.search_queries(["ayam kecap", "nasi goreng"])] == [2, 1]
+    assert len(ai_cache.pencarian) == 1
+
+    monkeypatch.setattr(api_client_async, "cari_resep_banyak", lambda daftar_bahan, **kwargs: [[]])
+    assert ai_helper.search_queries(["tahu"]) == []
+    assert ai_helper.ai_result_cache.get(json.dumps([["tahu"], 5])) is None
+
+
+def test_ai_search_tetap_mencatat_chat_saat_cache_hit(ai_cache):
+    for username in ("andi", "budi"):
+        assert len(ai_helper.ai_search_recipes("ayam kecap", username=username)) == 2
+    assert (ai_cache.router.panggilan, len(ai_cache.pencarian)) == (1, 1)
+    assert [p["role"] for p in ai_helper.get_chat_history("budi")] == ["user", "assistant"]
@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from src import api_client_async, recipe_cache
+from src.rate_limiter import TokenBucket
+from src.singleflight import AsyncSingleFlight
+
+
+@pytest.fixture
+def async_api(api, monkeypatch):
+    """api_client_async memakai cache, guard & single-flight yang sama dengan fixture `api`."""
+    for nama in ("search_cache", "negative_cache", "spoonacular_guard"):
+        monkeypatch.setattr(api_client_async, nama, getattr(api, nama))
+    monkeypatch.setattr(api_client_async, "_flight", AsyncSingleFlight())
+    return api_client_async
+
+
+def test_pencarian_async_memakai_cache_yang_sama(api, async_api, mock_state):
+    hasil = api.cari_resep_spoonacular(["chicken"])
+    assert async_api.cari_resep_banyak([["chicken"]], timeout=10) == [hasil]
+    assert mock_state.request_count == 1
+
+
+def test_detail_bulk_paralel(api, async_api, mock_state, monkeypatch):
+    monkeypatch.setattr(api, "BULK_CHUNK_SIZE", 2)
+    hasil = async_api.dapatkan_detail_resep_bulk_paralel([640001, 640002, 640003, 999999], timeout=10)
+    assert [r["id"] for r in hasil] == [640001, 640002, 640003]
+    assert mock_state.request_count == 2
+    assert api.dapatkan_detail_resep(640003)["id"] == 640003
+    assert mock_state.request_count == 2
+
+
+def test_429_memakai_cache_kadaluarsa(api, async_api, mock_state, monkeypatch):
+    assert len(api.dapatkan_detail_resep_bulk([640001, 640002])) == 2
+    monkeypatch.setattr(recipe_cache.detail_cache, "ttl", -1)   # semua entri dianggap kadaluarsa
+    monkeypatch.setattr(api, "BULK_CHUNK_SIZE", 1)
+
+    mock_state.rate_429 = 1.0
+    hasil = async_api.dapatkan_detail_resep_bulk_paralel([640001, 640002, 640003], timeout=10)
+    assert [r["id"] for r in hasil] == [640001, 640002]
+    assert async_api.jalankan(async_api.dapatkan_detail_resep_async(640002), timeout=10)["id"] == 640002
+
+
+def test_batal_saat_menunggu_token_melepas_slot_half_open(async_api):
+    guard = async_api.spoonacular_guard
+    guard.bucket = TokenBucket(laju=4, kapasitas=1)
+    assert guard.bucket.ambil()          # token berikutnya baru ada ~0.25 detik lagi
+    guard.breaker.buka(0, "uji")         # cooldown sudah lewat -> izin berikutnya = percobaan half-open
+
+    with pytest.raises(TimeoutError):
+        async_api.jalankan(async_api.dapatkan_resep_random_async(1), timeout=0.05)
+
+    # Thread guard tetap mendapat token setelah pemanggilnya dibatalkan;
+    # slot percobaan harus dilepas lagi, bukan tertahan selamanya
+    batas = time.monotonic() + 3
+    while guard.status()["requests"]["allowed"] < 1 and time.monotonic() < batas:
+        time.sleep(0.02)
+    time.sleep(0.1)
+    assert guard.breaker.status()["state"] == "half_open"
+    assert guard.breaker.izinkan()
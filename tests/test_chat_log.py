@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from src import chat_log, storage
+
+
+@pytest.fixture
+def jsonl_chat(data_dir, monkeypatch):
+    """chat_log dengan STORAGE_BACKEND=json dan state modul yang bersih."""
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "json")
+    monkeypatch.setattr(chat_log, "_migrasi_selesai", False)
+    monkeypatch.setattr(chat_log, "_jumlah_baris", {})
+    return data_dir
+
+
+def test_json_chat_round_trip(jsonl_chat):
+    chat_log.append("andi", {"role": "user", "text": "halo"})
+    chat_log.append("andi", {"role": "model", "text": "hai"})
+    assert [p["text"] for p in chat_log.tail("andi")] == ["halo", "hai"]
+    assert chat_log.tail("budi") == []
+    assert chat_log.clear("andi")
+    assert chat_log.tail("andi") == []
+    assert not chat_log.clear("andi")
+
+
+def test_file_dipadatkan_ke_pesan_terakhir(jsonl_chat, monkeypatch):
+    monkeypatch.setattr(chat_log, "MAX_MESSAGES", 3)
+    monkeypatch.setattr(chat_log, "COMPACT_AT", 5)
+    for i in range(6):
+        chat_log.append("andi", {"text": str(i)})
+
+    # Dipadatkan saat baris ke-5 (sisa 3), lalu 1 append lagi
+    assert chat_log._hitung_baris(chat_log._path_user("andi")) == 4
+    assert [p["text"] for p in chat_log.tail("andi")] == ["3", "4", "5"]
+
+
+def test_baris_terpotong_dilewati(jsonl_chat):
+    chat_log.append("andi", {"text": "utuh"})
+    with open(chat_log._path_user("andi"), "a", encoding="utf-8") as f:
+        f.write('{"text": "terpot')
+    assert chat_log.tail("andi") == [{"text": "utuh"}]
+
+
+def test_username_aneh_tetap_aman(jsonl_chat):
+    chat_log.append("../rahasia", {"text": "x"})
+    chat_log.append("__rahasia", {"text": "y"})
+    path = chat_log._path_user("../rahasia")
+    assert os.path.dirname(path) == chat_log.CHAT_DIR
+    assert path != chat_log._path_user("__rahasia")
+    assert chat_log.tail("../rahasia") == [{"text": "x"}]
+
+
+def test_migrasi_dari_json_lama_sekali_saja(jsonl_chat):
+    with open(chat_log.LEGACY_FILE, "w", encoding="utf-8") as f:
+        json.dump({"andi": [{"text": "lama"}]}, f)
+    assert chat_log.tail("andi") == [{"text": "lama"}]
+    assert os.path.exists(chat_log.MIGRATION_MARKER)
+
+    chat_log.clear("andi")
+    chat_log._migrasi_selesai = False        # misal proses baru
+    assert chat_log.tail("andi") == []
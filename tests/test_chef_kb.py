@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from src.chef_kb import ChefKB, KB_FILE, tokenisasi
+
+
+@pytest.fixture
+def kb_file(data_dir):
+    path = data_dir / "kb.json"
+    path.write_text(json.dumps([
+        {"questions": ["pengganti telur untuk kue", "kue tanpa telur pakai apa"], "answer": "pisang"},
+        {"questions": ["berapa kalori telur rebus"], "answer": "78 kkal"},
+        {"questions": ["cara memasak nasi pulen"], "answer": "air 1:1.2"},
+    ]), encoding="utf-8")
+    return str(path)
+
+
+def _kb(kb_file, data_dir, **opsi):
+    return ChefKB(kb_file=kb_file, harvest_file=str(data_dir / "harvest.jsonl"), **opsi)
+
+
+def test_tokenisasi_memotong_imbuhan_dan_kata_umum():
+    assert tokenisasi("Apa penggantinya telur?") == ["ganti", "telur"]
+    assert tokenisasi("kenapa nasi tidak pulen") == ["nasi", "pulen"]
+
+
+def test_jawab_dari_kb_kurasi(kb_file, data_dir):
+    kb = _kb(kb_file, data_dir)
+    assert kb.jawab("telur bisa diganti apa untuk kue?") == "pisang"
+    assert kb.jawab("kalori telur rebus berapa") == "78 kkal"
+    assert kb.jawab("resep rendang padang") is None
+    stats = kb.stats()
+    assert (stats["lookups"], stats["hits"], stats["curated_hits"], stats["entries"]) == (3, 2, 2, 3)
+
+
+def test_pertanyaan_mirip_tapi_beda_maksud_tidak_dijawab(kb_file, data_dir):
+    kb = _kb(kb_file, data_dir)
+    assert kb.jawab("kalori kue") is None
+
+
+def test_harvest_disimpan_dan_dimuat_ulang(kb_file, data_dir):
+    kb = _kb(kb_file, data_dir)
+    kb.harvest("cara membuat sambal matah", "iris bawang")
+    kb.harvest("Cara membuat sambal matah?", "duplikat")
+    assert kb.jawab("membuat sambal matah") == "iris bawang"
+    assert kb.stats()["harvested"] == 1
+
+    baru = _kb(kb_file, data_dir)
+    assert baru.jawab("sambal matah buatnya gimana") == "iris bawang"
+    assert baru.stats()["harvested_hits"] == 1
+
+
+def test_harvest_dibatasi_harvest_max(kb_file, data_dir):
+    kb = _kb(kb_file, data_dir, harvest_max=2)
+    for nama in ("sambal matah", "sambal terasi", "sambal bajak", "sambal ijo"):
+        kb.harvest(f"cara membuat {nama}", nama)
+    stats = kb.stats()
+    assert (stats["harvest_entries"], stats["harvest_evicted"], stats["entries"]) == (2, 2, 5)
+    assert kb.jawab("cara membuat sambal matah") is None
+    assert kb.jawab("cara membuat sambal ijo") == "sambal ijo"
+
+    # Saat startup hanya HARVEST_MAX baris terakhir yang dimuat
+    assert _kb(kb_file, data_dir, harvest_max=2).stats()["harvest_entries"] == 2
+
+
+def test_index_dipadatkan_saat_banyak_entri_dibuang(kb_file, data_dir):
+    kb = _kb(kb_file, data_dir, harvest_max=1)
+    for i in range(200):
+        kb.harvest(f"pertanyaan nomor{i}", f"jawaban {i}")
+    assert len(kb._dok) <= 2 * kb._jumlah_dok + 64
+    assert kb.jawab("pertanyaan nomor199") == "jawaban 199"
+    assert kb.jawab("cara memasak nasi pulen") == "air 1:1.2"
+
+
+def test_kb_bawaan_repo_bisa_dimuat(data_dir):
+    kb = ChefKB(kb_file=os.path.join(os.path.dirname(__file__), "..", KB_FILE),
+                harvest_file=str(data_dir / "harvest.jsonl"))
+    assert kb.stats()["entries"] > 0
+    assert kb.jawab("pengganti telur untuk kue") is not None
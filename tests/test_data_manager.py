@@ -0,0 +1,59 @@
+from src import data_manager
+
+
+def _workbook_palsu(monkeypatch, baris):
+    """load_workbook tiruan (openpyxl tidak wajib terpasang untuk test)."""
+    class _Sheet:
+        def iter_rows(self, values_only):
+            return iter(baris)
+
+    class _Workbook:
+        active = _Sheet()
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(data_manager, "HAS_OPENPYXL", True)
+    monkeypatch.setattr(data_manager, "load_workbook", lambda path, read_only: _Workbook())
+
+
+def test_sqlite_akun(sqlite_storage):
+    assert data_manager.register_user(" andi ", "rahasia ") == "Registrasi berhasil!"
+    assert data_manager.register_user("andi", "lain") == "Username sudah terdaftar."
+    assert data_manager.authenticate_user("andi", "rahasia")
+    assert not data_manager.authenticate_user("andi", "salah")
+    assert not data_manager.authenticate_user("budi", "rahasia")
+    # Password tidak disimpan plaintext
+    assert "rahasia" not in sqlite_storage.user_ambil_hash("andi")
+
+
+def test_impor_users_xlsx(data_dir, sqlite_storage, monkeypatch):
+    _workbook_palsu(monkeypatch, [("Username", "Password"), ("andi", " rahasia "), (None, "x"), ("budi", 123)])
+    path = data_dir / "users.xlsx"
+    path.write_bytes(b"")
+
+    assert data_manager.impor_dari_xlsx(str(path)) == 2
+    assert not path.exists()          # password plaintext tidak ditinggal di disk
+    assert data_manager.authenticate_user("andi", "rahasia")
+    assert data_manager.authenticate_user("budi", "123")
+
+
+def test_impor_tidak_menimpa_user_yang_ada(data_dir, sqlite_storage, monkeypatch):
+    data_manager.register_user("andi", "baru")
+    _workbook_palsu(monkeypatch, [("Password", "Username"), ("lama", "andi"), ("x", "citra")])
+    path = data_dir / "users.xlsx"
+    path.write_bytes(b"")
+
+    assert data_manager.impor_dari_xlsx(str(path), hapus_asli=False) == 1
+    assert path.exists()
+    assert data_manager.authenticate_user("andi", "baru")
+    assert data_manager.authenticate_user("citra", "x")
+
+
+def test_impor_kolom_hilang_gagal(data_dir, sqlite_storage, monkeypatch):
+    _workbook_palsu(monkeypatch, [("nama", "sandi"), ("andi", "x")])
+    path = data_dir / "users.xlsx"
+    path.write_bytes(b"")
+
+    assert data_manager.impor_dari_xlsx(str(path)) is None
+    assert path.exists()
@@ -0,0 +1,142 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src import gemini_router
+from src.gemini_router import ModelRouter
+from src.llm_metrics import LLMMetrics
+
+
+class _GenaiPalsu:
+    """
+    Pengganti google.generativeai: setiap model punya (jeda detik, jawaban atau
+    exception). Semua panggilan generate_content dicatat beserta argumennya.
+    """
+
+    def __init__(self, perilaku, daftar=None):
+        self.perilaku = perilaku
+        self.daftar = list(perilaku) if daftar is None else daftar
+        self.panggilan = []
+        self._lock = threading.Lock()
+
+    def configure(self, api_key):
+        pass
+
+    def list_models(self):
+        return [SimpleNamespace(name=n, supported_generation_methods=["generateContent"]) for n in self.daftar]
+
+    def GenerativeModel(self, nama):
+        genai = self
+
+        class _Model:
+            def generate_content(self, prompt, stream=False, **kwargs):
+                with genai._lock:
+                    genai.panggilan.append((nama, kwargs))
+                jeda, hasil = genai.perilaku[nama]
+                time.sleep(jeda)
+                if isinstance(hasil, Exception):
+                    raise hasil
+                if stream:
+                    return iter([SimpleNamespace(text=bagian) for bagian in hasil.split("|")])
+                return SimpleNamespace(text=hasil)
+
+        return _Model()
+
+
+@pytest.fixture
+def metrik(monkeypatch):
+    baru = LLMMetrics()
+    monkeypatch.setattr(gemini_router, "llm_metrics", baru)
+    monkeypatch.setattr(gemini_router, "HEDGE_DEFAULT_DELAY", 0.1)
+    monkeypatch.setattr(gemini_router, "HEDGE_MIN_DELAY", 0.05)
+    return baru
+
+
+def _router(perilaku, **opsi):
+    router = ModelRouter(_GenaiPalsu(perilaku, **opsi), "kunci", list(perilaku))
+    router.discover()
+    return router
+
+
+def test_hedging_memakai_model_yang_lebih_cepat(metrik):
+    router = _router({"lambat": (1.0, "jawaban lambat"), "cepat": (0.05, "jawaban cepat")})
+    mulai = time.monotonic()
+    assert router.generate("halo", deadline=5) == "jawaban cepat"
+    assert time.monotonic() - mulai < 0.7
+    assert [nama for nama, _ in router.genai.panggilan] == ["lambat", "cepat"]
+    assert metrik.snapshot()["operations"]["generate"]["hedged"] == 1
+
+
+def test_deadline_habis_mengembalikan_none(metrik):
+    router = _router({"a": (1.5, "x"), "b": (1.5, "y")})
+    mulai = time.monotonic()
+    assert router.generate("halo", deadline=0.3) is None
+    assert time.monotonic() - mulai < 1
+    assert router.alasan_gagal() == "deadline"
+    status = router.status()["models"]
+    assert status["a"]["timeouts"] == 1 and status["a"]["cooldown_sec"] == 0
+
+
+def test_timeout_dan_batas_token_diteruskan_ke_sdk(metrik):
+    router = _router({"a": (0, "ok")})
+    assert router.generate("halo", max_output_tokens=123, temperature=0.5, deadline=4) == "ok"
+    (_, kwargs), = router.genai.panggilan
+    assert kwargs["generation_config"] == {"max_output_tokens": 123, "temperature": 0.5}
+    assert 1 <= kwargs["request_options"]["timeout"] <= 4
+
+
+def test_model_gagal_langsung_diganti_model_berikutnya(metrik):
+    router = _router({"a": (0, RuntimeError("500 internal")), "b": (0, "dari b")})
+    assert router.generate("halo", deadline=5) == "dari b"
+    assert router.status()["models"]["a"]["cooldown_sec"] > 0
+    # Model yang cooldown tidak dicoba lagi
+    router.genai.panggilan.clear()
+    assert router.generate("halo", deadline=5) == "dari b"
+    assert [nama for nama, _ in router.genai.panggilan] == ["b"]
+
+
+def test_alasan_gagal_dibedakan(metrik):
+    router = _router({"a": (0, RuntimeError("boom")), "b": (0, RuntimeError("429 quota"))})
+    assert router.generate("halo", deadline=5) is None
+    assert router.alasan_gagal() == "semua_gagal"
+    assert router.generate("halo", deadline=5) is None
+    assert router.alasan_gagal() == "tidak_ada_model"
+
+
+def test_model_tidak_ada_di_daftar_dilewati(metrik):
+    router = _router({"lama": (0, "x"), "baru": (0, "y")}, daftar=["baru"])
+    assert router.model_sehat() == ["baru"]
+    assert router.generate("halo", deadline=5) == "y"
+
+
+def test_stream_pindah_model_sebelum_potongan_pertama(metrik):
+    router = _router({"a": (0, RuntimeError("boom")), "b": (0, "po|tong|an")})
+    assert list(router.generate_stream("halo", deadline=5)) == ["po", "tong", "an"]
+    _, kwargs = router.genai.panggilan[-1]
+    assert kwargs["generation_config"]["max_output_tokens"] == 250
+
+
+# --- PESAN FALLBACK CHEF AI ---
+@pytest.fixture
+def chef(sqlite_storage, metrik, monkeypatch):
+    from src import ai_helper
+
+    monkeypatch.setattr(ai_helper, "HAS_GENAI", True)
+    monkeypatch.setattr(ai_helper, "API_KEY", "kunci")
+    monkeypatch.setattr(ai_helper, "llm_metrics", metrik)
+    monkeypatch.setattr(ai_helper.chef_answer_cache, "cari", lambda pertanyaan: (None, 0.0))
+    monkeypatch.setattr(ai_helper.chef_kb, "jawab", lambda pertanyaan: None)
+    return ai_helper
+
+
+def test_chef_ai_deadline_dan_gagal_pesannya_berbeda(chef, monkeypatch):
+    monkeypatch.setattr(chef, "CHEF_AI_DEADLINE", 0.3)
+    monkeypatch.setattr(chef, "_router", _router({"a": (1.5, "x")}))
+    assert "dalam 0.3 detik" in chef.tanya_chef_ai("pertanyaan unik zqx", "andi")
+
+    monkeypatch.setattr(chef, "_router", _router({"a": (0, RuntimeError("boom"))}))
+    jawaban = chef.tanya_chef_ai("pertanyaan unik zqx", "andi")
+    assert "gagal menjawab" in jawaban and "detik" not in jawaban
+    assert [p["role"] for p in chef.get_chat_history("andi")] == ["user", "assistant"] * 2
@@ -0,0 +1,105 @@
+import json
+import sqlite3
+import time
+
+import pytest
+
+from src import history, storage
+from src.history import HistoryLRU
+from src.json_store import JsonStore
+
+
+@pytest.fixture
+def lru(monkeypatch):
+    """HistoryLRU baru (tanpa thread latar) sebagai singleton modul history."""
+    baru = HistoryLRU(kapasitas=3, debounce=30, jeda_flush=60)
+    monkeypatch.setattr(baru, "_tandai_kotor", lambda username: baru._kotor.add(username))
+    monkeypatch.setattr(history, "history_lru", baru)
+    return baru
+
+
+def test_lru_terbaru_dulu_dan_dibatasi(sqlite_storage, lru):
+    for rid in (1, 2, 3, 4):
+        assert history.add_to_history("andi", rid)
+    assert history.get_user_history("andi") == [4, 3, 2]
+
+    # Membuka resep lama lagi memindahkannya ke depan, bukan menduplikasi
+    history.add_to_history("andi", 2)
+    assert history.get_user_history("andi") == [2, 4, 3]
+
+
+def test_debounce_resep_yang_sama(sqlite_storage, lru, monkeypatch):
+    sekarang = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: sekarang[0])
+    assert lru.lihat("andi", 7, "10:00")
+    assert not lru.lihat("andi", 7, "10:01")       # rerun / klik ganda
+    assert lru.daftar("andi") == [{"recipe_id": 7, "viewed_at": "10:00"}]
+
+    sekarang[0] += 31
+    assert lru.lihat("andi", 7, "10:02")
+    # Resep lain di antaranya -> tidak di-debounce
+    assert lru.lihat("andi", 8, "10:03")
+    assert lru.lihat("andi", 7, "10:04")
+    assert lru.stats()["debounced"] == 1
+
+
+def test_flush_ke_sqlite(sqlite_storage, lru):
+    history.add_to_history("andi", 1)
+    history.add_to_history("andi", 2)
+    # Belum di-flush: storage belum berubah (write-behind)
+    assert sqlite_storage.history_daftar("andi") == []
+    assert lru.stats()["pending"] == 1
+
+    lru.flush()
+    assert [h["recipe_id"] for h in sqlite_storage.history_daftar("andi")] == [2, 1]
+    assert lru.stats()["pending"] == 0
+
+    # Setelah memori dibuang, data dimuat ulang dari storage
+    lru.lupakan()
+    assert history.get_user_history("andi") == [2, 1]
+    assert history.clear_user_history("andi")
+    lru.flush()
+    assert sqlite_storage.history_daftar("andi") == []
+
+
+def test_flush_ke_json(data_dir, lru, monkeypatch):
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "json")
+    monkeypatch.setattr(history, "history_store", JsonStore(history.HISTORY_FILE))
+    history.add_to_history("andi", 5)
+    history.add_to_history("budi", 6)
+    lru.flush()
+    with open(history.HISTORY_FILE, encoding="utf-8") as f:
+        data = json.load(f)
+    assert [h["recipe_id"] for h in data["andi"]] == [5]
+    assert [h["recipe_id"] for h in data["budi"]] == [6]
+
+
+def test_flush_gagal_dicoba_lagi(sqlite_storage, lru, monkeypatch):
+    history.add_to_history("andi", 1)
+    terkunci = [True]
+    asli = sqlite_storage.history_ganti
+
+    def kadang_gagal(per_user):
+        if terkunci[0]:
+            raise sqlite3.OperationalError("database is locked")
+        return asli(per_user)
+
+    monkeypatch.setattr(sqlite_storage, "history_ganti", kadang_gagal)
+    lru.flush()
+    assert lru.stats()["flush_errors"] == 1
+    assert lru.stats()["pending"] == 1
+
+    terkunci[0] = False
+    lru.flush()
+    assert lru.stats()["pending"] == 0
+    assert [h["recipe_id"] for h in sqlite_storage.history_daftar("andi")] == [1]
+
+
+def test_thread_latar_menulis_perubahan(sqlite_storage, monkeypatch):
+    lru = HistoryLRU(kapasitas=5, debounce=0, jeda_flush=0.05)
+    monkeypatch.setattr(history, "history_lru", lru)
+    history.add_to_history("andi", 9)
+    batas = time.monotonic() + 5
+    while not sqlite_storage.history_daftar("andi") and time.monotonic() < batas:
+        time.sleep(0.02)
+    assert [h["recipe_id"] for h in sqlite_storage.history_daftar("andi")] == [9]
@@ -0,0 +1,75 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from src import inspirasi_pool
+
+
+class _RandomPalsu:
+    """Pengganti dapatkan_resep_random: mencatat panggilan, ID selalu baru."""
+
+    def __init__(self):
+        self.panggilan = []
+        self.gagal = False
+        self._nomor = itertools.count(1)
+
+    def __call__(self, jumlah=3, api_key=None, nutrisi=True):
+        self.panggilan.append((jumlah, nutrisi))
+        time.sleep(0.1)
+        if self.gagal:
+            return []
+        return [{"id": next(self._nomor), "title": "resep"} for _ in range(jumlah)]
+
+
+@pytest.fixture
+def random_palsu(data_dir, monkeypatch):
+    """inspirasi_pool dengan state kosong dan endpoint random tiruan."""
+    monkeypatch.setattr(inspirasi_pool, "_pool", {"updated_at": 0, "recipes": []})
+    monkeypatch.setattr(inspirasi_pool, "_pool_mtime", None)
+    monkeypatch.setattr(inspirasi_pool, "_refresh_berjalan", False)
+    monkeypatch.setattr(inspirasi_pool, "_gagal_terakhir", 0)
+    monkeypatch.setattr(inspirasi_pool, "POOL_TARGET", 20)
+    palsu = _RandomPalsu()
+    monkeypatch.setattr(inspirasi_pool, "dapatkan_resep_random", palsu)
+    return palsu
+
+
+def test_cold_start_hanya_satu_refresh(random_palsu):
+    hasil = []
+    threads = [threading.Thread(target=lambda: hasil.append(inspirasi_pool.ambil_sampel_inspirasi(5)))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert random_palsu.panggilan == [(20, True)]
+    assert [len(h) for h in hasil] == [5] * 4
+    assert inspirasi_pool.status_pool()["size"] == 20
+
+
+def test_refresh_tanpa_nutrisi_bisa_diatur(random_palsu, monkeypatch):
+    monkeypatch.setattr(inspirasi_pool, "POOL_NUTRISI", False)
+    assert inspirasi_pool.refresh_pool()
+    assert random_palsu.panggilan == [(20, False)]
+
+
+def test_pool_basi_diperbarui_di_background(random_palsu):
+    inspirasi_pool.ambil_sampel_inspirasi(3)
+    inspirasi_pool._pool["updated_at"] = time.time() - inspirasi_pool.POOL_REFRESH_SEC - 1
+
+    assert len(inspirasi_pool.ambil_sampel_inspirasi(3)) == 3      # langsung dari pool lama
+    batas = time.monotonic() + 3
+    while inspirasi_pool.status_pool()["refreshing"] and time.monotonic() < batas:
+        time.sleep(0.02)
+    assert len(random_palsu.panggilan) == 2
+    assert inspirasi_pool.status_pool()["age_sec"] <= 1
+
+
+def test_cold_start_gagal_tidak_diulang_terus(random_palsu):
+    random_palsu.gagal = True
+    assert inspirasi_pool.ambil_sampel_inspirasi(3) == []
+    assert inspirasi_pool.ambil_sampel_inspirasi(3) == []
+    assert len(random_palsu.panggilan) == 1
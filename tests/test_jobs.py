@@ -0,0 +1,88 @@
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from src.jobs import DONE, ERROR, PENDING, UNKNOWN, JobManager
+
+
+def _tunggu_status(manager, job_id, *status, batas=3):
+    akhir = time.monotonic() + batas
+    while manager.status(job_id) not in status and time.monotonic() < akhir:
+        time.sleep(0.01)
+    return manager.status(job_id)
+
+
+def test_job_gagal_lalu_diulang():
+    manager = JobManager(max_workers=2)
+    percobaan = []
+
+    def kadang_gagal():
+        percobaan.append(1)
+        if len(percobaan) == 1:
+            raise RuntimeError("koneksi putus")
+        return "ok"
+
+    job_id = manager.submit(kadang_gagal)
+    assert _tunggu_status(manager, job_id, DONE, ERROR) == ERROR
+    with pytest.raises(RuntimeError):
+        manager.result(job_id)
+    assert manager.status(job_id) == UNKNOWN
+
+    job_id = manager.submit(kadang_gagal)
+    assert _tunggu_status(manager, job_id, DONE, ERROR) == DONE
+    assert manager.result(job_id) == "ok"
+    assert manager.stats()["error"] == 1 and manager.stats()["done"] == 1
+
+
+def test_batal_sebelum_mulai_tidak_dijalankan():
+    manager = JobManager(max_workers=1)
+    lepas = threading.Event()
+    dijalankan = []
+    penghalang = manager.submit(lepas.wait, 3)
+    job_id = manager.submit(dijalankan.append, 1)
+    assert manager.status(job_id) == PENDING
+
+    assert manager.cancel(job_id)
+    lepas.set()
+    assert _tunggu_status(manager, penghalang, DONE) == DONE
+    assert dijalankan == []
+    assert manager.stats()["cancelled"] == 1
+    assert not manager.cancel(job_id)
+
+
+def test_batal_kooperatif_lewat_cancel_event():
+    manager = JobManager(max_workers=1)
+    mulai = threading.Event()
+
+    def lama(cancel_event):
+        mulai.set()
+        for _ in range(300):
+            if cancel_event.is_set():
+                raise CancelledError()
+            time.sleep(0.01)
+        return "terlambat"
+
+    job_id = manager.submit(lama, cancel_event=True)
+    assert mulai.wait(2)
+    job = manager._jobs[job_id]
+    manager.cancel(job_id)
+    with pytest.raises(CancelledError):
+        job.future.result(timeout=1)
+    assert manager.stats()["cancelled"] == 1
+
+
+def test_cancel_event_menghentikan_detail_bulk_paralel(api, mock_state, monkeypatch):
+    from src import api_client_async
+
+    monkeypatch.setattr(api_client_async, "search_cache", api.search_cache)
+    monkeypatch.setattr(api_client_async, "spoonacular_guard", api.spoonacular_guard)
+    mock_state.latency_ms = 1500
+    batal = threading.Event()
+    threading.Timer(0.2, batal.set).start()
+
+    mulai = time.monotonic()
+    with pytest.raises(CancelledError):
+        api_client_async.dapatkan_detail_resep_bulk_paralel([640001, 640002], timeout=10, cancel_event=batal)
+    assert time.monotonic() - mulai < 1
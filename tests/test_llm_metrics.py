@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.gemini_router import jenis_error
+from src.llm_metrics import LLMMetrics, ambil_usage
+
+
+def test_ambil_usage_dari_objek_dan_dict():
+    resp = SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=12, candidates_token_count=30,
+                                                         total_token_count=42))
+    assert ambil_usage(resp) == (12, 30, 42)
+    assert ambil_usage({"usageMetadata": {"promptTokenCount": 5, "candidatesTokenCount": 7}}) == (5, 7, 12)
+    assert ambil_usage(SimpleNamespace(text="x")) is None
+
+
+@pytest.mark.parametrize("error, jenis", [
+    (RuntimeError("404 models/x is not found"), "tidak_ada"),
+    (RuntimeError("429 Resource has been exhausted (e.g. check quota)"), "kuota"),
+    (TimeoutError("read timeout"), "lain"),
+])
+def test_jenis_error(error, jenis):
+    assert jenis_error(error) == jenis
+
+
+def test_panggilan_dan_permintaan_tercatat():
+    metrik = LLMMetrics()
+    metrik.catat_panggilan("m1", 0.3, True, usage=(10, 20, 30), operasi="chef_ai")
+    metrik.catat_panggilan("m1", 5.0, False, "kuota", operasi="chef_ai")
+    metrik.catat_permintaan("chef_ai", 0.3, True, depth=1, hedged=True)
+    metrik.catat_permintaan("chef_ai", 20.0, False, deadline=True)
+    metrik.catat_cache("chef_kb", True)
+    metrik.catat_cache("chef_kb", False)
+
+    data = metrik.snapshot()
+    m1 = data["models"]["m1"]
+    assert (m1["calls"], m1["successes"], m1["failures"]) == (2, 1, {"kuota": 1})
+    assert (m1["prompt_tokens"], m1["response_tokens"], m1["total_tokens"]) == (10, 20, 30)
+    assert m1["latency_histogram"]["le_0.5"] == 1 and m1["latency_histogram"]["le_8"] == 1
+    op = data["operations"]["chef_ai"]
+    assert (op["requests"], op["answered"], op["fallbacks"], op["deadline_hits"], op["hedged"]) == (2, 1, 1, 1, 1)
+    assert op["fallback_depth"] == {1: 1}
+    assert data["cache"]["chef_kb"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+    assert len(data["recent_events"]) == 4
+
+
+def test_export_prometheus_histogram_kumulatif():
+    metrik = LLMMetrics()
+    for latency in (0.1, 0.3, 3.0):
+        metrik.catat_panggilan("m1", latency, True)
+    teks = metrik.export_prometheus()
+    assert 'llm_latency_seconds_bucket{model="m1",le="0.25"} 1' in teks
+    assert 'llm_latency_seconds_bucket{model="m1",le="0.5"} 2' in teks
+    assert 'llm_latency_seconds_bucket{model="m1",le="+Inf"} 3' in teks
+    assert 'llm_latency_seconds_count{model="m1"} 3' in teks
+
+    metrik.reset()
+    assert metrik.snapshot()["models"] == {}
@@ -0,0 +1,49 @@
+import requests
+
+import mock_spoonacular
+
+
+def _get(server, path, **params):
+    params.setdefault("apiKey", "mock")
+    return requests.get(f"http://127.0.0.1:{server.server_address[1]}{path}", params=params, timeout=5)
+
+
+def test_fixture_terbaca():
+    resep = mock_spoonacular.load_fixtures()
+    assert len(resep) >= 10
+    assert all(r["id"] == i for i, r in resep.items())
+
+
+def test_complex_search_menyaring_bahan(mock_server, mock_state):
+    r = _get(mock_server, "/recipes/complexSearch", includeIngredients="chicken", number=3)
+    assert r.status_code == 200
+    body = r.json()
+    assert 0 < len(body["results"]) <= 3
+    assert body["totalResults"] >= len(body["results"])
+    for resep in body["results"]:
+        teks = resep["title"] + " ".join(i["name"] for i in resep.get("extendedIngredients", []))
+        assert "chicken" in teks.lower()
+    assert mock_state.request_count == 1
+
+
+def test_detail_dan_bulk(mock_server, mock_state):
+    assert _get(mock_server, "/recipes/640001/information").json()["id"] == 640001
+    assert _get(mock_server, "/recipes/999999/information").status_code == 404
+    bulk = _get(mock_server, "/recipes/informationBulk", ids="640001,640002,999999").json()
+    assert [r["id"] for r in bulk] == [640001, 640002]
+
+
+def test_tanpa_api_key_ditolak(mock_server):
+    assert _get(mock_server, "/recipes/random", apiKey="").status_code == 401
+
+
+def test_injeksi_429_dan_kuota(mock_server, mock_state):
+    mock_state.rate_429 = 1.0
+    assert _get(mock_server, "/recipes/random").status_code == 429
+
+    mock_state.rate_429 = 0.0
+    mock_state.quota = 1
+    r = _get(mock_server, "/recipes/640003/information")
+    assert r.status_code == 200
+    assert float(r.headers["X-API-Quota-Left"]) == 0.0
+    assert _get(mock_server, "/recipes/640004/information").status_code == 402
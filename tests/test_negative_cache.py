@@ -0,0 +1,69 @@
+import time
+
+from src.negative_cache import BloomFilter, NegativeCache
+
+
+# --- LEWAT MOCK SPOONACULAR ---
+def test_pencarian_kosong_masuk_cache_negatif(api, mock_state):
+    assert api.cari_resep_spoonacular(["durian"]) == []
+    assert api.cari_resep_spoonacular(["durian"]) == []
+    assert mock_state.request_count == 1
+    kunci = api._kunci_pencarian(api._kanonik_pencarian(["durian"]))
+    assert api.negative_cache.ada("search:" + kunci)
+
+
+def test_detail_404_masuk_cache_negatif(api, mock_state):
+    assert api.dapatkan_detail_resep(999999) is None
+    assert api.dapatkan_detail_resep(999999) is None
+    assert mock_state.request_count == 1
+
+    # Bulk juga melewati ID yang tercatat 404
+    hasil = api.dapatkan_detail_resep_bulk([640001, 999999])
+    assert [r["id"] for r in hasil] == [640001]
+    assert mock_state.request_count == 2
+
+
+def test_bulk_id_tidak_ada_di_respons_dicatat(api, mock_state):
+    assert [r["id"] for r in api.dapatkan_detail_resep_bulk([640002, 888888])] == [640002]
+    assert api.negative_cache.ada("detail:888888")
+    assert api.dapatkan_detail_resep(888888) is None
+    assert mock_state.request_count == 1
+
+
+# --- NEGATIVE CACHE ---
+def test_negative_cache_kadaluarsa(monkeypatch):
+    cache = NegativeCache(ttl=10)
+    sekarang = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: sekarang[0])
+    cache.tambah("search:x")
+    assert cache.ada("search:x")
+    assert not cache.ada("search:y")
+    sekarang[0] += 11
+    assert not cache.ada("search:x")
+    assert cache.stats()["exact_entries"] == 0
+
+
+def test_negative_cache_mode_bloom(monkeypatch):
+    cache = NegativeCache(ttl=10, max_exact=3, bloom_kapasitas=1000, bloom_fp=0.001)
+    sekarang = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: sekarang[0])
+    for i in range(50):
+        cache.tambah(f"detail:{i}")
+    stats = cache.stats()
+    assert stats["exact_entries"] == 3
+    assert stats["bloom_items"] == 47
+    assert all(cache.ada(f"detail:{i}") for i in range(50))
+
+    # Generasi Bloom dibuang utuh setelah TTL
+    sekarang[0] += 11
+    assert not cache.ada("detail:49")
+    assert cache.stats()["bloom_generations"] == 0
+
+
+def test_bloom_filter_tanpa_false_negative():
+    bloom = BloomFilter(kapasitas=500, fp_rate=0.01)
+    for i in range(500):
+        bloom.tambah(str(i))
+    assert all(str(i) in bloom for i in range(500))
+    false_positive = sum(f"x{i}" in bloom for i in range(5000))
+    assert false_positive < 5000 * 0.05
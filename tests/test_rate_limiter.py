@@ -0,0 +1,140 @@
+import time
+
+import pytest
+
+from src import recipe_cache
+from src.rate_limiter import CircuitBreaker, PermintaanDitolak, SpoonacularGuard, TokenBucket
+
+
+class _Respons:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+# --- CIRCUIT BREAKER ---
+def test_breaker_terbuka_setelah_gagal_beruntun():
+    breaker = CircuitBreaker(batas_gagal=3, cooldown=60)
+    for _ in range(2):
+        assert breaker.izinkan()
+        breaker.gagal("error server 500")
+    assert breaker.status()["state"] == "closed"
+    assert breaker.izinkan()
+    breaker.gagal("error server 500")
+    assert breaker.status()["state"] == "open"
+    assert not breaker.izinkan()
+
+
+def test_breaker_sukses_mereset_hitungan():
+    breaker = CircuitBreaker(batas_gagal=2, cooldown=60)
+    breaker.gagal("x")
+    breaker.sukses()
+    breaker.gagal("x")
+    assert breaker.status()["state"] == "closed"
+
+
+def test_breaker_half_open_hanya_satu_percobaan(monkeypatch):
+    breaker = CircuitBreaker(batas_gagal=1, cooldown=10)
+    sekarang = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: sekarang[0])
+    breaker.gagal("timeout")
+    assert not breaker.izinkan()
+
+    sekarang[0] += 11
+    assert breaker.izinkan()          # satu request percobaan
+    assert not breaker.izinkan()      # yang lain tetap ditolak
+    assert breaker.status()["state"] == "half_open"
+
+    breaker.gagal("timeout")          # percobaan gagal -> open lagi
+    assert breaker.status()["state"] == "open"
+    sekarang[0] += 11
+    assert breaker.izinkan()
+    breaker.sukses()
+    assert breaker.status()["state"] == "closed"
+    assert breaker.izinkan() and breaker.izinkan()
+
+
+def test_breaker_batal_melepas_slot_percobaan(monkeypatch):
+    breaker = CircuitBreaker(batas_gagal=1, cooldown=10)
+    sekarang = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: sekarang[0])
+    breaker.gagal("x")
+    sekarang[0] += 11
+    assert breaker.izinkan()
+    breaker.batal()
+    assert breaker.izinkan()
+
+
+# --- GUARD ---
+def test_guard_status_http_ke_breaker():
+    guard = SpoonacularGuard()
+    guard.catat_respons(_Respons(429))
+    assert guard.breaker.status()["state"] == "open"
+    with pytest.raises(PermintaanDitolak):
+        guard.sebelum_request()
+    assert guard.status()["requests"]["rejected_breaker"] == 1
+
+
+def test_guard_sisa_kuota_habis_membuka_breaker():
+    guard = SpoonacularGuard()
+    guard.catat_respons(_Respons(200, {"X-API-Quota-Used": "149.5", "X-API-Quota-Left": "0.5",
+                                       "X-API-Quota-Request": "1"}))
+    status = guard.status()
+    assert status["quota"]["left"] == 0.5
+    assert status["breaker"]["state"] == "open"
+
+
+def test_token_bucket_menolak_saat_habis():
+    bucket = TokenBucket(laju=0.001, kapasitas=2)
+    assert bucket.ambil() and bucket.ambil()
+    assert not bucket.ambil(max_tunggu=0.01)
+
+
+# --- LEWAT MOCK SPOONACULAR ---
+def test_429_langsung_ke_breaker_tanpa_retry(api, mock_state):
+    mock_state.rate_429 = 1.0
+    mulai = time.monotonic()
+    assert api.cari_resep_spoonacular(["chicken"]) == []
+    assert mock_state.request_count == 1            # tidak dicoba ulang oleh session
+    assert time.monotonic() - mulai < 1
+    assert api.spoonacular_guard.breaker.status()["state"] == "open"
+
+    # Breaker terbuka: request berikutnya tidak sampai ke server
+    assert api.dapatkan_detail_resep(640001) is None
+    assert mock_state.request_count == 1
+
+
+def test_429_memakai_hasil_pencarian_kadaluarsa(api, mock_state):
+    hasil = api.cari_resep_spoonacular(["beef"])
+    assert hasil
+    kunci = api._kunci_pencarian(api._kanonik_pencarian(["beef"]))
+    # Anggap entri sudah kadaluarsa: tidak ada lagi hit biasa
+    api.search_cache.memori.set(kunci, hasil, waktu=time.time() - 7200)
+    api.search_cache.disk.delete(kunci)
+
+    mock_state.rate_429 = 1.0
+    assert api.cari_resep_spoonacular(["beef"]) == hasil
+    assert mock_state.request_count == 2
+
+
+def test_402_kuota_habis(api, mock_state):
+    mock_state.quota = 1
+    assert api.dapatkan_detail_resep(640005)["id"] == 640005
+    assert api.dapatkan_detail_resep(640006) is None
+    breaker = api.spoonacular_guard.breaker.status()
+    assert breaker["state"] == "open"
+    assert "kuota" in breaker["reason"]
+    # Yang sudah di cache tetap bisa dibuka
+    assert api.dapatkan_detail_resep(640005)["id"] == 640005
+
+
+def test_429_bulk_memakai_detail_kadaluarsa(api, mock_state, monkeypatch):
+    assert len(api.dapatkan_detail_resep_bulk([640001, 640002])) == 2
+    monkeypatch.setattr(recipe_cache.detail_cache, "ttl", -1)   # semua entri dianggap kadaluarsa
+    monkeypatch.setattr(api, "BULK_CHUNK_SIZE", 1)
+
+    mock_state.rate_429 = 1.0
+    hasil = api.dapatkan_detail_resep_bulk([640001, 640002, 640003])
+    assert [r["id"] for r in hasil] == [640001, 640002]
+    # Potongan pertama kena 429; potongan berikutnya tidak dikirim lagi
+    assert mock_state.request_count == 2
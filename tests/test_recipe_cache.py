@@ -0,0 +1,82 @@
+import time
+
+from src import recipe_cache
+from src.recipe_cache import SQLiteCache
+
+
+# --- SQLITE CACHE ---
+def test_sqlite_cache_ttl_dan_kadaluarsa(data_dir, monkeypatch):
+    cache = SQLiteCache("uji", ttl=10, max_entri=10, path=str(data_dir / "c.db"))
+    sekarang = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: sekarang[0])
+    assert cache.set(1, {"id": 1})
+    assert cache.get(1) == {"id": 1}
+
+    sekarang[0] += 11
+    assert cache.get(1) is None
+    assert cache.get(1, izinkan_kadaluarsa=True) == {"id": 1}
+    assert cache.get_many([1]) == {}
+    assert cache.get_many([1], izinkan_kadaluarsa=True) == {"1": {"id": 1}}
+
+
+def test_sqlite_cache_lru(data_dir, monkeypatch):
+    cache = SQLiteCache("uji", ttl=3600, max_entri=2, path=str(data_dir / "c.db"))
+    sekarang = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: sekarang[0])
+    for kunci in ("a", "b"):
+        sekarang[0] += 1
+        cache.set(kunci, kunci)
+    sekarang[0] += 1
+    assert cache.get("a") == "a"     # "a" jadi yang terbaru dipakai
+    sekarang[0] += 1
+    cache.set("c", "c")              # "b" dibuang
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"]) == (2, 1)
+
+
+def test_sqlite_cache_dipakai_bersama_koneksi_lain(data_dir):
+    path = str(data_dir / "c.db")
+    SQLiteCache("uji", ttl=3600, max_entri=10, path=path).set("k", [1, 2])
+    # Sesi / proses lain membuka file yang sama
+    assert SQLiteCache("uji", ttl=3600, max_entri=10, path=path).get("k") == [1, 2]
+
+
+# --- DETAIL RESEP (LEWAT MOCK SPOONACULAR) ---
+def test_detail_kedua_dari_cache(api, mock_state):
+    assert api.dapatkan_detail_resep(640001)["id"] == 640001
+    assert api.dapatkan_detail_resep("640001")["id"] == 640001
+    assert mock_state.request_count == 1
+    assert recipe_cache.detail_cache.stats()["hits"] == 1
+
+
+def test_detail_id_tidak_valid(api, mock_state):
+    assert api.dapatkan_detail_resep("bukan-angka") is None
+    assert mock_state.request_count == 0
+
+
+# --- DETAIL BULK ---
+def test_detail_bulk_memakai_cache_detail(api, mock_state):
+    assert api.dapatkan_detail_resep(640003)["id"] == 640003
+    hasil = api.dapatkan_detail_resep_bulk([640003, 640004, "640003"])
+    assert [r["id"] for r in hasil] == [640003, 640004]
+    assert mock_state.request_count == 2
+    # Semuanya sudah di cache sekarang
+    api.dapatkan_detail_resep_bulk([640004, 640003])
+    assert mock_state.request_count == 2
+
+
+def test_detail_bulk_dipecah_per_potongan_dan_urut(api, mock_state, monkeypatch):
+    monkeypatch.setattr(api, "BULK_CHUNK_SIZE", 2)
+    ids = [640009, 640002, "x", 640007, 640005, 640002]
+    hasil = api.dapatkan_detail_resep_bulk(ids)
+    assert [r["id"] for r in hasil] == [640009, 640002, 640007, 640005]
+    assert mock_state.request_count == 2
+    assert api.dapatkan_detail_resep(640005)["id"] == 640005
+    assert mock_state.request_count == 2
+
+
+def test_detail_bulk_kosong(api, mock_state):
+    assert api.dapatkan_detail_resep_bulk([]) == []
+    assert api.dapatkan_detail_resep_bulk(["x", None]) == []
+    assert mock_state.request_count == 0
@@ -0,0 +1,51 @@
+import time
+
+from src.search_cache import MemoryCache
+
+
+# --- CACHE PENCARIAN (LEWAT MOCK SPOONACULAR) ---
+def test_pencarian_kedua_dari_cache(api, mock_state):
+    pertama = api.cari_resep_spoonacular(["chicken", "egg"])
+    assert 640001 in {r["id"] for r in pertama}
+    assert mock_state.request_count == 1
+
+    # Urutan, huruf besar & spasi berbeda -> kunci kanonik sama, tanpa request baru
+    kedua = api.cari_resep_spoonacular([" Egg", "chicken ", "egg"])
+    assert kedua == pertama
+    assert mock_state.request_count == 1
+
+
+def test_filter_berbeda_kunci_berbeda(api, mock_state):
+    api.cari_resep_spoonacular(["chicken"])
+    api.cari_resep_spoonacular(["chicken"], diet="vegetarian")
+    assert mock_state.request_count == 2
+
+
+def test_kalori_dibulatkan_per_bucket(api):
+    a = api._kanonik_pencarian(["rice"], max_kalori=420)
+    b = api._kanonik_pencarian(["rice"], max_kalori=449)
+    assert a == b
+    assert a["max_kalori"] == 400
+    assert api._kanonik_pencarian(["rice"], max_kalori=1000)["max_kalori"] is None
+
+
+def test_cache_disk_dipakai_setelah_memori_kosong(api, mock_state):
+    hasil = api.cari_resep_spoonacular(["tempeh"])
+    api.search_cache.memori.clear()
+    assert api.cari_resep_spoonacular(["tempeh"]) == hasil
+    assert mock_state.request_count == 1
+
+
+# --- MEMORY CACHE ---
+def test_memory_cache_lru_dan_ttl():
+    cache = MemoryCache(ttl=60, max_entri=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1       # "a" jadi yang terbaru
+    cache.set("c", 3)                # "b" dibuang
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.set("lama", "x", waktu=time.time() - 120)
+    assert cache.get("lama") is None
+    assert cache.get("lama", izinkan_kadaluarsa=True) == "x"
@@ -0,0 +1,41 @@
+import time
+
+from src.semantic_cache import SemanticCache, normalisasi
+
+
+def test_normalisasi_membuang_stopword():
+    assert normalisasi("Bagaimana cara memasak nasi goreng?") == ("memasak", "nasi", "goreng")
+    assert normalisasi("apa itu") == ("apa", "itu")
+
+
+def test_pertanyaan_mirip_memakai_jawaban_lama():
+    cache = SemanticCache(threshold=0.6)
+    cache.simpan("Bagaimana cara memasak nasi goreng?", "Tumis bumbu, masukkan nasi.")
+    jawaban, skor = cache.cari("gimana caranya masak nasi goreng")
+    assert jawaban == "Tumis bumbu, masukkan nasi."
+    assert 0.6 <= skor <= 1
+    assert cache.cari("cara memasak nasi goreng")[1] == 1.0
+
+
+def test_kata_penting_berbeda_tidak_dianggap_sama():
+    cache = SemanticCache(threshold=0.5)
+    cache.simpan("cara memasak nasi goreng", "jawaban nasi")
+    assert cache.cari("cara memasak mie goreng") == (None, 0.0)
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_dan_ttl():
+    cache = SemanticCache(max_entri=2, ttl=60)
+    cache.simpan("resep rendang daging", "rendang")
+    cache.simpan("resep soto ayam", "soto")
+    cache.cari("resep rendang daging")             # rendang jadi yang terbaru
+    cache.simpan("resep gado gado", "gado")
+    assert cache.cari("resep soto ayam")[0] is None
+    assert cache.cari("resep rendang daging")[0] == "rendang"
+    assert cache.stats()["evictions"] == 1
+
+    kadaluarsa = SemanticCache(ttl=0)
+    kadaluarsa.simpan("resep rendang daging", "rendang")
+    time.sleep(0.01)
+    assert kadaluarsa.cari("resep rendang daging") == (None, 0.0)
+    assert kadaluarsa.stats()["entries"] == 0
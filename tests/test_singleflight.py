@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def _jalankan_bersamaan(jumlah, fungsi):
+    with ThreadPoolExecutor(max_workers=jumlah) as pool:
+        return [f.result() for f in [pool.submit(fungsi) for _ in range(jumlah)]]
+
+
+def test_singleflight_menggabungkan_panggilan_identik():
+    flight = SingleFlight()
+    masuk = threading.Event()
+    lanjut = threading.Event()
+    dipanggil = []
+
+    def lambat():
+        dipanggil.append(1)
+        masuk.set()
+        lanjut.wait(5)
+        return {"hasil": [1, 2]}
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        pemimpin = pool.submit(flight.do, "k", lambat)
+        assert masuk.wait(5)
+        pengikut = [pool.submit(flight.do, "k", lambat) for _ in range(4)]
+        while flight.stats()["coalesced"] < 4:
+            threading.Event().wait(0.005)
+        lanjut.set()
+        hasil = [pemimpin.result()] + [f.result() for f in pengikut]
+
+    assert len(dipanggil) == 1
+    assert all(h == {"hasil": [1, 2]} for h in hasil)
+    # Pengikut menerima salinan, bukan objek yang sama
+    assert hasil[1] is not hasil[0]
+    stats = flight.stats()
+    assert (stats["executed"], stats["coalesced"], stats["in_flight"]) == (1, 4, 0)
+
+
+def test_singleflight_meneruskan_exception():
+    flight = SingleFlight()
+    masuk = threading.Event()
+    lanjut = threading.Event()
+
+    def gagal():
+        masuk.set()
+        lanjut.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        a = pool.submit(flight.do, "k", gagal)
+        assert masuk.wait(5)
+        b = pool.submit(flight.do, "k", gagal)
+        while flight.stats()["coalesced"] < 1:
+            threading.Event().wait(0.005)
+        lanjut.set()
+        for f in (a, b):
+            with pytest.raises(ValueError):
+                f.result()
+    # Setelah selesai, kunci yang sama dijalankan ulang
+    assert flight.do("k", lambda: 3) == 3
+
+
+def test_async_singleflight():
+    flight = AsyncSingleFlight()
+    dipanggil = []
+
+    async def ambil(nilai):
+        dipanggil.append(nilai)
+        await asyncio.sleep(0.05)
+        return [nilai]
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", ambil, 1) for _ in range(5)), flight.do("lain", ambil, 2))
+
+    hasil = asyncio.run(main())
+    assert hasil == [[1]] * 5 + [[2]]
+    assert sorted(dipanggil) == [1, 2]
+    assert flight.stats()["coalesced"] == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_async_singleflight_pembatalan_tidak_menular():
+    flight = AsyncSingleFlight()
+
+    async def ambil():
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    async def main():
+        pertama = asyncio.ensure_future(flight.do("k", ambil))
+        await asyncio.sleep(0)
+        kedua = asyncio.ensure_future(flight.do("k", ambil))
+        await asyncio.sleep(0.01)
+        pertama.cancel()
+        return await kedua
+
+    assert asyncio.run(main()) == "ok"
+
+
+# --- LEWAT MOCK SPOONACULAR ---
+def test_pencarian_bersamaan_satu_request(api, mock_state):
+    mock_state.latency_ms = 200
+    hasil = _jalankan_bersamaan(6, lambda: api.cari_resep_spoonacular(["rice", "chicken"]))
+    assert mock_state.request_count == 1
+    assert all(h == hasil[0] for h in hasil)
+    assert hasil[0]
+
+
+def test_detail_bersamaan_satu_request(api, mock_state):
+    mock_state.latency_ms = 200
+    hasil = _jalankan_bersamaan(6, lambda: api.dapatkan_detail_resep(640007))
+    assert mock_state.request_count == 1
+    assert all(h["id"] == 640007 for h in hasil)
+
+
+def test_pencarian_async_bersamaan_satu_request(api, mock_state, monkeypatch):
+    from src import api_client_async
+
+    for nama in ("search_cache", "negative_cache", "spoonacular_guard"):
+        monkeypatch.setattr(api_client_async, nama, getattr(api, nama))
+    monkeypatch.setattr(api_client_async, "_flight", AsyncSingleFlight())
+    mock_state.latency_ms = 200
+
+    hasil = api_client_async.cari_resep_banyak([["egg", "chili"], ["chili", "egg"], ["Egg", "chili"]], timeout=10)
+    assert mock_state.request_count == 1
+    assert hasil[0] and hasil[0] == hasil[1] == hasil[2]
@@ -0,0 +1,177 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+
+import pytest
+
+from src import bookmark, chat_log, storage
+from src.json_store import JsonStore
+
+
+def _tulis_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+@pytest.fixture
+def json_backend(data_dir, monkeypatch):
+    """STORAGE_BACKEND=json dengan JsonStore baru di folder sementara."""
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "json")
+    monkeypatch.setattr(bookmark, "bookmark_store",
+                        JsonStore(bookmark.BOOKMARK_FILE, dari_json=bookmark._ke_set, ke_json=bookmark._ke_list))
+    return data_dir
+
+
+# --- SQLITE ---
+def test_sqlite_bookmark_round_trip(sqlite_storage):
+    assert bookmark.add_bookmark("andi", 640001)
+    assert bookmark.add_bookmark("andi", "640002")
+    assert not bookmark.add_bookmark("andi", 640001)
+    assert bookmark.get_user_bookmarks("andi") == [640001, 640002]
+    assert bookmark.remove_bookmark("andi", 640001)
+    assert bookmark.get_user_bookmarks("andi") == [640002]
+    assert bookmark.get_user_bookmarks("budi") == []
+
+    # Data tetap ada untuk koneksi baru
+    assert storage.SQLiteStorage().bookmark_daftar("andi") == [640002]
+
+
+def test_sqlite_chat_dipangkas(sqlite_storage, monkeypatch):
+    monkeypatch.setattr(chat_log, "MAX_MESSAGES", 3)
+    for i in range(5):
+        chat_log.append("andi", {"role": "user", "text": f"pesan {i}"})
+    assert [p["text"] for p in chat_log.tail("andi")] == ["pesan 2", "pesan 3", "pesan 4"]
+    assert chat_log.clear("andi")
+    assert chat_log.tail("andi") == []
+
+
+def test_sqlite_migrasi_dari_json(data_dir, sqlite_storage):
+    _tulis_json(data_dir / "bookmarks.json", {"andi": [640001, "640002", "bukan-angka"]})
+    _tulis_json(data_dir / "history.json", {"andi": [
+        {"recipe_id": 640003, "viewed_at": "2025-01-02 10:00:00"},
+        {"recipe_id": "640004", "viewed_at": "2025-01-01 10:00:00"},
+        {"recipe_id": "x"},
+    ]})
+    _tulis_json(data_dir / "ai_chats.json", {"andi": [{"role": "user", "text": "halo"}]})
+
+    assert sqlite_storage.bookmark_daftar("andi") == [640001, 640002]
+    # Urutan history (terbaru dulu) tetap sama seperti di JSON
+    assert [h["recipe_id"] for h in sqlite_storage.history_daftar("andi")] == [640003, 640004]
+    assert sqlite_storage.chat_ekor("andi", 10) == [{"role": "user", "text": "halo"}]
+    assert sqlite_storage.meta_ambil("migrated_json") == "1"
+
+    # Migrasi hanya sekali: perubahan JSON sesudahnya tidak disalin lagi
+    _tulis_json(data_dir / "bookmarks.json", {"andi": [1, 2, 3]})
+    assert storage.SQLiteStorage().bookmark_daftar("andi") == [640001, 640002]
+
+
+def test_sqlite_migrasi_gagal_di_rollback_lalu_diulang(data_dir, sqlite_storage, monkeypatch):
+    _tulis_json(data_dir / "bookmarks.json", {"andi": [640001]})
+    _tulis_json(data_dir / "ai_chats.json", {"andi": [{"role": "user", "text": "halo"}]})
+    asli = storage._baca_json
+
+    def rusak(path):
+        if path == storage.CHAT_LEGACY_JSON:
+            raise sqlite3.OperationalError("disk penuh")
+        return asli(path)
+
+    monkeypatch.setattr(storage, "_baca_json", rusak)
+    with pytest.raises(sqlite3.OperationalError):
+        sqlite_storage.bookmark_daftar("andi")
+    assert sqlite_storage._conn is None
+    conn = sqlite3.connect(sqlite_storage.path)
+    assert conn.execute("SELECT COUNT(*) FROM bookmarks").fetchone()[0] == 0
+    conn.close()
+
+    monkeypatch.setattr(storage, "_baca_json", asli)
+    assert sqlite_storage.bookmark_daftar("andi") == [640001]
+    assert sqlite_storage.chat_ekor("andi", 10) == [{"role": "user", "text": "halo"}]
+
+
+# --- JSON ---
+def test_json_bookmark_round_trip(json_backend):
+    assert bookmark.add_bookmark("andi", 640001)
+    assert bookmark.add_bookmark("andi", 640002)
+    assert not bookmark.add_bookmark("andi", 640002)
+    assert bookmark.remove_bookmark("andi", 640001)
+
+    with open(bookmark.BOOKMARK_FILE, encoding="utf-8") as f:
+        assert json.load(f) == {"andi": [640002]}
+    # Pembaca baru (proses lain) melihat isi file yang sama
+    baru = JsonStore(bookmark.BOOKMARK_FILE, dari_json=bookmark._ke_set, ke_json=bookmark._ke_list)
+    assert list(baru.baca()["andi"]) == [640002]
+
+
+def test_json_store_file_tidak_berubah_tidak_dibaca_ulang(data_dir, monkeypatch):
+    from src import json_store
+
+    monkeypatch.setattr(json_store, "JSON_STORE_CHECK_SEC", 0)
+    path = str(data_dir / "x.json")
+    _tulis_json(path, {"a": 1})
+    store = JsonStore(path)
+    for _ in range(5):
+        assert store.baca() == {"a": 1}
+    assert store.stats()["loads"] == 1
+    assert store.stats()["reads"] == 5
+
+
+def test_json_store_membaca_ulang_file_yang_berubah(data_dir, monkeypatch):
+    from src import json_store
+
+    monkeypatch.setattr(json_store, "JSON_STORE_CHECK_SEC", 0)
+    path = str(data_dir / "x.json")
+    store = JsonStore(path)
+    assert store.baca() == {}
+    _tulis_json(path, {"a": 1, "panjang": "berbeda"})
+    assert store.baca() == {"a": 1, "panjang": "berbeda"}
+    assert store.stats()["loads"] == 2
+
+
+def test_json_store_perbarui_gagal_tidak_menulis(data_dir):
+    store = JsonStore(str(data_dir / "x.json"))
+    store.perbarui(lambda data: data.update(a=1) or True)
+
+    def rusak(data):
+        data["a"] = 2
+        raise ValueError("batal")
+
+    with pytest.raises(ValueError):
+        store.perbarui(rusak)
+    assert store.baca() == {"a": 1}
+    assert not [n for n in os.listdir(data_dir) if n.endswith(".tmp")]
+
+
+def _tambah_banyak(path, awal):
+    store = JsonStore(path)
+    for i in range(awal, awal + 25):
+        store.perbarui(lambda data, i=i: data.setdefault("ids", []).append(i) or True)
+
+
+def test_json_store_tulis_antar_proses_tidak_hilang(data_dir):
+    path = str(data_dir / "x.json")
+    ctx = multiprocessing.get_context("spawn")
+    proses = [ctx.Process(target=_tambah_banyak, args=(path, n * 100)) for n in range(3)]
+    for p in proses:
+        p.start()
+    for p in proses:
+        p.join(30)
+    with open(path, encoding="utf-8") as f:
+        assert len(json.load(f)["ids"]) == 75
+
+
+# --- BOOKMARK MASSAL ---
+@pytest.mark.parametrize("backend", ["sqlite_storage", "json_backend"])
+def test_is_bookmarked_many(backend, request):
+    request.getfixturevalue(backend)
+    for rid in (640003, 640001, 640002):
+        bookmark.add_bookmark("andi", rid)
+    bookmark.remove_bookmark("andi", 640001)
+
+    # Urutan tambah tetap terjaga setelah hapus
+    assert bookmark.get_user_bookmarks("andi") == [640003, 640002]
+    assert bookmark.is_bookmarked_many("andi", [640002, "640003", 640001, "x", 5]) == {
+        640002: True, 640003: True, 640001: False, 5: False}
+    assert bookmark.is_bookmarked_many("budi", [640002]) == {640002: False}
+    assert bookmark.is_bookmarked_many("", [640002]) == {640002: False}
+    assert bookmark.is_bookmarked_many("andi", []) == {}